@@ -0,0 +1,104 @@
+"""In-process stand-in for mysql.connector backed by sqlite3, so the DB writers can be benchmarked
+without a MySQL server. Only what the writers use is translated: %s placeholders and
+ON DUPLICATE KEY UPDATE ... VALUES(col)."""
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extract_pdf_wells import STIM_COLUMNS, WELL_COLUMNS  # noqa: E402
+
+SCRAPED_COLUMNS = (
+    "well_id", "well_name", "api_number", "scraped_url", "api_no", "closest_city", "county", "latitude",
+    "longitude", "lat_deg", "lon_deg", "gas_mcf", "oil_bbl", "operator", "production_dates_on_file", "well_status", "well_type",
+    "last_checked",
+)
+
+
+def _schema() -> str:
+    wells = ", ".join("%s %s" % (c, "TEXT UNIQUE" if c == "api_number" else "TEXT") for c in WELL_COLUMNS)
+    stims = ", ".join("%s TEXT" % c for c in STIM_COLUMNS)
+    scraped = ", ".join("%s %s" % (c, "INTEGER UNIQUE" if c == "well_id" else "TEXT") for c in SCRAPED_COLUMNS)
+    return """
+        CREATE TABLE wells (well_id INTEGER PRIMARY KEY AUTOINCREMENT, %s, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE INDEX idx_source_pdf ON wells (source_pdf);
+        CREATE INDEX idx_pdf_sha256 ON wells (pdf_sha256);
+        CREATE TABLE stimulations (stimulation_id INTEGER PRIMARY KEY AUTOINCREMENT, well_id INTEGER, %s);
+        CREATE INDEX idx_stim_well ON stimulations (well_id);
+        CREATE TABLE stimulation_proppants (proppant_id INTEGER PRIMARY KEY AUTOINCREMENT, stimulation_id INTEGER,
+            well_id INTEGER, proppant_type TEXT, lbs INTEGER);
+        CREATE INDEX idx_proppant_stimulation ON stimulation_proppants (stimulation_id);
+        CREATE INDEX idx_proppant_well ON stimulation_proppants (well_id);
+        CREATE TABLE proppant_summary (operator TEXT, formation TEXT, month TEXT, proppant_type TEXT,
+            stimulations INTEGER, total_lbs INTEGER, PRIMARY KEY (proppant_type, operator, formation, month));
+        CREATE TABLE scraped_wells (scraped_id INTEGER PRIMARY KEY AUTOINCREMENT, %s);
+        CREATE TABLE scrape_failures (well_id INTEGER PRIMARY KEY, attempts INTEGER, last_error TEXT,
+            first_failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, last_failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    """ % (wells, stims, scraped)
+
+
+def _translate(query: str) -> str:
+    query = query.replace("%s", "?")
+    if "ON DUPLICATE KEY UPDATE" in query:
+        query = query.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+        query = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", query)
+    return query
+
+
+class Cursor:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._cur = conn.cursor()
+
+    def execute(self, query: str, params=()) -> None:
+        self._cur.execute(_translate(query), tuple(params))
+
+    def executemany(self, query: str, rows) -> None:
+        self._cur.executemany(_translate(query), [tuple(r) for r in rows])
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def close(self) -> None:
+        self._cur.close()
+
+
+class Connection:
+    def __init__(self, path: str = ":memory:") -> None:
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_schema())
+
+    def cursor(self, **kwargs) -> Cursor:
+        return Cursor(self._conn)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def connect(**kwargs) -> Connection:
+    return Connection()
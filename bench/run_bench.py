@@ -0,0 +1,267 @@
+"""Benchmark suite for extraction, parsing, scraping and DB writes.
+
+    python bench/run_bench.py                  # run everything, compare with bench/baseline.json
+    python bench/run_bench.py --save-baseline  # record the current numbers as the new baseline
+    python bench/run_bench.py --only parse_ --repeat 7 --tolerance 0.3
+
+Inputs are generated deterministically (bench/synthetic.py): well-file PDFs of 3, 30 and 300 pages, and
+DrillingEdge-style pages served by a local stub server. DB writers run against an in-memory sqlite
+stand-in (bench/fake_db.py). Each benchmark runs one untimed warmup round, then --repeat timed rounds
+(default 9) with the garbage collector paused.
+
+Every timed round is divided by a fixed pure-Python calibration loop run right before and right after
+it, so CPU frequency drift and noisy neighbours affect both sides of the ratio; the benchmark's score is
+the median of those per-round ratios. A baseline recorded on one machine is therefore roughly usable on
+another. A benchmark slower than its baseline by more than its tolerance (TOLERANCES, else --tolerance,
+default 25%) is a REGRESSION and the script exits with status 1.
+"""
+import gc
+import io
+import json
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import extract_pdf_wells as extract  # noqa: E402
+import scraper_wells as scraper  # noqa: E402
+import fake_db  # noqa: E402
+import synthetic  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+BASELINE = BENCH_DIR / "baseline.json"
+PDF_SIZES = (3, 30, 300)
+N_WELLS = 200
+WARMUP_ROUNDS = 1
+CALIBRATION_CALLS = 10
+
+# Allowed slowdown by benchmark name prefix; others use --tolerance. The sqlite writers and the HTTP round
+# trip depend on the allocator, page cache and sockets, and vary more between runs than the parsers.
+TOLERANCES = {
+    "write_batch": 0.4,
+    "write_pdf_result": 0.4,
+    "insert_scraped": 0.4,
+    "load_existing_wells": 0.4,
+    "scrape_well_detail": 0.5,
+}
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+_CAL_PATTERN = re.compile(r"(\w+)\s*:\s*([\d,]+)")
+_CAL_TEXT = "Lbs Proppant: 3,500,000\nStages: 36\n" * 200
+
+
+def calibration_unit() -> float:
+    """Seconds per call of a fixed regex + dict + string workload; benchmark times are reported in units of this."""
+    t0 = time.perf_counter()
+    for _ in range(CALIBRATION_CALLS):
+        counts = {}
+        for m in _CAL_PATTERN.finditer(_CAL_TEXT):
+            counts[m.group(1)] = counts.get(m.group(1), 0) + int(m.group(2).replace(",", ""))
+        "".join(sorted(counts))
+    return (time.perf_counter() - t0) / CALIBRATION_CALLS
+
+
+def measure(fn, number: int, repeat: int, setup=None, warmup: int = WARMUP_ROUNDS) -> tuple:
+    """(median seconds per call, median calibration unit, median scaled score) of fn(state).
+
+    Runs `warmup` untimed rounds and then `repeat` timed rounds of `number` calls; setup() runs untimed
+    before every round. Each round's score is its time per call over the mean of the calibration units
+    measured just before and just after it.
+    """
+    seconds, units, scores = [], [], []
+    for i in range(warmup + repeat):
+        state = setup() if setup else None
+        with redirect_stdout(io.StringIO()):
+            gc.collect()
+            gc.disable()
+            try:
+                before = calibration_unit()
+                t0 = time.perf_counter()
+                for _ in range(number):
+                    fn(state)
+                elapsed = (time.perf_counter() - t0) / number
+                unit = (before + calibration_unit()) / 2
+            finally:
+                gc.enable()
+        if i >= warmup:
+            seconds.append(elapsed)
+            units.append(unit)
+            scores.append(elapsed / unit)
+    return statistics.median(seconds), statistics.median(units), statistics.median(scores)
+
+
+def tolerance_for(name: str, default: float, override: bool) -> float:
+    if not override:
+        for prefix, tolerance in TOLERANCES.items():
+            if name.startswith(prefix):
+                return tolerance
+    return default
+
+
+def build_inputs(tmp: Path) -> dict:
+    rng = random.Random(560)
+    pdfs, texts = {}, {}
+    for n in PDF_SIZES:
+        path = tmp / ("well_%dp.pdf" % n)
+        synthetic.make_pdf(path, synthetic.well_pages(rng, n))
+        pdfs[n] = str(path)
+        texts[n] = extract.get_pdf_text(str(path))
+    parsed = [extract.parse_text("W%05d.pdf" % i, "\n".join(synthetic.well_pages(rng, 3, i))) for i in range(N_WELLS)]
+    apis = ["33-053-%05d" % (10000 + i) for i in range(N_WELLS)]
+    pages = [synthetic.detail_html(random.Random(api), api) for api in apis[:20]]
+    scraped = [dict(scraper.parse_well_detail(page), well_id=i + 1, url="https://example/wells/%d" % i)
+               for i, page in enumerate(pages)]
+    return {"pdfs": pdfs, "texts": texts, "parsed": parsed, "apis": apis, "pages": pages, "scraped": scraped}
+
+
+def _fresh_db(with_wells: int = 0):
+    conn = fake_db.connect()
+    cur = conn.cursor()
+    if with_wells:
+        cur.executemany("INSERT INTO wells (api_number, source_pdf) VALUES (%s, %s)",
+                        [("33-053-%05d" % i, "W%05d.pdf" % i) for i in range(with_wells)])
+        conn.commit()
+    return conn, cur
+
+
+def benchmarks(inputs: dict, quick: bool):
+    """(name, fn, number, setup) for every benchmark."""
+    pdfs, texts, parsed = inputs["pdfs"], inputs["texts"], inputs["parsed"]
+    out = []
+    for n in PDF_SIZES:
+        if quick and n == 300:
+            continue
+        out.append(("get_pdf_text[%dp]" % n, lambda _, p=pdfs[n]: extract.get_pdf_text(p), 1, None))
+    if not quick:
+        def streaming(_):
+            extract.configure_streaming(True)
+            try:
+                extract.get_pdf_text_streaming(pdfs[300])
+            finally:
+                extract.configure_streaming(False)
+        out.append(("get_pdf_text_streaming[300p]", streaming, 1, None))
+    for fn in (extract.parse_well_fields, extract.parse_stimulation_fields, extract.parse_proppant_details,
+               extract.parse_stimulations):
+        for n in PDF_SIZES:
+            out.append(("%s[%dp]" % (fn.__name__, n), lambda _, fn=fn, t=texts[n]: fn(t), 20 if n < 300 else 3, None))
+
+    def write_batch(state):
+        conn, cur = state
+        extract.write_batch(cur, parsed, {})
+        conn.commit()
+    out.append(("write_batch[%d]" % N_WELLS, write_batch, 1, _fresh_db))
+
+    def write_each(state):
+        conn, cur = state
+        for p in parsed:
+            extract.write_pdf_result(cur, p)
+            conn.commit()
+    out.append(("write_pdf_result[%d]" % N_WELLS, write_each, 1, _fresh_db))
+
+    def load_existing(state):
+        extract.load_existing_wells(state[1])
+    out.append(("load_existing_wells[10000]", load_existing, 5, lambda: _fresh_db(10000)))
+
+    pages = inputs["pages"]
+    out.append(("parse_well_detail[%d]" % len(pages), lambda _: [scraper.parse_well_detail(p) for p in pages], 1, None))
+    out.append(("parse_search_results[20]", lambda _: [scraper.parse_search_results(synthetic.search_html(a), a)
+                                                   for a in inputs["apis"][:20]], 1, None))
+
+    def insert_scraped(state):
+        conn, cur = state
+        for row in inputs["scraped"]:
+            scraper.insert_scraped(cur, row["well_id"], row)
+        conn.commit()
+    out.append(("insert_scraped[%d]" % len(inputs["scraped"]), insert_scraped, 1, _fresh_db))
+    return out
+
+
+def run_scrape_benchmark(inputs: dict, repeat: int) -> tuple:
+    """scrape_well_detail (HTTP round trip + parse) for 20 pages from the local stub."""
+    with StubServer() as stub:
+        session = scraper.ScraperSession(retries=0)
+        urls = ["%s/wells/%s/well-%s" % (stub.base, a, a) for a in inputs["apis"][:20]]
+        for url in urls:
+            scraper.scrape_well_detail(session, url)  # warm the keep-alive connection and page cache
+        m = measure(lambda _: [scraper.scrape_well_detail(session, u) for u in urls], 1, repeat)
+        session.close()
+    return m
+
+
+def main() -> None:
+    quick = "--quick" in sys.argv
+    save = "--save-baseline" in sys.argv
+    only = _arg_value("--only")
+    repeat = int(_arg_value("--repeat", 5 if quick else 9))
+    tolerance = float(_arg_value("--tolerance", 0.25))
+    override = _arg_value("--tolerance") is not None
+    extract.DEBUG = scraper.DEBUG = False
+    extract.TEXT_CACHE_DIR = None
+
+    seconds, units, scaled = {}, {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = build_inputs(Path(tmp))
+        todo = benchmarks(inputs, quick)
+        if only:
+            todo = [b for b in todo if only in b[0]]
+        for name, fn, number, setup in todo:
+            seconds[name], units[name], scaled[name] = measure(fn, number, repeat, setup)
+        if not only or only in "scrape_well_detail[20]":
+            name = "scrape_well_detail[20]"
+            seconds[name], units[name], scaled[name] = run_scrape_benchmark(inputs, repeat)
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    base_results = baseline.get("results", {})
+    regressions = 0
+    print("calibration unit: %.3f-%.3f ms%s" % (1000 * min(units.values()), 1000 * max(units.values()),
+                                                 " (quick)" if quick else ""))
+    print("%-36s %12s %10s %10s  %s" % ("benchmark", "ms/call", "units", "baseline", "status"))
+    for name in seconds:
+        base = base_results.get(name)
+        if base is None:
+            status, base_txt = "new", "-"
+        else:
+            ratio = scaled[name] / base
+            base_txt = "%.2f" % base
+            allowed = tolerance_for(name, tolerance, override)
+            if ratio > 1 + allowed:
+                status = "REGRESSION x%.2f" % ratio
+                regressions += 1
+            elif ratio < 1 - allowed:
+                status = "faster x%.2f" % (1 / ratio)
+            else:
+                status = "ok"
+        print("%-36s %12.3f %10.2f %10s  %s" % (name, 1000 * seconds[name], scaled[name], base_txt, status))
+
+    if save:
+        base_results.update({name: round(value, 4) for name, value in scaled.items()})
+        BASELINE.write_text(json.dumps({
+            "note": "median of per-round seconds per call / calibration unit; written by bench/run_bench.py --save-baseline",
+            "python": sys.version.split()[0],
+            "results": dict(sorted(base_results.items())),
+        }, indent=2) + "\n")
+        print("Baseline saved to", BASELINE)
+    elif regressions:
+        print("%d benchmark(s) regressed by more than their tolerance" % regressions, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Local DrillingEdge stand-in for the scraper benchmarks: /search?api_no=... links to /wells/<api>/...,
+and /wells/<api>/... serves a synthetic well page (see synthetic.detail_html)."""
+import http.server
+import random
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from synthetic import detail_html, search_html
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/search":
+            api = (parse_qs(url.query).get("api_no") or [""])[0]
+            body = search_html(api) if api else "<html></html>"
+        elif url.path.startswith("/wells/"):
+            api = url.path.split("/")[2]
+            if api not in self.pages:
+                self.pages[api] = detail_html(random.Random(api), api)
+            body = self.pages[api]
+        else:
+            body = "<html><body>home</body></html>"
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer:
+    """Threaded HTTP server on 127.0.0.1 and a free port; use as a context manager."""
+
+    def __enter__(self) -> "StubServer":
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.base = "http://127.0.0.1:%d" % self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
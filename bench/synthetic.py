@@ -0,0 +1,132 @@
+"""Deterministic synthetic inputs for the benchmarks: well-file PDFs in the layout the extraction regexes
+expect, and DrillingEdge-style search / well pages for the scraper parsers."""
+import random
+
+OPERATORS = ("Oasis Petroleum North America LLC", "Continental Resources, Inc.", "Whiting Oil and Gas Corporation",
+             "Hess Bakken Investments II, LLC", "XTO Energy Inc.")
+FORMATIONS = ("Bakken", "Three Forks", "Madison", "Red River")
+COUNTIES = ("McKenzie", "Williams", "Mountrail", "Dunn")
+
+
+def well_pages(rng: random.Random, n_pages: int, index: int = 0) -> list:
+    """Text of an n-page well file: well information on page 1, the stimulation table about a third
+    of the way in, survey-style filler everywhere else."""
+    api = "33-%03d-%05d" % (rng.choice((53, 105, 61, 25)), 10000 + index)
+    well = "\n".join([
+        "WELL INFORMATION",
+        "Well Name and Number: %s %d-%d%sH" % (rng.choice(("Johnson", "Lewis", "Olson", "Berg")), rng.randint(1, 40),
+                                              rng.randint(1, 36), rng.choice("ABCDEFGH")),
+        "Operator: %s" % rng.choice(OPERATORS),
+        "API#: %s" % api,
+        "Enseco Job#: S%05d" % rng.randint(10000, 99999),
+        "Job Type: MWD/LWD",
+        "County, State: %s County, North Dakota" % rng.choice(COUNTIES),
+        "Well Surface Hole Location (SHL): %d' FNL & %d' FWL, Sec. %d, T153N, R101W" % (
+            rng.randint(100, 2500), rng.randint(100, 2500), rng.randint(1, 36)),
+        "",
+        "Latitude: %.5f N" % rng.uniform(47, 49),
+        "Longitude: %.5f W" % rng.uniform(102, 104),
+        "Datum: NAD83",
+    ])
+    stim = "\n".join([
+        "WELL SPECIFIC STIMULATIONS",
+        "Date Stimulated: %d/%d/20%02d" % (rng.randint(1, 12), rng.randint(1, 28), rng.randint(10, 20)),
+        "Stimulated Formation: %s" % rng.choice(FORMATIONS),
+        "Top (Ft): {:,}".format(rng.randint(9000, 11500)),
+        "Bottom (Ft): {:,}".format(rng.randint(15000, 21000)),
+        "Stimulation Stages: %d" % rng.randint(10, 60),
+        "Volume: {:,}".format(rng.randint(20000, 300000)),
+        "Volume Units: Barrels",
+        "Type Treatment: Sand Frac",
+        "Acid %%: %.1f" % rng.uniform(0, 15),
+        "Lbs Proppant: {:,}".format(rng.randint(1000000, 9000000)),
+        "Maximum Treatment Pressure (PSI): {:,}".format(rng.randint(5000, 9500)),
+        "Maximum Treatment Rate (BBLS/Min): %.1f" % rng.uniform(20, 80),
+        "Details",
+        "100 Mesh White: %d" % rng.randint(100000, 900000),
+        "40/70 White: {:,}".format(rng.randint(100000, 3000000)),
+        "20/40 Ceramic: %d" % rng.randint(100000, 900000),
+    ])
+    pages = []
+    for p in range(n_pages):
+        if p == 0:
+            pages.append(well)
+        elif p == max(1, n_pages // 3):
+            pages.append(stim)
+        else:
+            rows = ["MD  Inc  Azi  TVD  N/S  E/W  VS  DLS"]
+            for _ in range(45):
+                rows.append("%.2f  %.2f  %.2f  %.2f  %.2f  %.2f  %.2f  %.2f" % tuple(rng.uniform(0, 20000) for _ in range(8)))
+            pages.append("\n".join(rows))
+    if n_pages == 1:
+        pages[0] += "\n\n" + stim
+    return pages
+
+
+def make_pdf(path, pages: list) -> None:
+    """Write a minimal text PDF (Helvetica, one content stream per page) without any PDF library."""
+    body = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    num = 4
+    for text in pages:
+        ops = ["BT /F1 10 Tf 12 TL 40 780 Td"]
+        for line in text.split("\n"):
+            line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append("(%s) Tj T*" % line)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        body[num] = ("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+                     "/Contents %d 0 R >>" % (num + 1)).encode()
+        body[num + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        kids.append("%d 0 R" % num)
+        num += 2
+    body[2] = ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(kids), len(pages))).encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for i in range(1, num):
+        offsets[i] = len(out)
+        out += b"%d 0 obj\n" % i + body[i] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % num
+    for i in range(1, num):
+        out += b"%010d 00000 n \n" % offsets[i]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (num, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+_NAV_BLOCKS = [
+    '<div class="nav"><ul>%s</ul><script>window.x%d = {"k": %d};</script></div>'
+    % ("".join('<li><a href="/section/%d">Section %d</a></li>' % (j, j) for j in range(25)), i, i)
+    for i in range(30)
+]
+_NAV = "".join(_NAV_BLOCKS)
+_NAV_SHORT = "".join(_NAV_BLOCKS[:3])
+
+
+def detail_html(rng: random.Random, api: str) -> str:
+    """A DrillingEdge-style well page: nav/script noise around section.meta_info, table.skinny and p.block_stat."""
+    lat, lon = rng.uniform(47, 49), -rng.uniform(102, 104)
+    meta = "".join('<div>%s: <span class="detail_point">%s</span></div>' % kv for kv in (
+        ("Well Name", "%s %d-%dH" % (rng.choice(("Johnson", "Lewis", "Olson")), rng.randint(1, 40), rng.randint(1, 36))),
+        ("API #", api),
+        ("Operator", '<a href="/operators/1">%s</a>' % rng.choice(OPERATORS)),
+        ("County", rng.choice(COUNTIES)),
+        ("Production Dates on File", "2014-05 to 2023-12"),
+        ("Latitude / Longitude", "%.5f, %.5f" % (lat, lon)),
+    ))
+    table = "".join("<tr>%s</tr>" % "".join("<th>%s</th><td>%s</td>" % kv for kv in row) for row in (
+        (("Well Status", "Active"), ("Well Type", "Oil &amp; Gas")),
+        (("Closest City", rng.choice(("Williston", "Watford City", "Tioga"))), ("County", "x")),
+        (("Spud Date", "2014-01-02"), ("Field", "Baker")),
+    ))
+    stats = ('<p class="block_stat"><span class="dropcap">%.1fk</span> Barrels of Oil Produced in Dec 2023</p>'
+             '<p class="block_stat"><span class="dropcap">{:,}</span> MCF of Gas Produced in Dec 2023</p>'
+             % rng.uniform(1, 99)).format(rng.randint(1000, 90000))
+    return ('<html><head><title>%s</title></head><body>%s<section class="meta_info">%s</section>%s'
+            '<table class="skinny">%s</table>%s%s</body></html>' % (api, _NAV, meta, _NAV_SHORT, table, stats, _NAV))
+
+
+def search_html(api: str) -> str:
+    return '<html><body>%s<table><tr><td><a href="/wells/%s/well-%s">result</a></td></tr></table></body></html>' % (
+        _NAV_SHORT, api, api)
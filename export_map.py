@@ -0,0 +1,268 @@
+"""Static export for the wells map: gzip GeoJSON marker tiles plus one detail JSON per well.
+
+    python export_map.py            # export wells changed since the last run
+    python export_map.py --full     # rebuild everything
+    python export_map.py --out DIR --zoom 9
+
+Run it after extract_pdf_wells.py and scraper_wells.py. Output (default temp/map_export/, or
+MAP_EXPORT_DIR in config.py):
+
+    index.json                      tile zoom, overall bounds and {"z/x/y": marker count}
+    tiles/{z}/{x}/{y}.geojson.gz    markers in one web-mercator tile (well_id, api_number, name)
+    wells/{well_id}.json            the wells row, its stimulations and its scraped_wells row
+    export_state.json               watermark and well -> tile map used by the next incremental run
+
+A well is re-exported when its wells, stimulations or scraped_wells rows have an `updated_at` at or after
+the previous run's watermark, or when it has been deleted; only the tiles those wells were in or move to
+are rewritten. The watermark is the run's start on the DB clock minus WATERMARK_MARGIN seconds
+(EXPORT_WATERMARK_MARGIN in config.py): `updated_at` is set when a row is written, not when it commits,
+so a row written just before a run but committed during it is invisible to that run and must still be
+newer than the watermark it leaves. The margin must exceed the longest write transaction (the
+extractor commits every few hundred PDFs); wells changed within it are simply exported twice.
+"""
+import gzip
+import json
+import math
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import mysql.connector
+
+from extract_pdf_wells import load_config
+
+TILE_ZOOM = 9
+ID_CHUNK = 1000
+STATE_FILE = "export_state.json"
+WATERMARK_MARGIN = 900  # seconds; see the module docstring
+
+
+def tile_for(lat: float, lon: float, zoom: int) -> str:
+    """"z/x/y" of the web-mercator (slippy map) tile that contains the point."""
+    n = 2 ** zoom
+    lat = max(-85.0511, min(85.0511, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return "%d/%d/%d" % (zoom, min(n - 1, max(0, x)), min(n - 1, max(0, y)))
+
+
+def _json_default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    if isinstance(o, (bytes, bytearray)):
+        return None
+    return str(o)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _rows(cursor, query: str, ids=None, params=()) -> list:
+    """Rows as dicts; with ids, `query` must end in "IN ({})" and is run in chunks of ID_CHUNK."""
+    if ids is None:
+        cursor.execute(query, params)
+        cols = [d[0] for d in cursor.description]
+        return [dict(zip(cols, row)) for row in cursor.fetchall()]
+    ids = sorted(ids)
+    out = []
+    for i in range(0, len(ids), ID_CHUNK):
+        chunk = ids[i:i + ID_CHUNK]
+        cursor.execute(query.format(",".join(["%s"] * len(chunk))), tuple(params) + tuple(chunk))
+        cols = [d[0] for d in cursor.description]
+        out.extend(dict(zip(cols, row)) for row in cursor.fetchall())
+    return out
+
+
+def run_watermark(cursor, margin: float = WATERMARK_MARGIN) -> tuple:
+    """(run start on the DB clock, watermark for the next run: that start minus margin seconds, as str)."""
+    cursor.execute("SELECT NOW()")
+    run_started = cursor.fetchone()[0]
+    return run_started, str(run_started - timedelta(seconds=margin))
+
+
+def changed_well_ids(cursor, since) -> set:
+    cursor.execute(
+        """SELECT well_id FROM wells WHERE updated_at >= %s
+           UNION SELECT well_id FROM stimulations WHERE updated_at >= %s
+           UNION SELECT well_id FROM scraped_wells WHERE updated_at >= %s AND well_id IS NOT NULL""",
+        (since, since, since),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def load_wells(cursor, ids=None) -> dict:
+    """{well_id: {"well", "stimulations", "scraped"}} for ids (all wells when ids is None)."""
+    where = " WHERE well_id IN ({})" if ids is not None else ""
+    wells = {}
+    for w in _rows(cursor, "SELECT * FROM wells" + where, ids):
+        w.pop("geo_point", None)
+        wells[w["well_id"]] = {"well": w, "stimulations": [], "scraped": None}
+    for s in _rows(cursor, "SELECT * FROM stimulations" + where, ids):
+        if s["well_id"] in wells:
+            wells[s["well_id"]]["stimulations"].append(s)
+    for s in _rows(cursor, "SELECT * FROM scraped_wells" + where, ids):
+        s.pop("geo_point", None)
+        if s["well_id"] in wells:
+            wells[s["well_id"]]["scraped"] = s
+    for detail in wells.values():
+        detail["stimulations"].sort(key=lambda s: s["stimulation_id"])
+    return wells
+
+
+def marker(detail: dict):
+    """GeoJSON feature for a well, positioned by its own coordinates or else the scraped ones; None if neither."""
+    w, s = detail["well"], detail["scraped"] or {}
+    lat, lon = w.get("lat_deg"), w.get("lon_deg")
+    if lat is None or lon is None:
+        lat, lon = s.get("lat_deg"), s.get("lon_deg")
+    if lat is None or lon is None:
+        return None
+    return {
+        "type": "Feature",
+        "id": w["well_id"],
+        "geometry": {"type": "Point", "coordinates": [round(float(lon), 6), round(float(lat), 6)]},
+        "properties": {"well_id": w["well_id"], "api_number": w.get("api_number"),
+                       "name": w.get("well_name") or s.get("well_name")},
+    }
+
+
+def _read_tile(path: Path) -> list:
+    if not path.exists():
+        return []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)["features"]
+
+
+def _write_tile(path: Path, features: list) -> None:
+    if not features:
+        if path.exists():
+            path.unlink()
+        return
+    body = json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":"))
+    _write_atomic(path, gzip.compress(body.encode("utf-8"), mtime=0))
+
+
+def tile_bounds(key: str) -> list:
+    """[min_lat, min_lon, max_lat, max_lon] of a "z/x/y" tile."""
+    z, x, y = (int(p) for p in key.split("/"))
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return [lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0]
+
+
+def export_map(conn, out_dir: Path, zoom: int = TILE_ZOOM, full: bool = False,
+               margin: float = WATERMARK_MARGIN) -> dict:
+    """Bring out_dir up to date with the DB and return counts of what was written."""
+    state_path = out_dir / STATE_FILE
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() and not full else {}
+    if state.get("zoom") != zoom:
+        state = {}
+    well_tiles = {int(k): v for k, v in state.get("wells", {}).items()}
+    cursor = conn.cursor()
+    _, watermark = run_watermark(cursor, margin)
+
+    cursor.execute("SELECT well_id FROM wells")
+    current = {row[0] for row in cursor.fetchall()}
+    deleted = set(well_tiles) - current
+    if state.get("watermark"):
+        changed = (changed_well_ids(cursor, state["watermark"]) & current) | (current - set(well_tiles))
+        details = load_wells(cursor, changed)
+    else:
+        details = load_wells(cursor)
+        changed = set(details)
+
+    new_features, touched = {}, set()
+    for well_id in deleted:
+        touched.add(well_tiles.pop(well_id))
+        (out_dir / "wells" / ("%d.json" % well_id)).unlink(missing_ok=True)
+    for well_id, detail in details.items():
+        _write_atomic(out_dir / "wells" / ("%d.json" % well_id),
+                      json.dumps(detail, default=_json_default, separators=(",", ":")).encode("utf-8"))
+        old = well_tiles.get(well_id)
+        feature = marker(detail)
+        new = tile_for(feature["geometry"]["coordinates"][1], feature["geometry"]["coordinates"][0], zoom) \
+            if feature else None
+        well_tiles[well_id] = new
+        touched.update(t for t in (old, new) if t)
+        if new:
+            new_features.setdefault(new, []).append(feature)
+    touched.discard(None)
+
+    replaced = changed | deleted
+    for key in touched:
+        path = out_dir / "tiles" / (key + ".geojson.gz")
+        features = [f for f in ([] if not state else _read_tile(path)) if f["id"] not in replaced]
+        features.extend(new_features.get(key, []))
+        features.sort(key=lambda f: f["id"])
+        _write_tile(path, features)
+
+    counts = {}
+    for key in well_tiles.values():
+        if key:
+            counts[key] = counts.get(key, 0) + 1
+    if full or not state:
+        # Tiles left from an older export (e.g. another zoom) are no longer listed anywhere.
+        for path in (out_dir / "tiles").glob("**/*.geojson.gz"):
+            if path.relative_to(out_dir / "tiles").as_posix()[:-len(".geojson.gz")] not in counts:
+                path.unlink()
+    boxes = [tile_bounds(k) for k in counts]
+    index = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "zoom": zoom,
+        "bounds": [min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes),
+                   max(b[3] for b in boxes)] if boxes else None,
+        "wells": sum(counts.values()),
+        "tiles": dict(sorted(counts.items())),
+    }
+    _write_atomic(out_dir / "index.json", json.dumps(index, indent=1).encode("utf-8"))
+    _write_atomic(state_path, json.dumps({
+        "zoom": zoom,
+        "watermark": watermark,
+        "wells": {str(k): v for k, v in sorted(well_tiles.items())},
+    }).encode("utf-8"))
+    cursor.close()
+    return {"wells_exported": len(details), "wells_deleted": len(deleted), "tiles_written": len(touched),
+            "tiles_total": len(counts), "markers": index["wells"]}
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main() -> None:
+    script_dir = Path(__file__).resolve().parent
+    cfg = load_config()
+    out_dir = Path(_arg_value("--out", getattr(cfg, "MAP_EXPORT_DIR", script_dir / "temp" / "map_export")))
+    if not out_dir.is_absolute():
+        out_dir = script_dir / out_dir
+    try:
+        zoom = int(_arg_value("--zoom", getattr(cfg, "MAP_TILE_ZOOM", TILE_ZOOM)))
+    except ValueError:
+        print("--zoom expects an integer", file=sys.stderr)
+        sys.exit(2)
+    conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
+    try:
+        counts = export_map(conn, out_dir, zoom, full="--full" in sys.argv,
+                            margin=float(getattr(cfg, "EXPORT_WATERMARK_MARGIN", WATERMARK_MARGIN)))
+    finally:
+        conn.close()
+    print(f"Map export in {out_dir}: " + ", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Columnar export for analysis: wells joined with their stimulations and scraped row, as partitioned Parquet.
+
+    python export_parquet.py                        # append wells changed since the last run
+    python export_parquet.py --full                 # rewrite the whole dataset
+    python export_parquet.py --partition ingest_date --out DIR --chunk-rows 50000
+
+One row per stimulation (a well without stimulations gets one row with empty stimulation columns), with
+the well's columns and its scraped_wells columns (prefixed `scraped_`) alongside. Output (default
+temp/parquet_export/, or PARQUET_EXPORT_DIR in config.py):
+
+    wells/county=McKenzie/part-<run>-<chunk>-0.parquet    hive-style partitions (county or ingest_date)
+    export_state.json                                     watermark, partitioning and run count
+
+Rows are read with an unbuffered (server-side) cursor and written CHUNK_ROWS at a time, so memory stays
+flat however large the join is. A later run appends files only for wells whose wells, stimulations or
+scraped_wells rows have an `updated_at` at or after the previous run's watermark, with all of that
+well's rows. The watermark is the run's start (DB clock) minus export_map.WATERMARK_MARGIN, so rows
+committed after a run started but stamped before it are not lost (see export_map.py); wells changed
+within the margin are appended again. Every row carries the `exported_at` of its run, and
+read_export() keeps each well's rows from its latest run; wells deleted from MySQL stay in the files
+until --full.
+"""
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import mysql.connector
+import pandas as pd
+import pyarrow as pa
+
+from export_map import ID_CHUNK, WATERMARK_MARGIN, _write_atomic, changed_well_ids, run_watermark
+from extract_pdf_wells import load_config
+
+CHUNK_ROWS = 50000
+STATE_FILE = "export_state.json"
+DATASET_DIR = "wells"
+PARTITIONS = ("county", "ingest_date")
+UNKNOWN_PARTITION = "unknown"
+
+# (column, SQL expression, kind); kind picks the pandas conversion and the Parquet type in SCHEMA
+COLUMNS = [
+    ("well_id", "w.well_id", "int32"),
+    ("api_number", "w.api_number", "str"),
+    ("well_name", "w.well_name", "str"),
+    ("operator", "w.operator", "str"),
+    ("enseco_job_number", "w.enseco_job_number", "str"),
+    ("job_type", "w.job_type", "str"),
+    ("county_state", "w.county_state", "str"),
+    ("lat_deg", "w.lat_deg", "float"),
+    ("lon_deg", "w.lon_deg", "float"),
+    ("datum", "w.datum", "str"),
+    ("source_pdf", "w.source_pdf", "str"),
+    ("well_created_at", "w.created_at", "timestamp"),
+    ("stimulation_id", "s.stimulation_id", "int32"),
+    ("date_stimulated", "s.date_stimulated", "date"),
+    ("stimulated_formation", "s.stimulated_formation", "str"),
+    ("top_ft", "s.top_ft", "int32"),
+    ("bottom_ft", "s.bottom_ft", "int32"),
+    ("stimulation_stages", "s.stimulation_stages", "int32"),
+    ("volume", "s.volume", "float"),
+    ("volume_units", "s.volume_units", "str"),
+    ("type_treatment", "s.type_treatment", "str"),
+    ("acid_pct", "s.acid_pct", "float"),
+    ("lbs_proppant", "s.lbs_proppant", "int64"),
+    ("max_treatment_pressure_psi", "s.max_treatment_pressure_psi", "int32"),
+    ("max_treatment_rate_bbls_min", "s.max_treatment_rate_bbls_min", "float"),
+    ("proppant_details", "s.proppant_details", "str"),
+    ("scraped_url", "sc.scraped_url", "str"),
+    ("scraped_operator", "sc.operator", "str"),
+    ("scraped_county", "sc.county", "str"),
+    ("scraped_closest_city", "sc.closest_city", "str"),
+    ("scraped_lat_deg", "sc.lat_deg", "float"),
+    ("scraped_lon_deg", "sc.lon_deg", "float"),
+    ("scraped_well_status", "sc.well_status", "str"),
+    ("scraped_well_type", "sc.well_type", "str"),
+    ("scraped_oil_bbl", "sc.oil_bbl", "int64"),
+    ("scraped_gas_mcf", "sc.gas_mcf", "int64"),
+    ("scraped_production_dates_on_file", "sc.production_dates_on_file", "str"),
+    ("scraped_last_checked", "sc.last_checked", "timestamp"),
+]
+
+_ARROW_TYPES = {"int32": pa.int32(), "int64": pa.int64(), "float": pa.float64(), "str": pa.string(),
+                "date": pa.date32(), "timestamp": pa.timestamp("s")}
+_PANDAS_DTYPES = {"int32": "Int32", "int64": "Int64", "float": "float64"}
+
+SCHEMA = pa.schema(
+    [(name, _ARROW_TYPES[kind]) for name, _, kind in COLUMNS]
+    + [("exported_at", pa.timestamp("s"))]
+)
+
+JOIN_QUERY = (
+    "SELECT " + ", ".join("%s AS %s" % (expr, name) for name, expr, _ in COLUMNS)
+    + " FROM wells w LEFT JOIN stimulations s ON s.well_id = w.well_id"
+    + " LEFT JOIN scraped_wells sc ON sc.well_id = w.well_id"
+)
+
+
+def county_partition(county_state, scraped_county) -> str:
+    """"McKenzie County, North Dakota" -> "McKenzie"; the scraped county if the well has none; else "unknown"."""
+    name = (str(county_state or "").split(",")[0] or str(scraped_county or "")).strip()
+    if name.lower().endswith(" county"):
+        name = name[:-len(" county")].strip()
+    return name or UNKNOWN_PARTITION
+
+
+def frame(rows: list, exported_at, partition: str = "county") -> pd.DataFrame:
+    """DataFrame of JOIN_QUERY rows with the column types of SCHEMA, plus exported_at and the partition column."""
+    df = pd.DataFrame.from_records(rows, columns=[name for name, _, _ in COLUMNS])
+    for name, _, kind in COLUMNS:
+        if kind in _PANDAS_DTYPES:
+            # DECIMAL columns arrive as Decimal; to_numeric turns them (and any stray text) into numbers.
+            df[name] = pd.to_numeric(df[name], errors="coerce").astype(_PANDAS_DTYPES[kind])
+        elif kind == "date":
+            df[name] = pd.to_datetime(df[name], errors="coerce").dt.date
+        elif kind == "timestamp":
+            df[name] = pd.to_datetime(df[name], errors="coerce")
+    df["exported_at"] = pd.Timestamp(exported_at)
+    if partition == "county":
+        df["county"] = [county_partition(c, s) for c, s in zip(df["county_state"], df["scraped_county"])]
+    else:
+        df["ingest_date"] = df["well_created_at"].dt.strftime("%Y-%m-%d").fillna(UNKNOWN_PARTITION)
+    return df
+
+
+def stream_rows(cursor, ids=None, chunk_rows: int = CHUNK_ROWS):
+    """Yield lists of up to chunk_rows JOIN_QUERY rows, for every well or (in ID_CHUNK batches) for ids."""
+    if ids is None:
+        batches = [None]
+    else:
+        ids = sorted(ids)
+        batches = [ids[i:i + ID_CHUNK] for i in range(0, len(ids), ID_CHUNK)]
+    for batch in batches:
+        where = "" if batch is None else " WHERE w.well_id IN (%s)" % ",".join(["%s"] * len(batch))
+        cursor.execute(JOIN_QUERY + where + " ORDER BY w.well_id", tuple(batch or ()))
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+
+
+def export_parquet(conn, out_dir: Path, partition: str = "county", full: bool = False,
+                   chunk_rows: int = CHUNK_ROWS, margin: float = WATERMARK_MARGIN) -> dict:
+    """Append changed wells to the dataset under out_dir (everything on the first run or with full)."""
+    state_path = out_dir / STATE_FILE
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() and not full else {}
+    if state.get("partition") != partition:
+        state = {}
+    dataset = out_dir / DATASET_DIR
+    if not state and dataset.exists():
+        # Files from an older layout or an interrupted first run would mix into the new dataset.
+        shutil.rmtree(dataset)
+
+    cursor = conn.cursor()
+    run_started, watermark = run_watermark(cursor, margin)
+    ids = changed_well_ids(cursor, state["watermark"]) if state.get("watermark") else None
+    cursor.close()
+
+    run = int(state.get("runs", 0)) + 1
+    counts = {"wells": 0, "rows": 0, "files": 0}
+    if ids is None or ids:
+        # Unbuffered: rows stay on the server until fetchmany asks for them.
+        cursor = conn.cursor(buffered=False)
+        schema = SCHEMA.append(pa.field(partition, pa.string()))
+        wells = set()
+        for n, rows in enumerate(stream_rows(cursor, ids, chunk_rows)):
+            df = frame(rows, run_started, partition)
+            df.to_parquet(dataset, engine="pyarrow", partition_cols=[partition], index=False, schema=schema,
+                          basename_template="part-%05d-%05d-{i}.parquet" % (run, n))
+            wells.update(df["well_id"].tolist())
+            counts["rows"] += len(df)
+            counts["files"] += df[partition].nunique()
+        cursor.close()
+        counts["wells"] = len(wells)
+
+    _write_atomic(state_path, json.dumps({
+        "partition": partition,
+        "watermark": watermark,
+        "runs": run,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+    }).encode("utf-8"))
+    return counts
+
+
+def read_export(out_dir, columns=None, filters=None) -> pd.DataFrame:
+    """The exported dataset as a DataFrame, keeping each well's rows from its latest run only.
+
+    `filters` is passed to pandas.read_parquet, e.g. [("county", "=", "McKenzie")], and prunes partitions.
+    """
+    cols = None if columns is None else list(dict.fromkeys(list(columns) + ["well_id", "exported_at"]))
+    df = pd.read_parquet(Path(out_dir) / DATASET_DIR, columns=cols, filters=filters)
+    latest = df.groupby("well_id")["exported_at"].transform("max")
+    df = df[df["exported_at"] == latest].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main() -> None:
+    script_dir = Path(__file__).resolve().parent
+    cfg = load_config()
+    out_dir = Path(_arg_value("--out", getattr(cfg, "PARQUET_EXPORT_DIR", script_dir / "temp" / "parquet_export")))
+    if not out_dir.is_absolute():
+        out_dir = script_dir / out_dir
+    partition = _arg_value("--partition", getattr(cfg, "PARQUET_PARTITION", "county"))
+    if partition not in PARTITIONS:
+        print("--partition expects one of: %s" % ", ".join(PARTITIONS), file=sys.stderr)
+        sys.exit(2)
+    try:
+        chunk_rows = max(1, int(_arg_value("--chunk-rows", CHUNK_ROWS)))
+    except ValueError:
+        print("--chunk-rows expects an integer", file=sys.stderr)
+        sys.exit(2)
+    conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
+    try:
+        counts = export_parquet(conn, out_dir, partition, full="--full" in sys.argv, chunk_rows=chunk_rows,
+                                margin=float(getattr(cfg, "EXPORT_WATERMARK_MARGIN", WATERMARK_MARGIN)))
+    finally:
+        conn.close()
+    print(f"Parquet export in {out_dir / DATASET_DIR}: " + ", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,54 @@
-import io
+import gzip
+import hashlib
+import heapq
+import itertools
 import json
+import multiprocessing.util
 import os
+import queue
 import re
+import signal
 import sys
-from contextlib import redirect_stderr
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, date
+from decimal import Decimal
 from pathlib import Path
 
-try:
-    from pypdf import PdfReader
-except ImportError:
-    from PyPDF2 import PdfReader
-
 import mysql.connector
 
+from pdf_backends import BACKEND_ORDER, SandboxError, available_backends, capture_warnings, get_backend, run_sandboxed
+from proppant_stats import add_proppants, drop_proppants, sync_proppants
+from run_journal import RunJournal
+from run_metrics import METRICS, BufferedLog, Metrics
+from well_geo import normalize_coordinates
+
 DEBUG = True
 LOG_FILE = None
+JOURNAL = None  # RunJournal of the current run (temp/journal/extract.jsonl); set in main
+
+# Extracted-text cache, keyed by PDF content hash (see configure_text_cache). None disables it.
+TEXT_CACHE_DIR = None
+TEXT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+TEXT_CACHE_COMPRESS = False
+_text_cache_bytes = None
+
+# Page-streaming extraction (see get_pdf_text_streaming); enabled with --stream-pages.
+STREAM_PAGES = False
+STREAM_REQUIRED_WELL_FIELDS = ("api_number", "well_name", "operator", "county_state", "latitude", "longitude")
+STREAM_REQUIRED_STIM_FIELDS = ("date_stimulated", "stimulated_formation", "lbs_proppant")
+STREAM_REQUIRE_PROPPANT = True
+PAGE_KEYWORDS = None  # None: label keywords of the field scanners plus "mesh"/"white"; () disables the prefilter
+
+# Text-extraction backends, tried in order (see extract_text and pdf_backends.py). With EXTRACT_TIMEOUT
+# set, each attempt runs in a sandbox worker process, killed after that many seconds and capped at
+# EXTRACT_MAX_RSS_MB of address space; unset, extraction runs in this process. The scripts set both through
+# configure_from_config (120 s and 2048 MB unless PDF_EXTRACT_TIMEOUT = 0); library callers start unset.
+PDF_BACKENDS = available_backends(BACKEND_ORDER)
+EXTRACT_TIMEOUT = None
+EXTRACT_MAX_RSS_MB = None
 
 
 def _debug(label: str, data, max_chars: int = 80):
@@ -50,19 +83,238 @@ def load_config():
     return cfg
 
 
-def get_pdf_text(pdf_path: str) -> str:
+def configure_text_cache(cache_dir, max_bytes: int = TEXT_CACHE_MAX_BYTES, compress: bool = False) -> None:
+    global TEXT_CACHE_DIR, TEXT_CACHE_MAX_BYTES, TEXT_CACHE_COMPRESS, _text_cache_bytes
+    TEXT_CACHE_DIR = Path(cache_dir) if cache_dir else None
+    TEXT_CACHE_MAX_BYTES = int(max_bytes)
+    TEXT_CACHE_COMPRESS = bool(compress)
+    _text_cache_bytes = None
+
+
+def configure_streaming(enabled: bool, required_well=None, required_stim=None, require_proppant=None, page_keywords=None) -> None:
+    global STREAM_PAGES, STREAM_REQUIRED_WELL_FIELDS, STREAM_REQUIRED_STIM_FIELDS, STREAM_REQUIRE_PROPPANT, PAGE_KEYWORDS
+    STREAM_PAGES = bool(enabled)
+    if required_well is not None:
+        STREAM_REQUIRED_WELL_FIELDS = tuple(required_well)
+    if required_stim is not None:
+        STREAM_REQUIRED_STIM_FIELDS = tuple(required_stim)
+    if require_proppant is not None:
+        STREAM_REQUIRE_PROPPANT = bool(require_proppant)
+    PAGE_KEYWORDS = tuple(k.lower() for k in page_keywords) if page_keywords is not None else None
+
+
+def configure_extraction(backends=None, timeout=None, max_rss_mb=None) -> None:
+    """backends: preference list (names not installed are dropped); timeout None or 0 extracts in-process."""
+    global PDF_BACKENDS, EXTRACT_TIMEOUT, EXTRACT_MAX_RSS_MB
+    PDF_BACKENDS = available_backends(tuple(backends) if backends else BACKEND_ORDER)
+    if not PDF_BACKENDS:
+        raise ValueError("none of the PDF backends %s is installed" % ", ".join(backends or BACKEND_ORDER))
+    EXTRACT_TIMEOUT = float(timeout) if timeout else None
+    EXTRACT_MAX_RSS_MB = float(max_rss_mb) if max_rss_mb else None
+
+
+def _worker_settings() -> dict:
+    """Module settings a worker process needs to behave like the parent (spawned workers do not inherit globals)."""
+    return {
+        "text_cache": (str(TEXT_CACHE_DIR) if TEXT_CACHE_DIR else None, TEXT_CACHE_MAX_BYTES, TEXT_CACHE_COMPRESS),
+        "streaming": (STREAM_PAGES, STREAM_REQUIRED_WELL_FIELDS, STREAM_REQUIRED_STIM_FIELDS, STREAM_REQUIRE_PROPPANT, PAGE_KEYWORDS),
+        "extraction": (PDF_BACKENDS, EXTRACT_TIMEOUT, EXTRACT_MAX_RSS_MB),
+    }
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_hashed(paths, threads: int = 4):
+    """Yield (path, sha256 or None if unreadable) in input order, hashing a few files ahead in threads.
+
+    hashlib releases the GIL on large updates, so this overlaps with extraction in the worker processes.
+    """
+    def work(path):
+        try:
+            with METRICS.time("pdf_hash"):
+                return file_sha256(str(path))
+        except OSError as e:
+            _debug("iter_hashed error", str(e))
+            return None
+
+    window = deque()
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="pdf-hash") as pool:
+        for path in paths:
+            window.append((path, pool.submit(work, path)))
+            if len(window) >= threads * 4:
+                p, fut = window.popleft()
+                yield p, fut.result()
+        while window:
+            p, fut = window.popleft()
+            yield p, fut.result()
+
+
+def _text_cache_paths(sha: str) -> tuple:
+    d = TEXT_CACHE_DIR / sha[:2]
+    return (d / f"{sha}.txt", d / f"{sha}.txt.gz")
+
+
+def _read_cache_file(path: Path) -> str:
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    return path.read_text(encoding="utf-8")
+
+
+def text_cache_get(sha: str):
+    if TEXT_CACHE_DIR is None:
+        return None
+    for path in _text_cache_paths(sha):
+        try:
+            text = _read_cache_file(path)
+        except (OSError, EOFError):
+            continue
+        try:
+            os.utime(path)  # mtime doubles as the LRU clock
+        except OSError:
+            pass
+        return text
+    return None
+
+
+def text_cache_put(sha: str, text: str) -> None:
+    global _text_cache_bytes
+    if TEXT_CACHE_DIR is None:
+        return
+    plain, packed = _text_cache_paths(sha)
+    path = packed if TEXT_CACHE_COMPRESS else plain
+    data = text.encode("utf-8")
+    if TEXT_CACHE_COMPRESS:
+        data = gzip.compress(data, compresslevel=6)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        _debug("text_cache_put error", str(e))
+        return
+    if _text_cache_bytes is None:
+        _text_cache_bytes = sum(p.stat().st_size for p in TEXT_CACHE_DIR.glob("*/*.txt*"))
+    else:
+        _text_cache_bytes += len(data)
+    if _text_cache_bytes > TEXT_CACHE_MAX_BYTES:
+        _evict_text_cache()
+
+
+def _evict_text_cache() -> None:
+    """Drop least-recently-used entries until the cache is at 90% of its cap."""
+    global _text_cache_bytes
+    entries = []
+    for p in TEXT_CACHE_DIR.glob("*/*.txt*"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    target = TEXT_CACHE_MAX_BYTES * 0.9
+    for _, size, p in entries:
+        if total <= target:
+            break
+        try:
+            p.unlink()
+            total -= size
+        except OSError:
+            pass
+    _text_cache_bytes = total
+    _debug("text cache evicted to bytes", total)
+
+
+def iter_pdf_pages(pdf_path: str, backend: str = None):
+    """Yield page texts one at a time from one backend (default: the first of PDF_BACKENDS), in this process."""
+    return get_backend(backend or PDF_BACKENDS[0]).iter_pages(pdf_path, METRICS)
+
+
+def _read_text(backend: str, pdf_path: str, streaming=None) -> tuple:
+    """(text, stderr lines, stage timings) from one backend; streaming is the "streaming" worker setting
+    for a page-streamed read, and the timings (pdf_open, page_extract) are a Metrics.drain() snapshot.
+
+    This is what runs in the sandbox worker, where logging and METRICS would stay in that process;
+    extract_text merges the timings into METRICS.
+    """
+    stages = Metrics()
+    pages = get_backend(backend).iter_pages
+    if streaming is None:
+        text, warnings = capture_warnings(lambda: "\n".join(pages(pdf_path, stages)))
+    else:
+        configure_streaming(*streaming)  # a spawned child starts from the module defaults
+        text, warnings = capture_warnings(lambda: _stream_pages(pages(pdf_path, stages)))
+    return text, warnings, stages.drain()
+
+
+def extract_text(pdf_path: str, streaming: bool = False) -> str:
+    """Text of a PDF from the first backend in PDF_BACKENDS that finds any, bounded by the sandbox limits.
+
+    A backend that raises, finds only whitespace, times out, goes over the memory limit or crashes is
+    counted as failed and the next one is tried. Each attempt is timed as stage pdf_backend_<name> (with
+    the backend's pdf_open / page_extract stages inside it) and counted as pdf_backend_<name>_<outcome>. Raises ValueError with every backend's reason if none succeeds.
+    """
+    settings = _worker_settings()["streaming"] if streaming else None
+    failures = []
+    for i, name in enumerate(PDF_BACKENDS):
+        t0 = time.perf_counter()
+        warnings = []
+        try:
+            if EXTRACT_TIMEOUT:
+                text, warnings, stages = run_sandboxed(_read_text, (name, pdf_path, settings), EXTRACT_TIMEOUT,
+                                                       EXTRACT_MAX_RSS_MB)
+            else:
+                text, warnings, stages = _read_text(name, pdf_path, settings)
+            METRICS.merge(stages)
+            outcome = "ok" if text.strip() else "empty"
+            reason = "no text" + (" (%s)" % warnings[-1].strip() if warnings else "")
+        except SandboxError as e:
+            outcome, reason = e.reason, str(e)
+        except Exception as e:
+            outcome, reason = "error", "%s: %s" % (type(e).__name__, e)
+        METRICS.observe("pdf_backend_" + name, time.perf_counter() - t0)
+        METRICS.count("pdf_backend_%s_%s" % (name, outcome))
+        for line in warnings:
+            _debug("extract_text %s stderr" % name, line, 300)
+        if outcome == "ok":
+            if i:
+                METRICS.count("pdf_backend_fallback")
+            return text
+        _debug("extract_text %s failed" % name, reason, 300)
+        failures.append("%s: %s" % (name, reason))
+    raise ValueError("No text extracted from PDF (%s): %s" % ("; ".join(failures), pdf_path))
+
+
+def get_pdf_text(pdf_path: str, sha: str = None) -> str:
+    """Full text of a PDF, via the text cache when enabled. Pass sha if the file has already been hashed."""
     _debug("get_pdf_text pdf_path", pdf_path)
-    with redirect_stderr(io.StringIO()):
-        reader = PdfReader(pdf_path)
-        parts = []
-        for page in reader.pages:
-            parts.append(page.extract_text() or "")
-    text = "\n".join(parts)
+    if TEXT_CACHE_DIR is None:
+        sha = None
+    else:
+        sha = sha or file_sha256(pdf_path)
+        cached = text_cache_get(sha)
+        if cached is not None:
+            _debug("get_pdf_text cache hit", sha[:16])
+            METRICS.count("text_cache_hit")
+            return cached
+        METRICS.count("text_cache_miss")
+    # A PDF no backend can read raises here and is not cached, so a backend that handles it later is picked up.
+    text = extract_text(pdf_path)
     _debug("get_pdf_text len", len(text))
-    return text or ""
+    if sha is not None:
+        text_cache_put(sha, text)
+    return text
 
 
-WELL_COLUMN_MAX = {"api_number": 32, "enseco_job_number": 64, "job_type": 64, "latitude": 32, "longitude": 32, "datum": 32, "source_pdf": 512}
+WELL_COLUMN_MAX = {"api_number": 32, "enseco_job_number": 64, "job_type": 64, "latitude": 32, "longitude": 32, "datum": 32, "pdf_sha256": 64, "source_pdf": 512}
 STIM_COLUMN_MAX = {"volume_units": 32}
 
 
@@ -112,96 +364,439 @@ def _parse_date(s: str):
     return None
 
 
+WELL_FIELD_PATTERNS = [
+    (r"Operator\s*:?\s*(.+?)(?=\n|Well Name|API#|Address|$)", "operator"),
+    (r"Well\s+Name\s*(?:and\s+Number)?\s*:?\s*(.+?)(?=\n\n|Operator|API#|Enseco|Address|$)", "well_name"),
+    (r"API\s*#?\s*:?\s*(\d{2}-\d{3}-\d{5}(?:-\d{2})?)", "api_number"),
+    (r"Enseco\s+Job\s*#?\s*:?\s*(\S+)", "enseco_job_number"),
+    (r"Job\s+Type\s*:?\s*(.+?)(?=\n|County|$)", "job_type"),
+    (r"County\s*,?\s*State\s*:?\s*(.+?)(?=\n|Well Surface|SHL|Section|$)", "county_state"),
+    (r"County\s*:?\s*(\w+)(?=\n|State|$)", "county_state"),
+    (r"Well\s+Surface\s+Hole\s+Location\s*\(SHL\)\s*:?\s*(.+?)(?=\n\n|Latitude|$)", "surface_hole_location"),
+    (r"SHL\s*:?\s*(.+?)(?=\n\n|Latitude|$)", "surface_hole_location"),
+    (r"Latitude\s*:?\s*([\d°°\'\"\.\s]+[NS]?)", "latitude"),
+    (r"Longitude\s*:?\s*([\d°°\'\"\.\s]+[EW]?)", "longitude"),
+    (r"Datum\s*:?\s*(\S+(?:\s+\d+)?)", "datum"),
+    (r"Well\s+File\s+No\.?\s*:?\s*(\d+)", "well_file_no"),
+    (r"Section\s+Township\s+(\d+\s+\d+\s*[NnSs])\s+Range\s+(\d+\s*[EeWw])", "section_township_range"),
+]
+
+STIM_FIELD_PATTERNS = [
+    (r"Date\s+Stimulated\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})", "date_stimulated"),
+    (r"Stimulation\s+Date\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})", "date_stimulated"),
+    (r"Stimulated\s+Formation\s*:?\s*(\w+)", "stimulated_formation"),
+    (r"(?:Stimulated\s+)?Formation\s*:?\s*(\w+)", "stimulated_formation"),
+    (r"Top\s*\(Ft\)\s*:?\s*([\d,]+)", "top_ft"),
+    (r"Top\s*\(ft\)\s*:?\s*([\d,]+)", "top_ft"),
+    (r"Bottom\s*\(Ft\)\s*:?\s*([\d,]+)", "bottom_ft"),
+    (r"Bottom\s*\(ft\)\s*:?\s*([\d,]+)", "bottom_ft"),
+    (r"Stimulation\s+Stages\s*:?\s*(\d+)", "stimulation_stages"),
+    (r"Stages\s*:?\s*(\d+)", "stimulation_stages"),
+    (r"Volume\s+Units\s*:?\s*(\w+)", "volume_units"),
+    (r"Volume\s*:?\s*([\d,\.]+)", "volume"),
+    (r"Type\s+Treatment\s*:?\s*([^\n]+?)(?=\s*\n|Acid|Lbs\s+Proppant|$)", "type_treatment"),
+    (r"Treatment\s+Type\s*:?\s*([^\n]+?)(?=\s*\n|Acid|$)", "type_treatment"),
+    (r"Acid\s*%?\s*:?\s*([\d\.]+)", "acid_pct"),
+    (r"Lbs\s+Proppant\s*:?\s*([\d,]+)", "lbs_proppant"),
+    (r"Proppant\s*\(?\s*[Ll]bs?\.?\s*\)?\s*:?\s*([\d,]+)", "lbs_proppant"),
+    (r"Maximum\s+Treatment\s+Pressure\s*\(PSI\)\s*:?\s*([\d,]+)", "max_treatment_pressure_psi"),
+    (r"Max\.?\s+Treatment\s+Pressure\s*:?\s*([\d,]+)", "max_treatment_pressure_psi"),
+    (r"Maximum\s+Treatment\s+Rate\s*\(BBLS/Min\)\s*:?\s*([\d\.]+)", "max_treatment_rate_bbls_min"),
+    (r"Max\.?\s+Treatment\s+Rate\s*:?\s*([\d\.]+)", "max_treatment_rate_bbls_min"),
+]
+
+
 def _first_group(text: str, pattern: str, flags=0) -> str:
     m = re.search(pattern, text, flags)
     return (m.group(1) or "").strip() if m else ""
 
 
-def parse_well_fields(text: str) -> dict:
-    patterns = [
-        (r"Operator\s*:?\s*(.+?)(?=\n|Well Name|API#|Address|$)", "operator"),
-        (r"Well\s+Name\s*(?:and\s+Number)?\s*:?\s*(.+?)(?=\n\n|Operator|API#|Enseco|Address|$)", "well_name"),
-        (r"API\s*#?\s*:?\s*(\d{2}-\d{3}-\d{5}(?:-\d{2})?)", "api_number"),
-        (r"Enseco\s+Job\s*#?\s*:?\s*(\S+)", "enseco_job_number"),
-        (r"Job\s+Type\s*:?\s*(.+?)(?=\n|County|$)", "job_type"),
-        (r"County\s*,?\s*State\s*:?\s*(.+?)(?=\n|Well Surface|SHL|Section|$)", "county_state"),
-        (r"County\s*:?\s*(\w+)(?=\n|State|$)", "county_state"),
-        (r"Well\s+Surface\s+Hole\s+Location\s*\(SHL\)\s*:?\s*(.+?)(?=\n\n|Latitude|$)", "surface_hole_location"),
-        (r"SHL\s*:?\s*(.+?)(?=\n\n|Latitude|$)", "surface_hole_location"),
-        (r"Latitude\s*:?\s*([\d°°\'\"\.\s]+[NS]?)", "latitude"),
-        (r"Longitude\s*:?\s*([\d°°\'\"\.\s]+[EW]?)", "longitude"),
-        (r"Datum\s*:?\s*(\S+(?:\s+\d+)?)", "datum"),
-        (r"Well\s+File\s+No\.?\s*:?\s*(\d+)", "well_file_no"),
-        (r"Section\s+Township\s+(\d+\s+\d+\s*[NnSs])\s+Range\s+(\d+\s*[EeWw])", "section_township_range"),
-    ]
+def _search_fields(patterns: list, text: str) -> dict:
+    """Reference implementation: one re.search over the whole text per pattern, first non-empty value per key wins."""
     out = {}
     for pattern, key in patterns:
         val = _first_group(text, pattern, re.IGNORECASE | re.DOTALL)
         if val and key not in out:
-            out[key] = (re.sub(r"\s+", " ", val) or "").strip()
+            out[key] = val
+    return out
+
+
+# The only characters where re.IGNORECASE and str.lower() disagree about ASCII letters (U+0130 also lowercases to two chars).
+_CASE_TRAPS = re.compile("[\u0130\u0131\u017f]")
+_LEADING_LABEL = re.compile(r"^(?:\(\?:([A-Za-z]+)\\s\+\)\?)?([A-Za-z]+)(?![A-Za-z?*+{])")
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth, in_class, escaped = 0, False, False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return True
+    return False
+
+
+def compile_field_scanner(patterns: list) -> tuple:
+    """Precompile a (pattern, key) table for _scan_fields.
+
+    Each pattern's leading label word (plus an optional "(?:Word\\s+)?" prefix) becomes its anchor, and
+    the anchors are reduced to a prefix-free keyword set. A pattern whose source does not begin with a
+    plain word has no anchor and falls back to a full re.search.
+    """
+    leading = []
+    for pattern, _ in patterns:
+        m = None if _has_top_level_alternation(pattern) else _LEADING_LABEL.match(pattern)
+        leading.append([w for w in m.groups() if w] if m else None)
+    words = {w.lower() for ws in leading if ws for w in ws}
+    keywords = sorted(w for w in words if not any(o != w and w.startswith(o) for o in words))
+    entries = []
+    for (pattern, key), ws in zip(patterns, leading):
+        anchors = None
+        if ws:
+            anchors = sorted({next(i for i, k in enumerate(keywords) if w.lower().startswith(k)) for w in ws})
+        entries.append((key, re.compile(pattern, re.IGNORECASE | re.DOTALL), anchors))
+    return (keywords, entries)
+
+
+def _scan_fields(scanner: tuple, text: str) -> dict:
+    """Same result as _search_fields without running every pattern over the whole text.
+
+    re.search returns the match at the leftmost position where the pattern matches, and every match of
+    an anchored pattern starts at an occurrence of its anchor keyword, so trying pattern.match() at
+    those occurrences in order gives the identical match. Occurrences are found lazily with str.find on
+    the text lowercased once (which agrees with re.IGNORECASE except for the characters in _CASE_TRAPS),
+    the search for a pattern stops at its first match, and keys already filled skip their remaining
+    patterns.
+    """
+    keywords, entries = scanner
+    if _CASE_TRAPS.search(text):
+        def occurrences(k):
+            return (m.start() for m in re.finditer(f"(?={re.escape(k)})", text, re.IGNORECASE))
+    else:
+        low = text.lower()
+
+        def occurrences(k):
+            i = low.find(k)
+            while i != -1:
+                yield i
+                i = low.find(k, i + 1)
+    out = {}
+    for key, rx, anchors in entries:
+        if key in out:
+            continue
+        m = None
+        if anchors is None:
+            m = rx.search(text)
+        else:
+            cands = heapq.merge(*(occurrences(keywords[a]) for a in anchors)) if len(anchors) > 1 else occurrences(keywords[anchors[0]])
+            for pos in cands:
+                m = rx.match(text, pos)
+                if m:
+                    break
+        val = (m.group(1) or "").strip() if m else ""
+        if val:
+            out[key] = val
+    return out
+
+
+WELL_SCANNER = compile_field_scanner(WELL_FIELD_PATTERNS)
+STIM_SCANNER = compile_field_scanner(STIM_FIELD_PATTERNS)
+
+
+def parse_well_fields(text: str) -> dict:
+    out = {k: re.sub(r"\s+", " ", v).strip() for k, v in _scan_fields(WELL_SCANNER, text).items()}
     _debug("parse_well_fields", f"{len(out)} fields")
     return out
 
 
 def parse_stimulation_fields(text: str) -> dict:
-    patterns = [
-        (r"Date\s+Stimulated\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})", "date_stimulated"),
-        (r"Stimulation\s+Date\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})", "date_stimulated"),
-        (r"Stimulated\s+Formation\s*:?\s*(\w+)", "stimulated_formation"),
-        (r"(?:Stimulated\s+)?Formation\s*:?\s*(\w+)", "stimulated_formation"),
-        (r"Top\s*\(Ft\)\s*:?\s*([\d,]+)", "top_ft"),
-        (r"Top\s*\(ft\)\s*:?\s*([\d,]+)", "top_ft"),
-        (r"Bottom\s*\(Ft\)\s*:?\s*([\d,]+)", "bottom_ft"),
-        (r"Bottom\s*\(ft\)\s*:?\s*([\d,]+)", "bottom_ft"),
-        (r"Stimulation\s+Stages\s*:?\s*(\d+)", "stimulation_stages"),
-        (r"Stages\s*:?\s*(\d+)", "stimulation_stages"),
-        (r"Volume\s+Units\s*:?\s*(\w+)", "volume_units"),
-        (r"Volume\s*:?\s*([\d,\.]+)", "volume"),
-        (r"Type\s+Treatment\s*:?\s*([^\n]+?)(?=\s*\n|Acid|Lbs\s+Proppant|$)", "type_treatment"),
-        (r"Treatment\s+Type\s*:?\s*([^\n]+?)(?=\s*\n|Acid|$)", "type_treatment"),
-        (r"Acid\s*%?\s*:?\s*([\d\.]+)", "acid_pct"),
-        (r"Lbs\s+Proppant\s*:?\s*([\d,]+)", "lbs_proppant"),
-        (r"Proppant\s*\(?\s*[Ll]bs?\.?\s*\)?\s*:?\s*([\d,]+)", "lbs_proppant"),
-        (r"Maximum\s+Treatment\s+Pressure\s*\(PSI\)\s*:?\s*([\d,]+)", "max_treatment_pressure_psi"),
-        (r"Max\.?\s+Treatment\s+Pressure\s*:?\s*([\d,]+)", "max_treatment_pressure_psi"),
-        (r"Maximum\s+Treatment\s+Rate\s*\(BBLS/Min\)\s*:?\s*([\d\.]+)", "max_treatment_rate_bbls_min"),
-        (r"Max\.?\s+Treatment\s+Rate\s*:?\s*([\d\.]+)", "max_treatment_rate_bbls_min"),
-    ]
-    out = {}
-    for pattern, key in patterns:
-        val = _first_group(text, pattern, re.IGNORECASE | re.DOTALL)
-        if val is not None and val.strip() and (key not in out or not out[key].strip()):
-            out[key] = (val or "").strip()
+    out = _scan_fields(STIM_SCANNER, text)
     _debug("parse_stimulation_fields", f"{len(out)} fields")
     return out
 
 
+def _page_keywords() -> tuple:
+    if PAGE_KEYWORDS is not None:
+        return PAGE_KEYWORDS
+    return tuple(WELL_SCANNER[0]) + tuple(STIM_SCANNER[0]) + ("mesh", "white")
+
+
+def _page_has_labels(page_text: str, keywords: tuple) -> bool:
+    """The page prefilter: a label keyword, or a proppant row ("40/70 Ceramic: 1,000" has no keyword)."""
+    low = page_text.lower()
+    return any(k in low for k in keywords) or _PROPPANT_LABEL.search(page_text) is not None
+
+
+def get_pdf_text_streaming(pdf_path: str, sha: str = None) -> str:
+    """Like get_pdf_text, but stop reading pages once every required field has been seen and the
+    stimulation section has ended.
+
+    Each page is scanned on its own as it arrives to track which required well/stimulation fields and
+    proppant rows have turned up; the parsers then run once over the joined text of the pages read.
+    Once everything is seen, reading goes on while pages still carry stimulation labels, so a well with
+    several stimulations keeps all of them; it stops at the first page without any. Pages containing
+    none of the label keywords are dropped (kept as empty strings so page breaks line up with a full
+    read). A full cached text is used when available; partial text is never cached.
+    """
+    _debug("get_pdf_text_streaming pdf_path", pdf_path)
+    if TEXT_CACHE_DIR is not None:
+        cached = text_cache_get(sha or file_sha256(pdf_path))
+        if cached is not None:
+            return cached
+    text = extract_text(pdf_path, streaming=True)
+    _debug("get_pdf_text_streaming len", len(text))
+    return text
+
+
+def _stream_pages(pages) -> str:
+    """Joined text of the pages get_pdf_text_streaming keeps: every page until each field is seen, then
+    the rest of the stimulation section (up to the first page without stimulation labels)."""
+    need_well = set(STREAM_REQUIRED_WELL_FIELDS)
+    need_stim = set(STREAM_REQUIRED_STIM_FIELDS)
+    need_proppant = STREAM_REQUIRE_PROPPANT
+    keywords = _page_keywords()
+    parts = []
+    for page_text in pages:
+        if not page_text.strip() or (keywords and not _page_has_labels(page_text, keywords)):
+            if not (need_well or need_stim or need_proppant):
+                break
+            parts.append("")
+            continue
+        stim_fields = _scan_fields(STIM_SCANNER, page_text)
+        in_stimulations = bool(stim_fields) or _STIM_BLOCK_START.search(page_text) is not None
+        proppant = _PROPPANT_LABEL.search(page_text) is not None
+        if not (need_well or need_stim or need_proppant) and not (in_stimulations or proppant):
+            break
+        parts.append(page_text)
+        need_well.difference_update(_scan_fields(WELL_SCANNER, page_text))
+        need_stim.difference_update(stim_fields)
+        if proppant:
+            need_proppant = False
+    return "\n".join(parts)
+
+
+def check_scanner_parity() -> int:
+    """Run the compiled scanner and the reference re.search parsers over every cached text; print and count mismatches."""
+    mismatches = 0
+    files = 0
+    t_ref = t_scan = 0.0
+    for path in sorted(TEXT_CACHE_DIR.glob("*/*.txt*")):
+        if path.suffix not in (".txt", ".gz"):
+            continue
+        try:
+            text = _read_cache_file(path)
+        except (OSError, EOFError):
+            continue
+        files += 1
+        t0 = time.perf_counter()
+        ref_well = {k: re.sub(r"\s+", " ", v).strip() for k, v in _search_fields(WELL_FIELD_PATTERNS, text).items()}
+        ref_stim = _search_fields(STIM_FIELD_PATTERNS, text)
+        t1 = time.perf_counter()
+        well, stim = parse_well_fields(text), parse_stimulation_fields(text)
+        t_scan += time.perf_counter() - t1
+        t_ref += t1 - t0
+        for name, ref, got in (("well", ref_well, well), ("stimulation", ref_stim, stim)):
+            if ref != got:
+                mismatches += 1
+                keys = sorted(k for k in set(ref) | set(got) if ref.get(k) != got.get(k))
+                print(f"MISMATCH {path.name} {name}: {', '.join(keys)}")
+    print(f"Scanner parity: {files} cached texts, {mismatches} mismatches; re.search {t_ref:.2f}s, scanner {t_scan:.2f}s")
+    return mismatches
+
+
+# Both proppant patterns only start at the first digit of a number that is followed by "/", "Mesh" or
+# "White", so the scan does not retry every digit of every figure on a page (a suffix of a number
+# matches only where the whole number does).
+_PROPPANT_START = r"(?<!\d)(?=\d+(?:/\d|\s*[MW]))"
+# Matches wherever parse_proppant_details would find at least one row; used to stop page streaming.
+_PROPPANT_LABEL = re.compile(
+    _PROPPANT_START + r"(?:\d+(?:/\d+)?\s*Mesh\s+\w+|\d+/\d+\s+\w+|\d+\s+White)\s*:?\s*,*\d", re.IGNORECASE)
+
+
+# One pass over the text: "100 Mesh White", "40/70 White" and "20 White" rows, in that order of precedence.
+_PROPPANT_ROW = re.compile(
+    _PROPPANT_START + r"(?:(\d+(?:/\d+)?\s*Mesh\s+\w+)|(\d+/\d+\s+\w+)|(\d+\s+White))\s*:?\s*([\d,]+)",
+    re.IGNORECASE)
+
+
+def _proppant_lines(text: str) -> str:
+    """The lines of text that can hold a proppant row ("mesh", "white" or a "/"), each with the line
+    before and after it since a row may wrap. Runs of adjacent lines are joined by newlines and separate
+    runs by a NUL, which \\s does not match, so no row is read across lines that were dropped.
+    """
+    lines = text.split("\n")
+    keep = set()
+    for i, low in enumerate(text.lower().split("\n")):
+        if "mesh" in low or "white" in low or "/" in low:
+            keep.update((i - 1, i, i + 1))
+    out, prev = [], None
+    for i in sorted(k for k in keep if 0 <= k < len(lines)):
+        if prev is not None:
+            out.append("\n" if i == prev + 1 else "\0")
+        out.append(lines[i])
+        prev = i
+    return "".join(out)
+
+
 def parse_proppant_details(text: str) -> list:
-    out = []
-    for m in re.finditer(r"(\d+(?:/\d+)?\s*Mesh\s+\w+)\s*:?\s*([\d,]+)", text, re.IGNORECASE):
-        ptype = (m.group(1) or "").strip()
-        lbs = _parse_int(m.group(2))
+    """[{"proppant_type", "lbs"}]: mesh rows, then size-range rows, then plain "N White" rows, each type once.
+
+    One finditer over the lines that can hold a row, so a "40/70 White" row is not also read as "70 White".
+    """
+    groups = ([], [], [])
+    for m in _PROPPANT_ROW.finditer(_proppant_lines(text)):
+        kind = 0 if m.group(1) else 1 if m.group(2) else 2
+        ptype = m.group(kind + 1).strip()
+        lbs = _parse_int(m.group(4))
         if ptype and lbs is not None:
-            out.append({"proppant_type": ptype, "lbs": lbs})
-    for m in re.finditer(r"(\d+/\d+\s+\w+)\s*:?\s*([\d,]+)", text, re.IGNORECASE):
-        ptype = (m.group(1) or "").strip()
-        lbs = _parse_int(m.group(2))
-        if ptype and lbs is not None and not any(p["proppant_type"] == ptype for p in out):
-            out.append({"proppant_type": ptype, "lbs": lbs})
-    for m in re.finditer(r"(\d+\s+White)\s*:?\s*([\d,]+)", text, re.IGNORECASE):
-        ptype = (m.group(1) or "").strip()
-        lbs = _parse_int(m.group(2))
-        if ptype and lbs is not None and not any(p["proppant_type"] == ptype for p in out):
-            out.append({"proppant_type": ptype, "lbs": lbs})
+            groups[kind].append({"proppant_type": ptype, "lbs": lbs})
+    out, seen = [], set()
+    for row in itertools.chain(*groups):
+        if row["proppant_type"] not in seen:
+            seen.add(row["proppant_type"])
+            out.append(row)
     _debug("parse_proppant_details", f"{len(out)} items")
     return out
 
 
-def ensure_well(cursor, config: dict, source_pdf: str) -> int:
+# Each stimulation section of a completion report opens with its date label.
+_STIM_BLOCK_START = re.compile(r"\b(?:Date\s+Stimulated|Stimulation\s+Date)\b", re.IGNORECASE)
+# Table layout: a header row of labels, then one row of values beneath it.
+_STIM_TABLE_ROWS = (
+    (re.compile(r"Date\s+Stimulated\s+Stimulated\s+Formation\s+Top\s*\(Ft\)\s+Bottom\s*\(Ft\)\s+Stimulation\s+"
+                r"Stages\s+Volume\s+Volume\s+Units[ \t]*\n\s*(\d{1,2}/\d{1,2}/\d{2,4})[ \t]+(\S.*?)[ \t]+([\d,]+)[ \t]+"
+                r"([\d,]+)[ \t]+(\d+)[ \t]+([\d,\.]+)[ \t]+(\w+)", re.IGNORECASE),
+     ("date_stimulated", "stimulated_formation", "top_ft", "bottom_ft", "stimulation_stages", "volume",
+      "volume_units")),
+    (re.compile(r"Type\s+Treatment\s+Acid\s*%\s+Lbs\s+Proppant\s+Maximum\s+Treatment\s+Pressure\s*\(PSI\)\s+"
+                r"Maximum\s+Treatment\s+Rate\s*\(BBLS/Min\)[ \t]*\n\s*(\S.*?)(?:[ \t]+([\d\.]+))?[ \t]+([\d,]+)[ \t]+"
+                r"([\d,]+)[ \t]+([\d\.]+)[ \t]*$", re.IGNORECASE | re.MULTILINE),
+     ("type_treatment", "acid_pct", "lbs_proppant", "max_treatment_pressure_psi", "max_treatment_rate_bbls_min")),
+)
+
+
+def split_stimulation_blocks(text: str) -> list:
+    """The text cut at every stimulation date label, found in one pass.
+
+    The first block also keeps everything before its label, so a document with a single stimulation
+    section (or none) parses exactly as the whole text did.
+    """
+    starts = [m.start() for m in _STIM_BLOCK_START.finditer(text)]
+    if len(starts) < 2:
+        return [text]
+    starts[0] = 0
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+
+def _parse_stim_table(block: str) -> dict:
+    """Fields from the header-row/value-row layout; {} when the block is written as "Label: value"."""
+    out = {}
+    for rx, keys in _STIM_TABLE_ROWS:
+        m = rx.search(block)
+        if m:
+            out.update((k, v.strip()) for k, v in zip(keys, m.groups()) if v and v.strip())
+    return out
+
+
+def parse_stimulations(text: str) -> list:
+    """[{"stim", "proppant"}] for every stimulation section with data (see has_stimulation), in document order.
+
+    Each block from split_stimulation_blocks is parsed on its own (label fields, then the table layout
+    on top), so the work is linear in the text and a later section cannot fill in an earlier one.
+    """
+    out = []
+    for block in split_stimulation_blocks(text):
+        stim = parse_stimulation_fields(block)
+        stim.update(_parse_stim_table(block))
+        if has_stimulation(stim):
+            out.append({"stim": stim, "proppant": parse_proppant_details(block)})
+    _debug("parse_stimulations", f"{len(out)} stimulations")
+    return out
+
+
+WELL_COLUMNS = (
+    "api_number", "well_name", "operator", "enseco_job_number", "job_type",
+    "county_state", "surface_hole_location", "latitude", "longitude", "lat_deg", "lon_deg", "datum",
+    "pdf_sha256", "source_pdf",
+)
+STIM_COLUMNS = (
+    "date_stimulated", "stimulated_formation", "top_ft", "bottom_ft", "stimulation_stages",
+    "volume", "volume_units", "type_treatment", "acid_pct", "lbs_proppant",
+    "max_treatment_pressure_psi", "max_treatment_rate_bbls_min", "proppant_details",
+)
+
+
+def well_row_values(config: dict, source_pdf: str, pdf_sha256: str = None) -> tuple:
+    """Column values (in WELL_COLUMNS order) that ensure_well stores for a parsed well."""
+    def _w(k):
+        return _trunc(config.get(k), WELL_COLUMN_MAX.get(k, 512))
+    lat_deg, lon_deg = normalize_coordinates(config.get("latitude"), config.get("longitude"))
+    return (
+        _w("api_number"),
+        (config.get("well_name") or "").strip() or None,
+        (config.get("operator") or "").strip() or None,
+        _w("enseco_job_number"),
+        _w("job_type"),
+        (config.get("county_state") or "").strip() or None,
+        (config.get("surface_hole_location") or "").strip() or None,
+        _w("latitude"),
+        _w("longitude"),
+        lat_deg,
+        lon_deg,
+        _w("datum"),
+        pdf_sha256 or None,
+        _trunc(source_pdf, WELL_COLUMN_MAX["source_pdf"]) if source_pdf else None,
+    )
+
+
+def stim_row_values(stim: dict, proppant_rows: list) -> tuple:
+    """Column values (in STIM_COLUMNS order) that insert_stimulation stores, without well_id."""
+    date_val = stim.get("date_stimulated")
+    if isinstance(date_val, str):
+        date_val = _parse_date(date_val)
+    proppant_json = json.dumps(proppant_rows) if proppant_rows else None
+    stim_formation = (stim.get("stimulated_formation") or "").strip() or None
+    stim_vol_units = _trunc(stim.get("volume_units"), STIM_COLUMN_MAX["volume_units"])
+    stim_type_treat = (stim.get("type_treatment") or "").strip() or None
+    return (
+        date_val, stim_formation,
+        _parse_int(stim.get("top_ft")), _parse_int(stim.get("bottom_ft")),
+        _parse_int(stim.get("stimulation_stages")),
+        _parse_decimal(stim.get("volume")), stim_vol_units, stim_type_treat or None,
+        _parse_decimal(stim.get("acid_pct")), _parse_int(stim.get("lbs_proppant")),
+        _parse_int(stim.get("max_treatment_pressure_psi")),
+        _parse_decimal(stim.get("max_treatment_rate_bbls_min")),
+        proppant_json,
+    )
+
+
+def has_stimulation(stim: dict) -> bool:
+    return any(
+        stim.get(k) is not None and str(stim.get(k)).strip()
+        for k in ("date_stimulated", "stimulated_formation", "lbs_proppant")
+    )
+
+
+WELL_INSERT = """INSERT INTO wells (api_number, well_name, operator, enseco_job_number, job_type,
+        county_state, surface_hole_location, latitude, longitude, lat_deg, lon_deg, datum, pdf_sha256, source_pdf)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"""
+
+
+def ensure_well(cursor, config: dict, source_pdf: str, pdf_sha256: str = None) -> int:
     _debug("ensure_well source_pdf", source_pdf)
     api = (config.get("api_number") or "").strip()
     if not api and not source_pdf:
-        cursor.execute("INSERT INTO wells (source_pdf) VALUES (%s)", (source_pdf,))
+        cursor.execute("INSERT INTO wells (source_pdf, pdf_sha256) VALUES (%s, %s)", (source_pdf, pdf_sha256))
         _debug("ensure_well inserted (no api) well_id", cursor.lastrowid)
         return cursor.lastrowid
     if api:
@@ -210,57 +805,38 @@ def ensure_well(cursor, config: dict, source_pdf: str) -> int:
         if row:
             _debug("ensure_well existing well_id", row[0])
             return row[0]
-    def _w(k):
-        return _trunc(config.get(k), WELL_COLUMN_MAX.get(k, 512))
-    cursor.execute(
-        """INSERT INTO wells (api_number, well_name, operator, enseco_job_number, job_type,
-            county_state, surface_hole_location, latitude, longitude, datum, source_pdf)
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-        (
-            _w("api_number"),
-            (config.get("well_name") or "").strip() or None,
-            (config.get("operator") or "").strip() or None,
-            _w("enseco_job_number"),
-            _w("job_type"),
-            (config.get("county_state") or "").strip() or None,
-            (config.get("surface_hole_location") or "").strip() or None,
-            _w("latitude"),
-            _w("longitude"),
-            _w("datum"),
-            _trunc(source_pdf, WELL_COLUMN_MAX["source_pdf"]) if source_pdf else None,
-        ),
-    )
+    cursor.execute(WELL_INSERT, well_row_values(config, source_pdf, pdf_sha256))
     _debug("ensure_well inserted well_id", cursor.lastrowid)
     return cursor.lastrowid
 
 
+STIM_INSERT = """INSERT INTO stimulations (well_id, date_stimulated, stimulated_formation, top_ft, bottom_ft,
+        stimulation_stages, volume, volume_units, type_treatment, acid_pct, lbs_proppant,
+        max_treatment_pressure_psi, max_treatment_rate_bbls_min, proppant_details)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"""
+
+
 def insert_stimulation(cursor, well_id: int, stim: dict, proppant_rows: list) -> None:
     _debug("insert_stimulation well_id", well_id)
-    date_val = stim.get("date_stimulated")
-    if isinstance(date_val, str):
-        date_val = _parse_date(date_val)
-    _debug("insert_stimulation date_val", date_val)
-    proppant_json = json.dumps(proppant_rows) if proppant_rows else None
-    stim_formation = (stim.get("stimulated_formation") or "").strip() or None
-    stim_vol_units = _trunc(stim.get("volume_units"), STIM_COLUMN_MAX["volume_units"])
-    stim_type_treat = (stim.get("type_treatment") or "").strip() or None
-    cursor.execute(
-        """INSERT INTO stimulations (well_id, date_stimulated, stimulated_formation, top_ft, bottom_ft,
-            stimulation_stages, volume, volume_units, type_treatment, acid_pct, lbs_proppant,
-            max_treatment_pressure_psi, max_treatment_rate_bbls_min, proppant_details)
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-        (
-            well_id, date_val, stim_formation,
-            _parse_int(stim.get("top_ft")), _parse_int(stim.get("bottom_ft")),
-            _parse_int(stim.get("stimulation_stages")),
-            _parse_decimal(stim.get("volume")), stim_vol_units, stim_type_treat or None,
-            _parse_decimal(stim.get("acid_pct")), _parse_int(stim.get("lbs_proppant")),
-            _parse_int(stim.get("max_treatment_pressure_psi")),
-            _parse_decimal(stim.get("max_treatment_rate_bbls_min")),
-            proppant_json,
-        ),
-    )
+    values = stim_row_values(stim, proppant_rows)
+    _debug("insert_stimulation date_val", values[0])
+    cursor.execute(STIM_INSERT, (well_id,) + values)
     _debug("insert_stimulation stimulation_id", cursor.lastrowid)
+    add_proppants(cursor, [(well_id,) + values])
+
+
+def stimulation_rows(well_id: int, stimulations: list) -> list:
+    """STIM_INSERT parameters for the parse_stimulations entries that have data."""
+    return [(well_id,) + stim_row_values(s["stim"], s["proppant"]) for s in stimulations if has_stimulation(s["stim"])]
+
+
+def insert_stimulations(cursor, well_id: int, stimulations: list) -> None:
+    """Insert every stimulation of one well with a single executemany, then its stimulation_proppants rows."""
+    rows = stimulation_rows(well_id, stimulations)
+    if rows:
+        cursor.executemany(STIM_INSERT, rows)
+        add_proppants(cursor, rows)
+    _debug("insert_stimulations well_id/rows", f"{well_id}/{len(rows)}")
 
 
 def well_exists_for_source_pdf(cursor, source_pdf: str) -> bool:
@@ -270,33 +846,748 @@ def well_exists_for_source_pdf(cursor, source_pdf: str) -> bool:
     return cursor.fetchone() is not None
 
 
-def process_pdf(pdf_path: str, cursor) -> bool:
-    _debug("process_pdf pdf_path", pdf_path)
-    text = get_pdf_text(pdf_path)
-    _debug("process_pdf text len", len(text))
-    temp_dir = Path(__file__).resolve().parent / "temp"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    (temp_dir / f"raw_{Path(pdf_path).stem}.txt").write_text(text or "", encoding="utf-8")
+def load_existing_wells(cursor) -> tuple:
+    """One query for the run's skip sets and API lookup: ({source_pdf}, {api_number: well_id}, {pdf_sha256}).
+
+    The source_pdf set only holds wells without a pdf_sha256 (written before hashes were stored); those
+    can still only be matched by filename.
+    """
+    cursor.execute("SELECT well_id, api_number, source_pdf, pdf_sha256 FROM wells ORDER BY well_id")
+    pdfs, api_ids, shas = set(), {}, set()
+    for well_id, api, source_pdf, sha in cursor.fetchall():
+        if sha:
+            shas.add(sha)
+        elif source_pdf:
+            pdfs.add(source_pdf)
+        if api:
+            api_ids.setdefault(api, well_id)
+    return pdfs, api_ids, shas
+
+
+def write_batch(cursor, batch: list, api_ids: dict) -> None:
+    """Insert the wells and stimulations for a list of extract_pdf results with one executemany each
+    (plus the stimulations' proppant rows, see proppant_stats.add_proppants).
+
+    Like ensure_well, a result whose API number is already known (in api_ids, or earlier in the batch)
+    reuses that well instead of inserting one. Wells with a pdf_sha256 go in with one executemany and
+    their well_ids are read back by hash; the rare ones without (whose source_pdf need not be unique)
+    are inserted one at a time for their lastrowid. Each result gets its "well_id"; api_ids is only
+    updated once the whole batch has been written.
+    """
+    new_wells, owners, batch_api = [], [], {}
+    for parsed in batch:
+        values = well_row_values(parsed["well"], parsed["source_pdf"], parsed.get("pdf_sha256"))
+        api = values[0]
+        if api and api in api_ids:
+            owners.append(("well", api_ids[api]))
+        elif api and api in batch_api:
+            owners.append(("new", batch_api[api]))
+        else:
+            owners.append(("new", len(new_wells)))
+            if api:
+                batch_api[api] = len(new_wells)
+            new_wells.append(values)
+    new_ids = [None] * len(new_wells)
+    hashed = [v for v in new_wells if v[-2]]
+    if hashed:
+        cursor.executemany(WELL_INSERT, hashed)
+        shas = [v[-2] for v in hashed]
+        cursor.execute(f"SELECT pdf_sha256, well_id FROM wells WHERE pdf_sha256 IN ({','.join(['%s'] * len(shas))})",
+                       shas)
+        by_sha = {}
+        for sha, well_id in cursor.fetchall():
+            by_sha[sha] = max(by_sha.get(sha, 0), well_id)
+    for i, values in enumerate(new_wells):
+        if values[-2]:
+            new_ids[i] = by_sha[values[-2]]
+        else:
+            cursor.execute(WELL_INSERT, values)
+            new_ids[i] = cursor.lastrowid
+    stim_rows = []
+    for parsed, (kind, ref) in zip(batch, owners):
+        well_id = new_ids[ref] if kind == "new" else ref
+        parsed["well_id"] = well_id
+        stim_rows.extend(stimulation_rows(well_id, parsed["stimulations"]))
+    if stim_rows:
+        cursor.executemany(STIM_INSERT, stim_rows)
+        add_proppants(cursor, stim_rows)
+    for api, i in batch_api.items():
+        api_ids[api] = new_ids[i]
+    _debug("write_batch wells/stimulations", f"{len(new_wells)}/{len(stim_rows)}")
+
+
+def _journal_key(parsed: dict) -> str:
+    return parsed.get("journal_key") or parsed["source_pdf"]
+
+
+def _write_individually(conn, cursor, results: list, api_ids: dict, on_commit=None) -> None:
+    for parsed in results:
+        api_ids.pop(well_row_values(parsed["well"], parsed["source_pdf"])[0], None)
+    for parsed in results:
+        try:
+            with METRICS.time("db_write_pdf"):
+                well_id = write_pdf_result(cursor, parsed)
+                conn.commit()
+            parsed["well_id"] = well_id
+            METRICS.count("pdfs_written")
+            api = well_row_values(parsed["well"], parsed["source_pdf"])[0]
+            if api:
+                api_ids.setdefault(api, well_id)
+            print(f"OK: {parsed['source_pdf']}")
+            if JOURNAL is not None:
+                JOURNAL.done(_journal_key(parsed))
+            if on_commit is not None:
+                on_commit([parsed])
+        except Exception as e:
+            conn.rollback()
+            print(f"Error {parsed['source_pdf']}: {e}", file=sys.stderr)
+            if JOURNAL is not None:
+                JOURNAL.failed(_journal_key(parsed), e)
+    if JOURNAL is not None:
+        JOURNAL.sync()
+
+
+def flush_batch(conn, cursor, batch: list, uncommitted: list, api_ids: dict, commit: bool, on_commit=None) -> None:
+    """Write batch (emptying it) and commit if asked.
+
+    A failed batch rolls back the open transaction, so every uncommitted result, including earlier
+    batches, is replayed one PDF at a time with its own commit; only the bad rows are lost.
+    on_commit(results), if given, is called with the results (each carrying "well_id") after every commit.
+    """
+    if batch:
+        try:
+            with METRICS.time("db_write_batch"):
+                write_batch(cursor, batch, api_ids)
+            uncommitted.extend(batch)
+        except Exception as e:
+            _debug("flush_batch failed, retrying row by row", str(e)[:60])
+            conn.rollback()
+            replay = uncommitted + batch
+            uncommitted.clear()
+            batch.clear()
+            _write_individually(conn, cursor, replay, api_ids, on_commit)
+            return
+        batch.clear()
+    if commit and uncommitted:
+        with METRICS.time("db_commit"):
+            conn.commit()
+        METRICS.count("pdfs_written", len(uncommitted))
+        for parsed in uncommitted:
+            print(f"OK: {parsed['source_pdf']}")
+            if JOURNAL is not None:
+                JOURNAL.done(_journal_key(parsed))
+        if JOURNAL is not None:
+            JOURNAL.sync()
+        if on_commit is not None:
+            on_commit(list(uncommitted))
+        uncommitted.clear()
+
+
+def extract_pdf(pdf_path: str, sha: str = None) -> dict:
+    """Extract text from one PDF and run every parser on it. No DB access, so it is safe in a worker process.
+
+    sha is the file's SHA-256 when the caller has already hashed it; it is stored as wells.pdf_sha256.
+    """
+    _debug("extract_pdf pdf_path", pdf_path)
+    with METRICS.time("pdf_text"):
+        text = get_pdf_text_streaming(pdf_path, sha) if STREAM_PAGES else get_pdf_text(pdf_path, sha)
+    _debug("extract_pdf text len", len(text))
     if not text.strip():
         raise ValueError(f"No text extracted from PDF (unsupported encoding e.g. 90ms-RKSJ, or empty file): {pdf_path}")
-    well_data = parse_well_fields(text)
-    stim_data = parse_stimulation_fields(text)
-    proppant = parse_proppant_details(text)
-    source_pdf = os.path.basename(pdf_path)
+    out = parse_text(os.path.basename(pdf_path), text)
+    if sha:
+        out["pdf_sha256"] = sha
+    return out
+
+
+def parse_text(source_pdf: str, text: str) -> dict:
+    out = {"source_pdf": source_pdf}
+    with METRICS.time("parse_well_fields"):
+        out["well"] = parse_well_fields(text)
+    with METRICS.time("parse_stimulations"):
+        out["stimulations"] = parse_stimulations(text)
+    return out
+
+
+def write_pdf_result(cursor, parsed: dict) -> int:
+    """Insert the well (and its stimulations, if any) for one extract_pdf result. Returns well_id."""
+    source_pdf = parsed["source_pdf"]
     print(f"Inserting: {source_pdf}")
-    well_id = ensure_well(cursor, well_data, source_pdf)
-    _debug("process_pdf well_id", well_id)
-    has_stim = any(
-        stim_data.get(k) is not None and str(stim_data.get(k)).strip()
-        for k in ("date_stimulated", "stimulated_formation", "lbs_proppant")
-    )
-    if has_stim:
-        insert_stimulation(cursor, well_id, stim_data, proppant)
+    well_id = ensure_well(cursor, parsed["well"], source_pdf, parsed.get("pdf_sha256"))
+    _debug("write_pdf_result well_id", well_id)
+    insert_stimulations(cursor, well_id, parsed["stimulations"])
+    return well_id
+
+
+def process_pdf(pdf_path: str, cursor) -> bool:
+    _debug("process_pdf pdf_path", pdf_path)
+    write_pdf_result(cursor, extract_pdf(pdf_path, file_sha256(pdf_path)))
     return True
 
 
-if __name__ == "__main__":
+def _init_worker(log_path: str, settings: dict) -> None:
+    global LOG_FILE
+    LOG_FILE = BufferedLog(open(log_path, "a", encoding="utf-8"))
+    # Pool workers leave through os._exit, which skips atexit; multiprocessing finalizers still run.
+    multiprocessing.util.Finalize(None, LOG_FILE.close, exitpriority=10)
+    METRICS.drain()  # drop whatever a forked worker inherited from the parent
+    configure_text_cache(*settings["text_cache"])
+    configure_streaming(*settings["streaming"])
+    configure_extraction(*settings["extraction"])
+
+
+def _init_watch_worker(log_path: str, settings: dict) -> None:
+    # Ctrl-C is handled by the watching process, which shuts the pool down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_worker(log_path, settings)
+
+
+def _extract_worker(pdf_path: str, sha: str = None) -> dict:
+    try:
+        out = extract_pdf(pdf_path, sha)
+    except Exception as e:
+        out = {"source_pdf": os.path.basename(pdf_path), "error": str(e)}
+    out["metrics"] = METRICS.drain()
+    return out
+
+
+def _extract_isolated(pdf_path: str, log_path: str, sha: str = None) -> dict:
+    pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(log_path, _worker_settings()))
+    try:
+        return pool.submit(_extract_worker, pdf_path, sha).result()
+    except BrokenProcessPool:
+        return {"source_pdf": os.path.basename(pdf_path), "error": "worker process crashed"}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def dedupe_plan(items, hashed, legacy_names: set, known_shas: set):
+    """Yield (key, pdf_path, sha256, skip) for [(key, pdf_path)] zipped with iter_hashed output.
+
+    skip is why the PDF need not be extracted ("already in DB", "duplicate content"), or None. Content
+    is matched by SHA-256 against wells and against PDFs earlier in the run; a PDF that could not be
+    hashed is left to fail in extraction. Wells stored without a hash are matched by filename.
+    """
+    seen = set(known_shas)
+    for (key, pdf_path), (_, sha) in zip(items, hashed):
+        if sha is not None and sha in seen:
+            yield key, pdf_path, sha, "already in DB" if sha in known_shas else "duplicate content"
+        elif pdf_path.name in legacy_names:
+            yield key, pdf_path, sha, "already in DB"
+        else:
+            if sha is not None:
+                seen.add(sha)
+            yield key, pdf_path, sha, None
+
+
+def iter_extracted_parallel(items, workers: int, log_path: str):
+    """Yield extract_pdf results (or {"error": ...}) in input order from a process pool.
+
+    items is an iterable of (pdf_path, sha256 or None); it is consumed lazily, only as far as the
+    submit window reaches, so it can be fed by iter_hashed while hashing is still going on.
+
+    A worker that dies hard (segfault, OOM kill) breaks the whole pool. When that happens the
+    PDF at the head of the queue is re-run alone in a fresh process, so only the culprit is
+    reported as failed, and the rest are resubmitted to a new pool.
+    """
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_path, _worker_settings()))
+
+    window = workers * 4
+    items = iter(items)
+    retry = deque()
+    in_flight = deque()
+    pool = new_pool()
+    try:
+        while True:
+            while len(in_flight) < window:
+                if retry:
+                    path, sha = retry.popleft()
+                else:
+                    nxt = next(items, None)
+                    if nxt is None:
+                        break
+                    path, sha = str(nxt[0]), nxt[1]
+                in_flight.append((path, sha, pool.submit(_extract_worker, path, sha)))
+            if not in_flight:
+                break
+            path, sha, fut = in_flight.popleft()
+            try:
+                result = fut.result()
+                METRICS.merge(result.pop("metrics", None))
+                yield result
+            except BrokenProcessPool:
+                _debug("iter_extracted_parallel pool broken at", path)
+                retry.extendleft(reversed([(p, h) for p, h, _ in in_flight]))
+                in_flight.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                result = _extract_isolated(path, log_path, sha)
+                METRICS.merge(result.pop("metrics", None))
+                yield result
+                pool = new_pool()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _reparse_worker(pdf_path: str) -> dict:
+    source_pdf = os.path.basename(pdf_path)
+    try:
+        sha = file_sha256(pdf_path)
+        text = text_cache_get(sha)
+        if text is None:
+            out = {"source_pdf": source_pdf, "error": "not in text cache"}
+        else:
+            out = parse_text(source_pdf, text)
+            out["pdf_sha256"] = sha
+    except Exception as e:
+        out = {"source_pdf": source_pdf, "error": str(e)}
+    out["metrics"] = METRICS.drain()
+    return out
+
+
+def _same(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, (float, Decimal)) or isinstance(b, (float, Decimal)):
+        return round(float(a), 4) == round(float(b), 4)
+    return a == b
+
+
+def _changed_columns(columns: tuple, old: tuple, new: tuple, skip=()) -> dict:
+    return {c: n for c, o, n in zip(columns, old, new) if c not in skip and not _same(o, n)}
+
+
+def _update_row(cursor, table: str, key: str, key_val, changes: dict) -> None:
+    sets = ", ".join(f"{c} = %s" for c in changes)
+    cursor.execute(f"UPDATE {table} SET {sets} WHERE {key} = %s", tuple(changes.values()) + (key_val,))
+
+
+def apply_reparsed(cursor, parsed: dict, existing: dict, matched_by_pdf: bool, old_stims: list, counts: dict) -> int:
+    """Bring an existing well (and its stimulations) in line with a new parse of its PDF.
+
+    existing is {"well_id", "values" (WELL_COLUMNS order)} and old_stims its [{"stimulation_id", "values"}]
+    in stimulation_id order. Old and new stimulations are paired in order: pairs that differ are
+    updated, extra new ones inserted and leftover old ones deleted. Returns the number of rows written.
+
+    A PDF matched only by API (matched_by_pdf False) shares its well with another PDF of that well. A
+    normal run keeps the first PDF's well columns (ensure_well reuses the well), and the stimulations of
+    the two PDFs cannot be told apart, so the well is left alone and counted as api_only.
+    """
+    source_pdf = parsed["source_pdf"]
+    well_id = existing["well_id"]
+    if not matched_by_pdf:
+        counts["api_only"] += 1
+        _debug("reparse matched only by API, well left alone", f"{source_pdf} -> well_id {well_id}")
+        return 0
+    written = 0
+    skip = () if parsed.get("pdf_sha256") else ("pdf_sha256",)
+    changes = _changed_columns(WELL_COLUMNS, existing["values"],
+                               well_row_values(parsed["well"], source_pdf, parsed.get("pdf_sha256")), skip=skip)
+    # proppant_summary is keyed by operator, formation and month: take the old rows out before they change.
+    resync = "operator" in changes
+    if resync:
+        drop_proppants(cursor, well_ids=[well_id])
+    if changes:
+        _update_row(cursor, "wells", "well_id", well_id, changes)
+        counts["wells_updated"] += 1
+        written += 1
+        _debug("reparse well changed", f"{source_pdf}: {', '.join(changes)}")
+    else:
+        counts["wells_unchanged"] += 1
+    new_rows = stimulation_rows(well_id, parsed["stimulations"])
+    for old, new in zip(old_stims, new_rows):
+        stim_changes = _changed_columns(STIM_COLUMNS, old["values"], new[1:])
+        if stim_changes.keys() & {"date_stimulated", "stimulated_formation", "proppant_details"}:
+            drop_proppants(cursor, stimulation_ids=[old["stimulation_id"]])
+            resync = True
+        if stim_changes:
+            _update_row(cursor, "stimulations", "stimulation_id", old["stimulation_id"], stim_changes)
+            counts["stims_updated"] += 1
+            written += 1
+    if len(new_rows) > len(old_stims):
+        cursor.executemany(STIM_INSERT, new_rows[len(old_stims):])
+        counts["stims_inserted"] += len(new_rows) - len(old_stims)
+        written += len(new_rows) - len(old_stims)
+        resync = True
+    gone = [old["stimulation_id"] for old in old_stims[len(new_rows):]]
+    if gone:
+        drop_proppants(cursor, stimulation_ids=gone)
+        cursor.execute(f"DELETE FROM stimulations WHERE stimulation_id IN ({','.join(['%s'] * len(gone))})", gone)
+        # A deleted row leaves no updated_at behind, so mark the well for the map export.
+        cursor.execute("UPDATE wells SET updated_at = CURRENT_TIMESTAMP WHERE well_id = %s", (well_id,))
+        counts["stims_deleted"] += len(gone)
+        written += len(gone)
+    if resync:
+        sync_proppants(cursor, [well_id])
+    return written
+
+
+def reparse_from_cache(pdfs: list, conn, workers: int, log_path: str, commit_every: int = 500) -> dict:
+    """Re-run the parsers over cached text and apply only the rows that changed.
+
+    Wells are matched by pdf_sha256, then by source_pdf (rows written before hashes were stored), then
+    by api_number; unmatched PDFs are inserted as in a normal run. A PDF whose content was already
+    handled earlier in the run is counted as a duplicate and skipped. A matched well gets an UPDATE of
+    just the differing columns, and its stimulations are updated, inserted or deleted to agree with
+    the new parse (see apply_reparsed). PDFs whose text is not cached are skipped (run a normal
+    extraction first).
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT well_id, {', '.join(WELL_COLUMNS)} FROM wells ORDER BY well_id")
+    by_sha, by_pdf, by_api = {}, {}, {}
+    for row in cursor.fetchall():
+        well = {"well_id": row[0], "values": tuple(row[1:])}
+        api, sha, source_pdf = row[1], row[-2], row[-1]
+        if sha:
+            by_sha.setdefault(sha, well)
+        elif source_pdf:
+            by_pdf.setdefault(source_pdf, well)
+        if api:
+            by_api.setdefault(api, well)
+    cursor.execute(f"SELECT well_id, stimulation_id, {', '.join(STIM_COLUMNS)} FROM stimulations ORDER BY stimulation_id")
+    stims = {}
+    for row in cursor.fetchall():
+        stims.setdefault(row[0], []).append({"stimulation_id": row[1], "values": tuple(row[2:])})
+
+    counts = dict.fromkeys(
+        ("wells_updated", "wells_inserted", "wells_unchanged", "stims_updated", "stims_inserted",
+         "stims_deleted", "api_only", "duplicates", "not_cached", "errors"), 0)
+    todo = list(dict.fromkeys(str(p) for p in pdfs))
+    seen_shas = set()
+    pending = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(log_path, _worker_settings())) as pool:
+        for parsed in pool.map(_reparse_worker, todo, chunksize=16):
+            METRICS.merge(parsed.pop("metrics", None))
+            source_pdf = parsed["source_pdf"]
+            if "error" in parsed:
+                key = "not_cached" if parsed["error"] == "not in text cache" else "errors"
+                counts[key] += 1
+                if key == "errors":
+                    print(f"Error {source_pdf}: {parsed['error']}", file=sys.stderr)
+                continue
+            sha = parsed["pdf_sha256"]
+            if sha in seen_shas:
+                counts["duplicates"] += 1
+                continue
+            seen_shas.add(sha)
+            try:
+                new_well = well_row_values(parsed["well"], source_pdf, sha)
+                # A legacy row matched by filename is claimed by the first PDF with that name.
+                existing = by_sha.get(sha) or by_pdf.pop(source_pdf, None)
+                matched_by_pdf = existing is not None
+                if existing is None and new_well[0]:
+                    existing = by_api.get(new_well[0])
+                if existing is None:
+                    write_pdf_result(cursor, parsed)
+                    counts["wells_inserted"] += 1
+                    pending += 1
+                    continue
+                pending += apply_reparsed(cursor, parsed, existing, matched_by_pdf,
+                                          stims.get(existing["well_id"], []), counts)
+            except Exception as e:
+                counts["errors"] += 1
+                print(f"Error {source_pdf}: {e}", file=sys.stderr)
+            if pending >= commit_every:
+                conn.commit()
+                pending = 0
+    conn.commit()
+    cursor.close()
+    return counts
+
+
+def _match_existing(cursor, parsed: dict, previous_sha: str = None) -> tuple:
+    """(existing, matched_by_pdf, old_stims) for one rewritten PDF, matched as reparse_from_cache does.
+
+    The new content has a new hash, so the well written from the file's previous version is looked up by
+    previous_sha (from the watch manifest), then by source_pdf for wells stored without a hash, then by
+    source_pdf alone when exactly one well has that name (whatever its hash; two wells with the name came
+    from different folders and are not guessed between). Failing those, a well with the same API number
+    is returned with matched_by_pdf False, which apply_reparsed leaves alone.
+    """
+    columns = ", ".join(WELL_COLUMNS)
+    row = None
+    for sha in (parsed.get("pdf_sha256"), previous_sha):
+        if row is None and sha:
+            cursor.execute(f"SELECT well_id, {columns} FROM wells WHERE pdf_sha256 = %s ORDER BY well_id LIMIT 1",
+                           (sha,))
+            row = cursor.fetchone()
+    if row is None:
+        cursor.execute(f"SELECT well_id, {columns} FROM wells WHERE source_pdf = %s AND pdf_sha256 IS NULL "
+                       "ORDER BY well_id LIMIT 1", (parsed["source_pdf"],))
+        row = cursor.fetchone()
+    if row is None:
+        cursor.execute(f"SELECT well_id, {columns} FROM wells WHERE source_pdf = %s ORDER BY well_id LIMIT 2",
+                       (parsed["source_pdf"],))
+        rows = cursor.fetchall()
+        row = rows[0] if len(rows) == 1 else None
+    matched_by_pdf = row is not None
+    api = well_row_values(parsed["well"], parsed["source_pdf"])[0]
+    if row is None and api:
+        cursor.execute(f"SELECT well_id, {columns} FROM wells WHERE api_number = %s ORDER BY well_id LIMIT 1", (api,))
+        row = cursor.fetchone()
+    if row is None:
+        return None, False, []
+    if not matched_by_pdf:
+        return {"well_id": row[0], "values": tuple(row[1:])}, False, []
+    cursor.execute(
+        f"SELECT stimulation_id, {', '.join(STIM_COLUMNS)} FROM stimulations WHERE well_id = %s "
+        "ORDER BY stimulation_id", (row[0],))
+    stims = [{"stimulation_id": stim[0], "values": tuple(stim[1:])} for stim in cursor.fetchall()]
+    return {"well_id": row[0], "values": tuple(row[1:])}, matched_by_pdf, stims
+
+
+def _ingest_watched(conn, item: tuple, parsed: dict, known_shas: set, manifest, counts: dict) -> None:
+    """Write one watched PDF with its own commit: insert if new, update in place if its file changed."""
+    path, mtime, size, changed = item
+    source_pdf = os.path.basename(path)
+    note = ""
+    try:
+        if "error" in parsed:
+            raise RuntimeError(parsed["error"])
+        if hasattr(conn, "ping"):
+            conn.ping(reconnect=True, attempts=3, delay=2)
+        cursor = conn.cursor()
+        try:
+            match = _match_existing(cursor, parsed, manifest.sha256(path)) if changed else (None, False, [])
+            if match[0] is not None:
+                apply_reparsed(cursor, parsed, *match, counts)
+                note = " (updated)" if match[1] else " (well of another PDF with this API left alone)"
+            else:
+                write_pdf_result(cursor, parsed)
+                counts["wells_inserted"] += 1
+            with METRICS.time("db_commit"):
+                conn.commit()
+        finally:
+            cursor.close()
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"Error {source_pdf}: {e}", file=sys.stderr)
+        METRICS.count("pdfs_failed")
+        counts["failed"] += 1
+        manifest.mark(path, mtime, size, "failed", changed)
+        return
+    METRICS.count("pdfs_written")
+    if parsed.get("pdf_sha256"):
+        known_shas.add(parsed["pdf_sha256"])
+    manifest.mark(path, mtime, size, "done", changed, parsed.get("pdf_sha256"))
+    print(f"OK: {source_pdf}{note}")
+
+
+def watch_folder(conn, pdf_folder: Path, manifest_path: Path, workers: int, log_path: str, settle: float = 2.0,
+                 interval: float = 1.0, queue_size: int = 64, full_rescan: float = 3600.0) -> dict:
+    """Ingest PDFs as they appear in (or are rewritten under) pdf_folder until Ctrl-C.
+
+    pdf_watch.FolderWatcher feeds a bounded queue; up to `workers` PDFs are extracted at a time in a
+    process pool, and this process writes each result over the one connection as soon as it is ready.
+    A PDF whose content (SHA-256) is already in wells is skipped, as in a normal run; so is a new PDF
+    whose name matches a well written before hashes were stored.
+    """
+    from pdf_watch import FolderManifest, FolderWatcher
+
+    cursor = conn.cursor()
+    with METRICS.time("db_load_existing"):
+        legacy, _, shas = load_existing_wells(cursor)
+    cursor.close()
+
+    def sha_of(path):
+        try:
+            with METRICS.time("pdf_hash"):
+                return file_sha256(path)
+        except OSError:
+            return None
+
+    manifest = FolderManifest(manifest_path)
+    work = queue.Queue(maxsize=max(1, queue_size))
+    watcher = FolderWatcher(pdf_folder, manifest, work, settle=settle, interval=interval, full_rescan=full_rescan)
+    if manifest.is_empty():
+        known = watcher.seed(lambda p: os.path.basename(p) in legacy or sha_of(p) in shas)
+        print(f"First watch of {pdf_folder}: {known} PDFs already in the DB")
+    counts = dict.fromkeys(
+        ("wells_inserted", "wells_updated", "wells_unchanged", "stims_updated", "stims_inserted", "stims_deleted",
+         "api_only", "skipped", "failed"), 0)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_watch_worker,
+                                   initargs=(log_path, _worker_settings()))
+
+    pool = new_pool()
+    in_flight = deque()
+    print(f"Watching {pdf_folder} ({watcher.mode}, settle {settle:g}s); Ctrl-C to stop")
+    watcher.start()
+    try:
+        while True:
+            # Only take work while a worker is free; otherwise the queue fills and the watcher waits.
+            while len(in_flight) < workers:
+                try:
+                    item = work.get(timeout=0.1 if in_flight else 1.0)
+                except queue.Empty:
+                    break
+                sha = sha_of(item[0])
+                if (sha is not None and sha in shas) or (not item[3] and os.path.basename(item[0]) in legacy):
+                    print(f"Skip (already in DB): {os.path.basename(item[0])}")
+                    METRICS.count("pdfs_duplicate")
+                    counts["skipped"] += 1
+                    manifest.mark(*item[:3], "done", item[3], sha)
+                    continue
+                in_flight.append((item, sha, pool.submit(_extract_worker, item[0], sha)))
+            if not in_flight:
+                continue
+            item, sha, fut = in_flight[0]
+            try:
+                parsed = fut.result(timeout=0.1)
+            except FuturesTimeout:
+                continue
+            except BrokenProcessPool:
+                _debug("watch_folder pool broken at", item[0])
+                pool.shutdown(wait=False, cancel_futures=True)
+                parsed = _extract_isolated(item[0], log_path, sha)
+                pool = new_pool()
+                for i in range(1, len(in_flight)):
+                    other, other_sha, _ = in_flight[i]
+                    in_flight[i] = (other, other_sha, pool.submit(_extract_worker, other[0], other_sha))
+            in_flight.popleft()
+            METRICS.merge(parsed.pop("metrics", None))
+            _ingest_watched(conn, item, parsed, shas, manifest, counts)
+    except KeyboardInterrupt:
+        print("\nStopping watch; unfinished PDFs are picked up on the next start.")
+    finally:
+        watcher.stop()
+        pool.shutdown(wait=False, cancel_futures=True)
+        manifest.close()
+    return counts
+
+
+def extract_all(conn, pdfs: list, keys: list, workers: int, log_path: str, batch_size: int = 200,
+                commit_every: int = 200, on_commit=None) -> dict:
+    """Extract every PDF in pdfs (keys: their journal keys) and write the results in batches.
+
+    on_commit is passed to flush_batch. Returns {"duplicates", "failed"}.
+    """
+    cursor = conn.cursor()
+    with METRICS.time("db_load_existing"):
+        legacy, api_ids, shas = load_existing_wells(cursor)
+    # Files are hashed a few ahead in threads and anything whose content is already in wells (or
+    # earlier in this run) is skipped before pypdf opens it. With workers > 1 the pool extracts
+    # ahead while this process stays the only DB writer. Results come back in input order, so
+    # inserts (and well_ids) are identical to a serial run.
+    plan = dedupe_plan(zip(keys, pdfs), iter_hashed(pdfs, max(2, workers)), legacy, shas)
+    results = None
+    if workers > 1:
+        plan, todo = itertools.tee(plan)
+        results = iter_extracted_parallel(((p, sha) for _, p, sha, skip in todo if not skip), workers, log_path)
+    batch, uncommitted = [], []
+    counts = {"duplicates": 0, "failed": 0}
+    try:
+        for key, pdf_path, sha, skip in plan:
+            source_pdf = pdf_path.name
+            try:
+                if JOURNAL is not None:
+                    JOURNAL.begin(key)
+                if skip:
+                    print(f"Skip ({skip}): {key}")
+                    METRICS.count("pdfs_duplicate")
+                    counts["duplicates"] += 1
+                    if JOURNAL is not None:
+                        JOURNAL.done(key)
+                    continue
+                parsed = next(results) if results is not None else extract_pdf(str(pdf_path), sha)
+                if "error" in parsed:
+                    raise RuntimeError(parsed["error"])
+            except Exception as e:
+                print(f"Error {source_pdf}: {e}", file=sys.stderr)
+                METRICS.count("pdfs_failed")
+                counts["failed"] += 1
+                if JOURNAL is not None:
+                    JOURNAL.failed(key, e)
+                continue
+            parsed["journal_key"] = key
+            batch.append(parsed)
+            if len(batch) >= batch_size:
+                flush_batch(conn, cursor, batch, uncommitted, api_ids, len(uncommitted) + batch_size >= commit_every,
+                            on_commit)
+    finally:
+        # Also on Ctrl-C or an error: closing the generator shuts the extraction pool down.
+        if results is not None:
+            results.close()
+    flush_batch(conn, cursor, batch, uncommitted, api_ids, True, on_commit)
+    conn.commit()
+    cursor.close()
+    return counts
+
+
+def _finish_metrics(wall_seconds: float, export_path=None) -> None:
+    """Print the per-stage profile, append it to the log and optionally export it (.json or Prometheus text)."""
+    report = METRICS.report(wall_seconds)
+    if not report:
+        return
+    print("\n" + report)
+    if LOG_FILE is not None:
+        LOG_FILE.write(f"{datetime.now().isoformat()} [METRICS]\n{report}\n")
+    if export_path:
+        METRICS.export(export_path, "extract_wells", wall_seconds)
+
+
+def configure_from_config(cfg, script_dir: Path, use_cache: bool = True, stream_pages: bool = False,
+                          backends=None, extract_timeout=None, max_rss_mb=None) -> None:
+    """Apply the text cache, page streaming and extraction backend settings from config.py (shared with pipeline.py).
+
+    backends / extract_timeout / max_rss_mb override PDF_BACKENDS / PDF_EXTRACT_TIMEOUT / PDF_EXTRACT_MAX_RSS_MB;
+    raises ValueError for an unknown backend or a non-numeric limit.
+    """
+    if use_cache:
+        cache_dir = Path(getattr(cfg, "TEXT_CACHE_DIR", script_dir / "temp" / "text_cache"))
+        if not cache_dir.is_absolute():
+            cache_dir = script_dir / cache_dir
+        configure_text_cache(
+            cache_dir,
+            int(getattr(cfg, "TEXT_CACHE_MAX_MB", 2048)) * 1024 * 1024,
+            bool(getattr(cfg, "TEXT_CACHE_COMPRESS", False)),
+        )
+    configure_streaming(
+        stream_pages or getattr(cfg, "STREAM_PAGES", False),
+        getattr(cfg, "STREAM_REQUIRED_WELL_FIELDS", None),
+        getattr(cfg, "STREAM_REQUIRED_STIM_FIELDS", None),
+        getattr(cfg, "STREAM_REQUIRE_PROPPANT", None),
+        getattr(cfg, "PAGE_KEYWORDS", None),
+    )
+    if isinstance(backends, str):
+        backends = [b.strip() for b in backends.split(",") if b.strip()]
+    configure_extraction(
+        backends or getattr(cfg, "PDF_BACKENDS", None),
+        float(extract_timeout if extract_timeout is not None else getattr(cfg, "PDF_EXTRACT_TIMEOUT", 120)),
+        float(max_rss_mb if max_rss_mb is not None else getattr(cfg, "PDF_EXTRACT_MAX_RSS_MB", 2048)),
+    )
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main() -> None:
+    global LOG_FILE, JOURNAL
     dry_run = "--dry-run" in sys.argv or "-n" in sys.argv
+    no_cache = "--no-cache" in sys.argv
+    reparse = "--reparse" in sys.argv
+    resume = "--resume" in sys.argv
+    watch = "--watch" in sys.argv
+    try:
+        workers = int(_arg_value("--workers", (os.cpu_count() or 1) if reparse else 1))
+        batch_size = max(1, int(_arg_value("--batch-size", 200)))
+        commit_every = max(1, int(_arg_value("--commit-every", batch_size)))
+        max_retries = _arg_value("--max-retries")
+        max_retries = int(max_retries) if max_retries is not None else None
+    except ValueError:
+        print("--workers, --batch-size, --commit-every and --max-retries expect integers", file=sys.stderr)
+        sys.exit(2)
     script_dir = Path(__file__).resolve().parent
     script_dir.joinpath("temp").mkdir(parents=True, exist_ok=True)
 
@@ -304,41 +1595,95 @@ if __name__ == "__main__":
     pdf_folder = Path(getattr(cfg, "PDF_FOLDER", "."))
     if not pdf_folder.is_absolute():
         pdf_folder = script_dir / pdf_folder
-    pdfs = sorted(pdf_folder.glob("**/*.pdf"))
-    if not pdfs:
-        print(f"No PDFs found in {pdf_folder}", file=sys.stderr)
-        sys.exit(1)
+    if reparse and no_cache:
+        print("--reparse reads the text cache; it cannot be combined with --no-cache", file=sys.stderr)
+        sys.exit(2)
+    try:
+        configure_from_config(cfg, script_dir, use_cache=not no_cache, stream_pages="--stream-pages" in sys.argv,
+                              backends=_arg_value("--backends"), extract_timeout=_arg_value("--extract-timeout"),
+                              max_rss_mb=_arg_value("--max-rss-mb"))
+    except ValueError as e:
+        print(f"Extraction settings: {e}", file=sys.stderr)
+        sys.exit(2)
+    if "--check-scanner" in sys.argv:
+        if TEXT_CACHE_DIR is None:
+            print("--check-scanner reads the text cache; it cannot be combined with --no-cache", file=sys.stderr)
+            sys.exit(2)
+        sys.exit(1 if check_scanner_parity() else 0)
+    if max_retries is None:
+        max_retries = int(getattr(cfg, "JOURNAL_MAX_RETRIES", 3))
+    journal = RunJournal(script_dir / "temp" / "journal" / "extract.jsonl", max_retries)
+    remaining = journal.resume() if resume and not (dry_run or reparse or watch) else None
+    if remaining is not None:
+        # Continue from the journal: only unfinished PDFs, no folder scan.
+        keys = [key for key, _ in remaining]
+        pdfs = [Path(path) for _, path in remaining]
+        print(f"Resuming: {len(pdfs)} PDFs left ({journal.counts()})")
+    elif watch:
+        pdfs = []  # the watcher keeps its own manifest
+    else:
+        pdfs = sorted(pdf_folder.glob("**/*.pdf"))
+        if not pdfs:
+            print(f"No PDFs found in {pdf_folder}", file=sys.stderr)
+            sys.exit(1)
+        # Journal keys are paths under PDF_FOLDER: the same file name can appear in several subfolders.
+        keys = [p.relative_to(pdf_folder).as_posix() for p in pdfs]
 
     if dry_run:
         for pdf_path in pdfs[:3]:
-            text = get_pdf_text(str(pdf_path))
             print(f"\n--- {pdf_path.name} ---")
+            try:
+                text = get_pdf_text(str(pdf_path))
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
             print("Well:", parse_well_fields(text))
-            print("Stimulation:", parse_stimulation_fields(text))
-            print("Proppant:", parse_proppant_details(text))
+            for i, s in enumerate(parse_stimulations(text), 1):
+                print(f"Stimulation {i}:", s["stim"])
+                print(f"Proppant {i}:", s["proppant"])
         sys.exit(0)
 
-    global LOG_FILE
-    LOG_FILE = open(script_dir / "extract_wells.log", "a", encoding="utf-8")
+    metrics_path = _arg_value("--metrics") or getattr(cfg, "METRICS_EXPORT", None)
+    started = time.perf_counter()
+    log_path = script_dir / "extract_wells.log"
+    LOG_FILE = BufferedLog(open(log_path, "a", encoding="utf-8"))
     LOG_FILE.write(f"\n--- Run started {datetime.now().isoformat()} ---\n")
-    LOG_FILE.flush()
     try:
         conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
-        cursor = conn.cursor()
-        for pdf_path in pdfs:
-            try:
-                source_pdf = pdf_path.name
-                if well_exists_for_source_pdf(cursor, source_pdf):
-                    print(f"Skip (already in DB): {source_pdf}")
-                    continue
-                process_pdf(str(pdf_path), cursor)
-                print(f"OK: {source_pdf}")
-                conn.commit()
-            except Exception as e:
-                print(f"Error {source_pdf}: {e}", file=sys.stderr)
-        conn.commit()
-        cursor.close()
+        if reparse:
+            counts = reparse_from_cache(pdfs, conn, max(1, workers), str(log_path))
+            conn.close()
+            print("Reparse done. " + ", ".join(f"{k}: {v}" for k, v in counts.items()))
+            return
+        if watch:
+            manifest_path = Path(getattr(cfg, "WATCH_MANIFEST", script_dir / "temp" / "watch_manifest.sqlite"))
+            if not manifest_path.is_absolute():
+                manifest_path = script_dir / manifest_path
+            counts = watch_folder(
+                conn, pdf_folder, manifest_path, max(1, workers), str(log_path),
+                settle=float(getattr(cfg, "WATCH_SETTLE_SECONDS", 2.0)),
+                interval=float(getattr(cfg, "WATCH_POLL_SECONDS", 1.0)),
+                queue_size=int(getattr(cfg, "WATCH_QUEUE_SIZE", 64)),
+                full_rescan=float(getattr(cfg, "WATCH_FULL_RESCAN_SECONDS", 3600)),
+            )
+            conn.close()
+            print("Watch stopped. " + ", ".join(f"{k}: {v}" for k, v in counts.items() if v))
+            return
+        if remaining is None:
+            journal.start([(key, str(p)) for key, p in zip(keys, pdfs)])
+        JOURNAL = journal
+        counts = extract_all(conn, pdfs, keys, workers, str(log_path), batch_size, commit_every)
         conn.close()
+        duplicates = counts["duplicates"]
+        print(f"Duplicates skipped: {duplicates}/{len(pdfs)} PDFs ({100.0 * duplicates / max(1, len(pdfs)):.1f}%)")
+        print("Journal: " + ", ".join(f"{k}: {v}" for k, v in sorted(journal.counts().items())))
     finally:
+        journal.close()
+        JOURNAL = None
+        _finish_metrics(time.perf_counter() - started, metrics_path)
         LOG_FILE.close()
         LOG_FILE = None
+
+
+if __name__ == "__main__":
+    main()
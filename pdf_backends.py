@@ -0,0 +1,272 @@
+"""PDF text-extraction backends, and a sandbox that runs one extraction in a child process with limits.
+
+    backend = get_backend("pdfium")
+    pages = list(backend.iter_pages(path, metrics))     # stages pdf_open and page_extract go to metrics
+    text, warnings = run_sandboxed(fn, (path,), timeout=120, max_mb=2048)
+
+BACKENDS maps a name to a backend class; pypdf (or PyPDF2) is required, pypdfium2 ("pdfium") and
+pdfminer.six ("pdfminer") are used when installed. available_backends() keeps the installed names of a
+preference list, in order. extract_pdf_wells.py tries them in that order and falls back to the next one
+when a backend raises, finds no text, times out or goes over the memory limit.
+
+run_sandboxed runs the call in a worker process started with spawn (a fresh interpreter, so it
+inherits neither the parent's threads nor its memory) and reused across calls. A call that runs past
+`timeout` seconds gets the worker killed; `max_mb` caps the worker's address space with RLIMIT_AS, so
+an allocation past it raises MemoryError there (no limit where the resource module is missing). The
+worker takes about a third of a second to start, once per process, and each call pickles the text
+back. Backends here do no logging and time their stages only into the Metrics instance they are given.
+"""
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import nullcontext, redirect_stderr
+from typing import Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit
+    resource = None
+
+WARNINGS_KEPT = 20
+
+
+class SandboxError(Exception):
+    """An extraction that failed in the sandbox; reason is "timeout", "memory", "crashed" or "error" (it raised)."""
+
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+class PdfBackend:
+    """Yields the text of each page of a PDF; pages without text yield ""."""
+
+    name = None
+    module = None  # top-level module that must be importable for available()
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    def iter_pages(self, pdf_path: str, metrics=None) -> Iterator[str]:
+        """Page texts in order; opening the file is timed as stage pdf_open and each page as page_extract
+        in metrics (a run_metrics.Metrics), when given."""
+        raise NotImplementedError
+
+
+def _timed(metrics, stage: str):
+    return metrics.time(stage) if metrics is not None else nullcontext()
+
+
+class PypdfBackend(PdfBackend):
+    name = "pypdf"
+    module = "pypdf"
+
+    @classmethod
+    def available(cls) -> bool:
+        return any(importlib.util.find_spec(m) is not None for m in ("pypdf", "PyPDF2"))
+
+    @staticmethod
+    def page_may_have_text(page) -> bool:
+        """False only when the page provably has no text: no BT operator in its content and no form XObjects.
+
+        Scanned-log pages are usually a single image, so this skips extract_text for them entirely.
+        """
+        try:
+            contents = page.get_contents()
+            if contents is not None and b"BT" in contents.get_data():
+                return True
+            xobjects = (page.get("/Resources") or {}).get("/XObject") or {}
+            return any(xobjects[name].get_object().get("/Subtype") == "/Form" for name in xobjects)
+        except Exception:
+            return True
+
+    def iter_pages(self, pdf_path: str, metrics=None) -> Iterator[str]:
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            from PyPDF2 import PdfReader
+        with _timed(metrics, "pdf_open"):
+            reader = PdfReader(pdf_path)
+        for page in reader.pages:
+            with _timed(metrics, "page_extract"):
+                text = (page.extract_text() or "") if self.page_may_have_text(page) else ""
+            yield text
+
+
+class PdfiumBackend(PdfBackend):
+    """pypdfium2 (PDFium bindings): much faster than pypdf and handles CJK CMaps such as 90ms-RKSJ."""
+
+    name = "pdfium"
+    module = "pypdfium2"
+
+    def iter_pages(self, pdf_path: str, metrics=None) -> Iterator[str]:
+        import pypdfium2
+
+        with _timed(metrics, "pdf_open"):
+            pdf = pypdfium2.PdfDocument(pdf_path)
+        try:
+            for i in range(len(pdf)):
+                with _timed(metrics, "page_extract"):
+                    page = pdf[i]
+                    textpage = page.get_textpage()
+                    try:
+                        text = textpage.get_text_range() or ""
+                    finally:
+                        textpage.close()
+                        page.close()
+                yield text
+        finally:
+            pdf.close()
+
+
+class PdfminerBackend(PdfBackend):
+    """pdfminer.six: slow, but its own parser and layout analysis often read files the others reject.
+
+    It parses lazily, so opening the file is part of the first page's page_extract (no pdf_open stage).
+    """
+
+    name = "pdfminer"
+    module = "pdfminer"
+
+    def iter_pages(self, pdf_path: str, metrics=None) -> Iterator[str]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        layouts = extract_pages(pdf_path)
+        while True:
+            t0 = time.perf_counter()
+            layout = next(layouts, None)
+            if layout is None:
+                return
+            text = "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+            if metrics is not None:
+                metrics.observe("page_extract", time.perf_counter() - t0)
+            yield text
+
+
+BACKENDS = {cls.name: cls for cls in (PypdfBackend, PdfiumBackend, PdfminerBackend)}
+BACKEND_ORDER = ("pypdf", "pdfium", "pdfminer")
+
+_instances = {}
+
+
+def get_backend(name: str) -> PdfBackend:
+    if name not in _instances:
+        if name not in BACKENDS:
+            raise ValueError("unknown PDF backend %r (known: %s)" % (name, ", ".join(BACKENDS)))
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def available_backends(names=BACKEND_ORDER) -> List[str]:
+    """The installed backends among names, in order; ValueError for a name that is not a backend."""
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        raise ValueError("unknown PDF backend(s): %s (known: %s)" % (", ".join(unknown), ", ".join(BACKENDS)))
+    return [n for n in names if BACKENDS[n].available()]
+
+
+def capture_warnings(fn, *args):
+    """(fn(*args), [stderr lines]). pypdf reports unsupported encodings and broken xrefs on stderr."""
+    buf = io.StringIO()
+    with redirect_stderr(buf):
+        result = fn(*args)
+    return result, [line for line in buf.getvalue().splitlines() if line.strip()][:WARNINGS_KEPT]
+
+
+class Sandbox:
+    """A spawned worker process that runs calls one at a time, with a time limit per call and a cap on
+    its address space (RLIMIT_AS, set in the worker itself).
+
+    The worker is started on the first call and reused; it is killed, and restarted by the next call,
+    after a timeout, a crash or a MemoryError, so a backend stuck in C code or a runaway allocation
+    cannot outlive its call. Calls from a forked copy of the owning process start their own worker.
+    """
+
+    def __init__(self, max_mb: Optional[float] = None) -> None:
+        self.max_mb = max_mb
+        self._lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._owner = None
+
+    def _start(self) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_sandbox_main, args=(child, self.max_mb), name="pdf-sandbox", daemon=True)
+        self._proc.start()
+        child.close()
+        self._owner = os.getpid()
+
+    def stop(self) -> None:
+        if self._proc is not None and self._owner == os.getpid():
+            if self._proc.is_alive():
+                self._proc.kill()
+            self._proc.join()
+            self._conn.close()
+        self._proc = self._conn = self._owner = None
+
+    def call(self, fn, args: tuple, timeout: float):
+        """fn(*args) in the worker, raising SandboxError if it raises, crashes or hits a limit.
+
+        fn must be importable by module and name (it is pickled by reference), and args and the
+        result picklable.
+        """
+        with self._lock:
+            if self._owner != os.getpid():
+                self._proc = self._conn = None  # inherited through fork: the worker belongs to the parent
+            if self._proc is None or not self._proc.is_alive():
+                self.stop()
+                self._start()
+            try:
+                self._conn.send((fn, args))
+                if not self._conn.poll(timeout):
+                    raise SandboxError("timeout", "extraction timed out after %gs" % timeout)
+                try:
+                    status, value = self._conn.recv()
+                except EOFError:
+                    self._proc.join(1)
+                    raise SandboxError("crashed", "extraction process died (exit code %s)" % self._proc.exitcode)
+            except BaseException:
+                self.stop()
+                raise
+            if status == "ok":
+                return value
+            if status == "memory":
+                self.stop()
+            raise SandboxError(status, value)
+
+
+def _sandbox_main(conn, max_mb) -> None:
+    if max_mb and resource is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = int(max_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = ("ok", fn(*args))
+        except MemoryError:
+            reply = ("memory", "extraction ran out of memory" + (" (limit %d MB)" % max_mb if max_mb else ""))
+        except Exception as e:
+            reply = ("error", "%s: %s" % (type(e).__name__, e))
+        conn.send(reply)
+        if reply[0] == "memory":
+            return
+
+
+_sandboxes = {}
+
+
+def run_sandboxed(fn, args: tuple, timeout: float, max_mb: Optional[float] = None):
+    """fn(*args) in this process's Sandbox for max_mb (see Sandbox.call)."""
+    if max_mb not in _sandboxes:
+        _sandboxes[max_mb] = Sandbox(max_mb)
+    return _sandboxes[max_mb].call(fn, args, timeout)
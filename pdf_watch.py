@@ -0,0 +1,332 @@
+"""Watch PDF_FOLDER for new or rewritten PDFs and hand them to a bounded queue (extract_pdf_wells.py --watch).
+
+Known files are kept in a SQLite manifest (path, mtime, size, state), so a restart does not rediscover
+the whole folder. Each tick only rescans directories whose mtime changed (a file being added, removed or
+renamed changes its directory's mtime); with inotify_simple installed (Linux) kernel events say which
+directories and files changed, which also catches PDFs rewritten in place. Without inotify an in-place
+rewrite is picked up by the periodic full rescan.
+
+A file is queued once its (mtime, size) has not changed for `settle` seconds and it ends with a PDF
+%%EOF marker, so PDFs still being copied are not opened. Queue.put blocks when the consumer is behind, which pauses scanning (backpressure).
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+def _looks_complete(path: str) -> bool:
+    """True if the file ends with a PDF %%EOF marker (allowing trailing whitespace/garbage in the last 1 KB)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+class FolderManifest:
+    """SQLite table of every PDF seen, with the (mtime, size) its state refers to.
+
+    States: pending (seen, waiting to settle), queued (handed to the consumer), done, failed. `changed`
+    is 1 when the file was already known with other contents, so the consumer updates instead of inserting.
+    `sha256` is the content hash of the version last written to the DB; it is kept while a rewrite is
+    pending or queued, so the consumer can find the well that version produced. Pending and queued files
+    are picked up again after a restart.
+    """
+
+    def __init__(self, path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, mtime REAL, size INTEGER, state TEXT, changed INTEGER, updated REAL,
+                sha256 TEXT)"""
+        )
+        if "sha256" not in {row[1] for row in self._db.execute("PRAGMA table_info(files)")}:
+            self._db.execute("ALTER TABLE files ADD COLUMN sha256 TEXT")  # manifests from before sha256 was kept
+        self._db.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL)")
+        self._db.commit()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def get(self, path: str) -> Optional[tuple]:
+        """(mtime, size, state, changed) or None."""
+        with self._lock:
+            return self._db.execute("SELECT mtime, size, state, changed FROM files WHERE path = ?", (path,)).fetchone()
+
+    def sha256(self, path: str) -> Optional[str]:
+        """Content hash of the version of path last written to the DB, if recorded."""
+        with self._lock:
+            row = self._db.execute("SELECT sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def mark(self, path: str, mtime: float, size: int, state: str, changed: bool = False,
+             sha256: Optional[str] = None) -> None:
+        self.mark_many([(path, mtime, size, sha256)], state, changed)
+
+    def mark_many(self, rows: list, state: str, changed: bool = False) -> None:
+        """rows are (path, mtime, size) or (path, mtime, size, sha256); a missing sha256 keeps the recorded one."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                """INSERT INTO files VALUES (?,?,?,?,?,?,?) ON CONFLICT(path) DO UPDATE SET
+                   mtime = excluded.mtime, size = excluded.size, state = excluded.state,
+                   changed = excluded.changed, updated = excluded.updated,
+                   sha256 = COALESCE(excluded.sha256, sha256)""",
+                [(r[0], r[1], r[2], state, int(changed), now, r[3] if len(r) > 3 else None) for r in rows])
+            self._db.commit()
+
+    def files_in(self, directory: str) -> dict:
+        """{path: (mtime, size, state, changed)} recorded directly in directory."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, mtime, size, state, changed FROM files WHERE path > ? AND path < ?",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows if os.sep not in row[0][len(prefix):]}
+
+    def forget(self, paths) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+            self._db.commit()
+
+    def unfinished(self) -> list:
+        """[(path, mtime, size, state, changed)] left pending or queued by an earlier run."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT path, mtime, size, state, changed FROM files WHERE state IN ('pending', 'queued')"
+            ).fetchall()
+
+    def dirs(self) -> dict:
+        with self._lock:
+            return dict(self._db.execute("SELECT path, mtime FROM dirs").fetchall())
+
+    def set_dir(self, path: str, mtime: Optional[float]) -> None:
+        with self._lock:
+            if mtime is None:
+                self._db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?,?)", (path, mtime))
+            self._db.commit()
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM files GROUP BY state").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class FolderWatcher:
+    """Producer thread: finds new/changed *.pdf under root and puts (path, mtime, size, changed) on out_queue.
+
+    `changed` is True when the path was already in the manifest with a different (mtime, size).
+    """
+
+    def __init__(self, root, manifest: FolderManifest, out_queue: queue.Queue, settle: float = 2.0,
+                 interval: float = 1.0, full_rescan: float = 3600.0, use_inotify: bool = True) -> None:
+        self.root = str(Path(root).resolve())
+        self.manifest = manifest
+        self.queue = out_queue
+        self.settle = settle
+        self.interval = interval
+        self.full_rescan = full_rescan
+        self.stop_event = threading.Event()
+        self._pending = {}  # path -> (mtime, size, changed, stable_since)
+        self._inotify = None
+        self._watch_dirs = {}
+        if use_inotify and inotify_simple is not None:
+            try:
+                self._inotify = inotify_simple.INotify()
+            except OSError:
+                self._inotify = None
+        self._thread = threading.Thread(target=self._run, name="pdf-watch", daemon=True)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def seed(self, is_known) -> int:
+        """First start (empty manifest): record every PDF already present. Those for which is_known(path)
+        is true (already in the DB) are marked done; the rest are left for the first scan to queue."""
+        rows = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.lower().endswith(".pdf") and is_known(path):
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    rows.append((path, st.st_mtime, st.st_size))
+        self.manifest.mark_many(rows, "done")
+        return len(rows)
+
+    def _put(self, item) -> bool:
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _add_watch(self, path: str) -> None:
+        if self._inotify is None or path in self._watch_dirs.values():
+            return
+        flags = inotify_simple.flags
+        try:
+            wd = self._inotify.add_watch(path, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+                                         | flags.MOVED_FROM | flags.DELETE_SELF)
+        except OSError:
+            return
+        self._watch_dirs[wd] = path
+
+    def _scan_dir(self, path: str, known_dirs: dict) -> None:
+        try:
+            st = os.stat(path)
+            entries = list(os.scandir(path))
+        except OSError:
+            known_dirs.pop(path, None)
+            self.manifest.set_dir(path, None)
+            return
+        known_dirs[path] = st.st_mtime
+        self.manifest.set_dir(path, st.st_mtime)
+        self._add_watch(path)
+        recorded = self.manifest.files_in(path)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.path not in known_dirs:
+                    known_dirs[entry.path] = None
+                    self._scan_dir(entry.path, known_dirs)
+            elif entry.name.lower().endswith(".pdf"):
+                self._consider(entry.path, recorded.pop(entry.path, None))
+        # Files gone from the folder are dropped from the manifest; their DB rows are left alone.
+        gone = [p for p in recorded if p not in self._pending]
+        if gone:
+            self.manifest.forget(gone)
+
+    def _consider(self, path: str, recorded) -> None:
+        """Start (or restart) the settle timer for path unless the manifest already has these contents."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return
+        if recorded is not None and recorded[:2] == (st.st_mtime, st.st_size) and recorded[2] != "pending":
+            return
+        prev = self._pending.get(path)
+        if prev is not None and prev[:2] == (st.st_mtime, st.st_size):
+            return
+        if prev is not None:
+            changed = prev[2]
+        elif recorded is not None and recorded[2] == "pending":
+            changed = bool(recorded[3])
+        else:
+            changed = recorded is not None
+        self._pending[path] = (st.st_mtime, st.st_size, changed, time.monotonic())
+        self.manifest.mark(path, st.st_mtime, st.st_size, "pending", changed)
+
+    def _settled(self) -> None:
+        now = time.monotonic()
+        for path, (mtime, size, changed, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (st.st_mtime, st.st_size) != (mtime, size):
+                self._pending[path] = (st.st_mtime, st.st_size, changed, now)
+            elif now - since >= self.settle and _looks_complete(path):
+                del self._pending[path]
+                self.manifest.mark(path, mtime, size, "queued", changed)
+                if not self._put((path, mtime, size, changed)):
+                    return
+
+    def _changed_dirs(self, known_dirs: dict, full: bool) -> list:
+        if full:
+            return list(known_dirs)
+        out = []
+        for path, mtime in known_dirs.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    out.append(path)
+            except OSError:
+                out.append(path)
+        return out
+
+    def _inotify_events(self) -> tuple:
+        """(dirs to rescan, files touched) from kernel events, waiting up to `interval`."""
+        dirs, files = set(), set()
+        for event in self._inotify.read(timeout=int(self.interval * 1000)):
+            base = self._watch_dirs.get(event.wd)
+            if base is None:
+                continue
+            if event.mask & inotify_simple.flags.DELETE_SELF:
+                self._watch_dirs.pop(event.wd, None)
+                self.manifest.set_dir(base, None)
+                continue
+            path = os.path.join(base, event.name) if event.name else base
+            if event.mask & inotify_simple.flags.ISDIR or not event.name.lower().endswith(".pdf"):
+                dirs.add(base)
+            elif event.mask & inotify_simple.flags.CLOSE_WRITE:
+                files.add(path)
+            else:
+                dirs.add(base)
+        return dirs, files
+
+    def _run(self) -> None:
+        for path, mtime, size, state, changed in self.manifest.unfinished():
+            if state == "pending":
+                self._pending[path] = (mtime, size, bool(changed), time.monotonic())
+            elif os.path.exists(path) and not self._put((path, mtime, size, bool(changed))):
+                return
+        known_dirs = self.manifest.dirs()
+        if self.root not in known_dirs:
+            known_dirs[self.root] = None
+        for path in known_dirs:
+            self._add_watch(path)
+        last_full = time.monotonic()
+        first = True
+        while not self.stop_event.is_set():
+            touched = set()
+            if self._inotify is not None and not first:
+                dirs, touched = self._inotify_events()
+            else:
+                # Directories changed while we were not running are found by their mtime, as in polling.
+                full = self._inotify is None and time.monotonic() - last_full >= self.full_rescan
+                if full:
+                    last_full = time.monotonic()
+                dirs = self._changed_dirs(known_dirs, full)
+            first = False
+            for path in dirs:
+                self._scan_dir(path, known_dirs)
+            for path in touched:
+                self._consider(path, self.manifest.get(path))
+            self._settled()
+            if self._inotify is None:
+                self.stop_event.wait(self.interval)
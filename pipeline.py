@@ -0,0 +1,252 @@
+"""Extract and scrape in one run: each well is handed to the scraper as soon as its row is committed.
+
+    python pipeline.py [--extract-workers N] [--scrape-workers N] [--batch-size N] [--scrape-queue N]
+                       [--rate R] [--burst B] [--no-cache] [--no-http-cache] [--no-index] [--metrics FILE]
+                       [--stream-pages] [--backends pypdf,pdfium] [--extract-timeout S] [--max-rss-mb MB]
+
+Run separately, scraper_wells.py can only start once extract_pdf_wells.py has finished the whole folder.
+Here the two overlap:
+
+    PDF_FOLDER -> hash + dedupe -> extraction pool (processes) -> wells writer
+        -> scrape queue -> scraper threads (HTTP) -> result queue -> scraped_wells writer
+
+The extraction pool keeps at most extract-workers * 4 PDFs in flight; both queues hold at most
+--scrape-queue wells, and a full queue blocks the stage feeding it, so a slow scraper holds back
+extraction instead of piling up wells in memory. Wells already in the DB without a scraped_wells row are
+queued first, so scraping starts right away. The two writers use separate connections. Wall time
+approaches max(extract, scrape) instead of their sum.
+
+There is no --resume journal: a re-run skips PDFs already in wells (by content hash) and scrapes every
+well that still has no scraped_wells row.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import mysql.connector
+import requests
+
+import extract_pdf_wells as extract
+import scraper_wells as scraper
+from run_metrics import METRICS, BufferedLog
+
+
+class ScrapeStage:
+    """Scraper threads fed by put(), plus one thread that writes their results to scraped_wells.
+
+    Wells are scraped at most once per run, and wells in already_scraped not at all. The writer opens its
+    own connection with connect().
+    """
+
+    def __init__(self, connect, session, workers: int, queue_size: int, already_scraped: set) -> None:
+        self.connect = connect
+        self.session = session
+        self.todo = queue.Queue(maxsize=max(1, queue_size))
+        self.results = queue.Queue(maxsize=max(1, queue_size))
+        self.counts = {"queued": 0, "inserted": 0, "errors": 0}
+        self.finished_at = None
+        self._stopping = False
+        self._seen = set(already_scraped)
+        self._lock = threading.Lock()
+        self._scrapers = [threading.Thread(target=self._scrape, name="scrape-%d" % i, daemon=True)
+                          for i in range(max(1, workers))]
+        self._writer = threading.Thread(target=self._write, name="scrape-writer", daemon=True)
+        self._feeder = None
+
+    def start(self, backlog: list) -> None:
+        """Start the threads; backlog (load_wells_from_db dicts) is queued from its own thread."""
+        for t in self._scrapers:
+            t.start()
+        self._writer.start()
+        self._feeder = threading.Thread(target=lambda: [self.put(w) for w in backlog], name="scrape-feed",
+                                        daemon=True)
+        self._feeder.start()
+
+    def put(self, well: dict) -> None:
+        """Queue {"well_id", "name", "api"} for scraping; blocks while the queue is full."""
+        with self._lock:
+            if self._stopping or well["well_id"] in self._seen:
+                return
+            self._seen.add(well["well_id"])
+            self.counts["queued"] += 1
+        with METRICS.time("pipeline_scrape_queue_wait"):
+            self.todo.put(well)
+
+    def put_extracted(self, results: list) -> None:
+        """on_commit callback for extract_pdf_wells.flush_batch."""
+        for parsed in results:
+            values = extract.well_row_values(parsed["well"], parsed["source_pdf"])
+            self.put({"well_id": parsed["well_id"], "name": values[1], "api": scraper._norm_api(values[0])})
+
+    def _scrape(self) -> None:
+        while True:
+            well = self.todo.get()
+            if well is None:
+                return
+            try:
+                self.results.put((scraper.scrape_one(self.session, well), None))
+            except Exception as e:
+                self.results.put((well, e))
+
+    def _write(self) -> None:
+        conn = cursor = None
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+        except Exception as e:
+            # Keep draining so the scraper threads (and through them extraction) never block on us.
+            scraper._log_error("scraped_wells writer could not connect: %s" % e)
+        while True:
+            item = self.results.get()
+            if item is None:
+                break
+            well, err = item
+            if err is None and cursor is not None:
+                try:
+                    scraper.save_scraped(conn, cursor, well)
+                    self.counts["inserted"] += 1
+                    continue
+                except Exception as e:
+                    err = e
+            self.counts["errors"] += 1
+            scraper._log_error("Well well_id=%s: %s" % (well.get("well_id"), err or "no DB connection"))
+            if cursor is not None:
+                scraper.record_failure(conn, cursor, well.get("well_id"), err)
+        if conn is not None:
+            cursor.close()
+            conn.close()
+        self.finished_at = time.perf_counter()
+
+    def close(self, wait: bool = True) -> None:
+        """Let the queued wells finish (or, with wait=False, drop them) and stop the threads."""
+        if wait:
+            self._feeder.join()
+        else:
+            self._stopping = True
+            while True:
+                try:
+                    self.todo.get_nowait()
+                except queue.Empty:
+                    break
+        for _ in self._scrapers:
+            self.todo.put(None)
+        for t in self._scrapers:
+            t.join()
+        self.results.put(None)
+        self._writer.join()
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main() -> None:
+    try:
+        extract_workers = max(1, int(_arg_value("--extract-workers", os.cpu_count() or 1)))
+        scrape_workers = max(1, int(_arg_value("--scrape-workers", 4)))
+        batch_size = max(1, int(_arg_value("--batch-size", 25)))
+        queue_size = max(1, int(_arg_value("--scrape-queue", 100)))
+        rate = _arg_value("--rate", 5.0 if scrape_workers > 1 else None)
+        rate = float(rate) if rate is not None else None
+        burst = float(_arg_value("--burst", max(1, scrape_workers // 2)))
+    except ValueError:
+        print("--extract-workers, --scrape-workers, --batch-size, --scrape-queue, --rate and --burst expect numbers",
+              file=sys.stderr)
+        sys.exit(2)
+    script_dir = Path(__file__).resolve().parent
+    script_dir.joinpath("temp").mkdir(parents=True, exist_ok=True)
+    cfg = extract.load_config()
+    pdf_folder = Path(getattr(cfg, "PDF_FOLDER", "."))
+    if not pdf_folder.is_absolute():
+        pdf_folder = script_dir / pdf_folder
+    pdfs = sorted(pdf_folder.glob("**/*.pdf"))
+    keys = [p.relative_to(pdf_folder).as_posix() for p in pdfs]
+    try:
+        extract.configure_from_config(cfg, script_dir, use_cache="--no-cache" not in sys.argv,
+                                      stream_pages="--stream-pages" in sys.argv, backends=_arg_value("--backends"),
+                                      extract_timeout=_arg_value("--extract-timeout"),
+                                      max_rss_mb=_arg_value("--max-rss-mb"))
+    except ValueError as e:
+        print(f"Extraction settings: {e}", file=sys.stderr)
+        sys.exit(2)
+    if not scraper.configure_from_config(cfg, _arg_value("--base-url"), _arg_value("--html-parser")):
+        sys.exit(2)
+
+    metrics_path = _arg_value("--metrics") or getattr(cfg, "METRICS_EXPORT", None)
+    started = time.perf_counter()
+    log_path = script_dir / "extract_wells.log"
+    if "--no-index" not in sys.argv:
+        scraper.URL_INDEX = scraper.open_index(cfg, script_dir)
+    extract.LOG_FILE = BufferedLog(open(log_path, "a", encoding="utf-8"))
+    scraper.LOG_FILE = BufferedLog(open(script_dir / "scraper_wells.log", "a", encoding="utf-8"))
+    for log in (extract.LOG_FILE, scraper.LOG_FILE):
+        log.write(f"\n--- Pipeline run started {datetime.now().isoformat()} ---\n")
+    stage = conn = None
+    try:
+        try:
+            session = scraper.open_session(cfg, script_dir, scrape_workers, rate, burst,
+                                           int(getattr(cfg, "HTTP_RETRIES", 4)),
+                                           use_cache="--no-http-cache" not in sys.argv)
+        except requests.RequestException as e:
+            scraper._log_error("Session init: " + str(e))
+            sys.exit(1)
+        conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
+        cursor = conn.cursor()
+        cursor.execute("SELECT well_id FROM scraped_wells")
+        already_scraped = {row[0] for row in cursor.fetchall()}
+        with METRICS.time("db_load_wells"):
+            backlog = scraper.load_wells_from_db(cursor, unscraped_only=True)
+        cursor.close()
+        stage = ScrapeStage(lambda: mysql.connector.connect(**cfg.MYSQL_CONFIG), session, scrape_workers, queue_size, already_scraped)
+        stage.start(backlog)
+        print(f"Pipeline: {len(pdfs)} PDFs, {len(backlog)} wells waiting to be scraped "
+              f"({extract_workers} extract workers, {scrape_workers} scrape workers)")
+        counts = extract.extract_all(conn, pdfs, keys, extract_workers, str(log_path), batch_size, batch_size,
+                                     on_commit=stage.put_extracted)
+        extract_seconds = time.perf_counter() - started
+        conn.close()
+        conn = None
+        stage.close()
+        session.close()
+        wall = time.perf_counter() - started
+        print(f"Extract: {len(pdfs)} PDFs, {counts['duplicates']} duplicates, {counts['failed']} failed "
+              f"({extract_seconds:.1f} s)")
+        print("Scrape: " + ", ".join(f"{k}: {v}" for k, v in stage.counts.items())
+              + f" ({stage.finished_at - started:.1f} s)")
+        print(f"Wall time {wall:.1f} s")
+    except KeyboardInterrupt:
+        print("\nStopping; run again to pick up the remaining PDFs and wells.")
+        if stage is not None:
+            stage.close(wait=False)
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        wall = time.perf_counter() - started
+        report = METRICS.report(wall)
+        if report:
+            print("\n" + report)
+            extract.LOG_FILE.write(f"{datetime.now().isoformat()} [METRICS]\n{report}\n")
+        if metrics_path:
+            METRICS.export(metrics_path, "pipeline", wall)
+        for module in (extract, scraper):
+            module.LOG_FILE.close()
+            module.LOG_FILE = None
+        if scraper.URL_INDEX is not None:
+            scraper.URL_INDEX.close()
+            scraper.URL_INDEX = None
+
+
+if __name__ == "__main__":
+    main()
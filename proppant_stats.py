@@ -0,0 +1,305 @@
+"""Proppant rows as a table, and per operator / formation / month totals kept up to date as they are written.
+
+`stimulations.proppant_details` keeps the JSON list as parsed; `stimulation_proppants` holds the same
+rows one per (stimulation, proppant type), and `proppant_summary` holds, per operator, formation,
+month of `date_stimulated` and proppant type, the number of stimulations and total lbs. The writers in
+extract_pdf_wells.py call add_proppants after inserting stimulations (sync_proppants after a re-parse)
+and drop_proppants before changing or deleting one, so the summary moves by deltas instead of being
+recomputed.
+
+    python proppant_stats.py --backfill [--batch-size 1000]   # child rows for existing stimulations
+    python proppant_stats.py --rebuild                        # recompute proppant_summary from scratch
+    python proppant_stats.py --types                          # proppant types with their totals
+    python proppant_stats.py --totals "100 Mesh White" --by operator,year [--operator X] [--formation Y] [--year 2014]
+"""
+import json
+import re
+import sys
+from typing import List, Optional
+
+BACKFILL_BATCH = 1000
+PROPPANT_TYPE_MAX = 64
+SUMMARY_KEY_MAX = {"operator": 255, "formation": 64}
+
+# proppant_totals group-by names -> proppant_summary expressions
+GROUP_COLUMNS = {
+    "operator": "operator",
+    "formation": "formation",
+    "year": "SUBSTR(month, 1, 4)",
+    "month": "month",
+    "proppant_type": "proppant_type",
+}
+
+PROPPANT_INSERT = "INSERT INTO stimulation_proppants (stimulation_id, well_id, proppant_type, lbs) VALUES (%s,%s,%s,%s)"
+SUMMARY_UPSERT = """INSERT INTO proppant_summary (operator, formation, month, proppant_type, stimulations, total_lbs)
+    VALUES (%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE stimulations = stimulations + VALUES(stimulations), total_lbs = total_lbs + VALUES(total_lbs)"""
+
+# Stimulations (with their well's operator) and their proppant_details; callers add WHERE conditions.
+_STIM_SELECT = """SELECT s.stimulation_id, s.well_id, w.operator, s.stimulated_formation, s.date_stimulated,
+    s.proppant_details FROM stimulations s JOIN wells w ON w.well_id = s.well_id"""
+
+
+def proppant_type_key(ptype) -> Optional[str]:
+    """Whitespace collapsed and cut to the column width, so "100 Mesh  White" and "100 Mesh White" agree."""
+    s = re.sub(r"\s+", " ", str(ptype or "")).strip()
+    return s[:PROPPANT_TYPE_MAX] or None
+
+
+def summary_key(operator, formation, date_stimulated) -> tuple:
+    """(operator, formation, "YYYY-MM") with "" for anything unknown."""
+    month = str(date_stimulated)[:7] if date_stimulated else ""
+    return (str(operator or "").strip()[:SUMMARY_KEY_MAX["operator"]],
+            str(formation or "").strip()[:SUMMARY_KEY_MAX["formation"]], month)
+
+
+def parse_details(proppant_details) -> List[tuple]:
+    """[(proppant_type, lbs)] from a proppant_details JSON string, one per type (first one wins)."""
+    if not proppant_details:
+        return []
+    try:
+        items = json.loads(proppant_details)
+    except (TypeError, ValueError):
+        return []
+    out, seen = [], set()
+    for item in items if isinstance(items, list) else []:
+        ptype = proppant_type_key(item.get("proppant_type")) if isinstance(item, dict) else None
+        if ptype is None or ptype.lower() in seen:
+            continue
+        seen.add(ptype.lower())
+        lbs = item.get("lbs")
+        out.append((ptype, lbs if isinstance(lbs, int) else None))
+    return out
+
+
+def _apply_deltas(cursor, deltas: dict) -> None:
+    """Add {(operator, formation, month, proppant_type): [stimulations, lbs]} to proppant_summary."""
+    rows = [key + (n, lbs) for key, (n, lbs) in deltas.items() if n or lbs]
+    if not rows:
+        return
+    cursor.executemany(SUMMARY_UPSERT, rows)
+    if any(n < 0 for _, _, _, _, n, _ in rows):
+        cursor.execute("DELETE FROM proppant_summary WHERE stimulations <= 0")
+
+
+def _add_stimulations(cursor, stims: list) -> int:
+    """Child rows and summary deltas for _STIM_SELECT rows that have no child rows yet."""
+    children, deltas = [], {}
+    for stimulation_id, well_id, operator, formation, date_stimulated, details in stims:
+        key = summary_key(operator, formation, date_stimulated)
+        for ptype, lbs in parse_details(details):
+            children.append((stimulation_id, well_id, ptype, lbs))
+            d = deltas.setdefault(key + (ptype,), [0, 0])
+            d[0] += 1
+            d[1] += lbs or 0
+    if children:
+        cursor.executemany(PROPPANT_INSERT, children)
+        _apply_deltas(cursor, deltas)
+    return len(children)
+
+
+def add_proppants(cursor, stim_rows: list) -> int:
+    """Child rows (and summary deltas) for stimulations just inserted, from their STIM_INSERT parameters
+    (well_id first, date_stimulated and stimulated_formation next, proppant_details last) rather than
+    from the stored rows. Returns the number of rows written.
+
+    Each well's new stimulations are its last ones by stimulation_id, so a single SELECT of the wells'
+    stimulation ids (and operators) pairs them with stim_rows in order.
+    """
+    well_ids = sorted({row[0] for row in stim_rows if row[-1]})
+    if not well_ids:
+        return 0
+    cursor.execute(
+        f"""SELECT s.stimulation_id, s.well_id, w.operator FROM stimulations s JOIN wells w ON w.well_id = s.well_id
+            WHERE s.well_id IN ({','.join(['%s'] * len(well_ids))}) ORDER BY s.stimulation_id""",
+        well_ids,
+    )
+    stored, operators = {}, {}
+    for stimulation_id, well_id, operator in cursor.fetchall():
+        stored.setdefault(well_id, []).append(stimulation_id)
+        operators[well_id] = operator
+    new = {}
+    for row in stim_rows:
+        new.setdefault(row[0], []).append(row)
+    stims = []
+    for well_id in well_ids:
+        rows = new[well_id]
+        ids = stored.get(well_id, [])[-len(rows):]
+        stims.extend((stimulation_id, well_id, operators.get(well_id), row[2], row[1], row[-1])
+                     for stimulation_id, row in zip(ids, rows) if row[-1])
+    return _add_stimulations(cursor, stims)
+
+
+def sync_proppants(cursor, well_ids: list) -> int:
+    """Write child rows (and add them to the summary) for the wells' stimulations that have
+    proppant_details but no stimulation_proppants rows yet. Returns the number of rows written."""
+    well_ids = sorted(set(well_ids))
+    if not well_ids:
+        return 0
+    cursor.execute(
+        f"""{_STIM_SELECT} LEFT JOIN stimulation_proppants p ON p.stimulation_id = s.stimulation_id
+            WHERE s.well_id IN ({','.join(['%s'] * len(well_ids))}) AND s.proppant_details IS NOT NULL
+            AND p.stimulation_id IS NULL""",
+        well_ids,
+    )
+    return _add_stimulations(cursor, cursor.fetchall())
+
+
+def drop_proppants(cursor, stimulation_ids: list = (), well_ids: list = ()) -> None:
+    """Take stimulations (by id, or every one of the wells) out of the summary and delete their child rows.
+
+    Call it before changing a stimulation's date, formation or proppant, its well's operator, or
+    deleting it, so the subtracted totals are the ones that were added; sync_proppants adds them back.
+    """
+    for column, ids in (("s.stimulation_id", sorted(set(stimulation_ids))), ("s.well_id", sorted(set(well_ids)))):
+        if not ids:
+            continue
+        cursor.execute(
+            f"""SELECT w.operator, s.stimulated_formation, s.date_stimulated, p.proppant_type, p.lbs, s.stimulation_id
+                FROM stimulation_proppants p JOIN stimulations s ON s.stimulation_id = p.stimulation_id
+                JOIN wells w ON w.well_id = s.well_id WHERE {column} IN ({','.join(['%s'] * len(ids))})""",
+            ids,
+        )
+        deltas, doomed = {}, set()
+        for operator, formation, date_stimulated, ptype, lbs, stimulation_id in cursor.fetchall():
+            d = deltas.setdefault(summary_key(operator, formation, date_stimulated) + (ptype,), [0, 0])
+            d[0] -= 1
+            d[1] -= lbs or 0
+            doomed.add(stimulation_id)
+        if doomed:
+            doomed = sorted(doomed)
+            cursor.execute(
+                f"DELETE FROM stimulation_proppants WHERE stimulation_id IN ({','.join(['%s'] * len(doomed))})", doomed)
+            _apply_deltas(cursor, deltas)
+
+
+def backfill_proppants(conn, batch_size: int = BACKFILL_BATCH) -> dict:
+    """Child rows for stimulations stored before stimulation_proppants existed, one commit per batch.
+
+    Stimulations are walked in id order, so a batch that adds nothing is not fetched again.
+    """
+    cursor = conn.cursor()
+    counts = {"stimulations": 0, "rows": 0}
+    last = 0
+    while True:
+        cursor.execute(
+            f"""{_STIM_SELECT} LEFT JOIN stimulation_proppants p ON p.stimulation_id = s.stimulation_id
+                WHERE s.stimulation_id > %s AND s.proppant_details IS NOT NULL AND p.stimulation_id IS NULL
+                ORDER BY s.stimulation_id LIMIT %s""",
+            (last, int(batch_size)),
+        )
+        stims = cursor.fetchall()
+        if not stims:
+            break
+        counts["rows"] += _add_stimulations(cursor, stims)
+        conn.commit()
+        counts["stimulations"] += len(stims)
+        last = stims[-1][0]
+        print(f"  {counts['stimulations']} stimulations, {counts['rows']} proppant rows", flush=True)
+    cursor.close()
+    return counts
+
+
+def rebuild_summary(conn) -> int:
+    """Recompute proppant_summary from stimulation_proppants (after manual edits, or to check the deltas)."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT w.operator, s.stimulated_formation, s.date_stimulated, p.proppant_type, COUNT(*), SUM(p.lbs)
+           FROM stimulation_proppants p JOIN stimulations s ON s.stimulation_id = p.stimulation_id
+           JOIN wells w ON w.well_id = s.well_id
+           GROUP BY w.operator, s.stimulated_formation, s.date_stimulated, p.proppant_type"""
+    )
+    deltas = {}
+    for operator, formation, date_stimulated, ptype, n, lbs in cursor.fetchall():
+        d = deltas.setdefault(summary_key(operator, formation, date_stimulated) + (ptype,), [0, 0])
+        d[0] += n
+        d[1] += int(lbs or 0)
+    cursor.execute("DELETE FROM proppant_summary")
+    _apply_deltas(cursor, deltas)
+    conn.commit()
+    cursor.close()
+    return len(deltas)
+
+
+def proppant_totals(cursor, proppant_type: Optional[str] = None, by=("operator",), operator: Optional[str] = None,
+                    formation: Optional[str] = None, year=None, limit: int = 1000) -> List[tuple]:
+    """[(*group values, stimulations, total_lbs)] from proppant_summary, largest total first.
+
+    `by` picks the grouping from GROUP_COLUMNS ("operator", "formation", "year", "month", "proppant_type");
+    an empty `by` gives one grand-total row. Filters match exactly (year as "2014").
+    """
+    unknown = [b for b in by if b not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError("cannot group by %s (use %s)" % (", ".join(unknown), ", ".join(GROUP_COLUMNS)))
+    where, params = [], []
+    for expr, value in (("proppant_type", proppant_type_key(proppant_type) if proppant_type else None),
+                        ("operator", operator), ("formation", formation)):
+        if value is not None:
+            where.append(expr + " = %s")
+            params.append(value)
+    if year is not None:
+        where.append("month LIKE %s")
+        params.append("%s-%%" % year)
+    groups = [GROUP_COLUMNS[b] for b in by]
+    cursor.execute(
+        f"""SELECT {''.join(g + ', ' for g in groups)}SUM(stimulations), SUM(total_lbs) FROM proppant_summary
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            {'GROUP BY ' + ', '.join(groups) if groups else ''} ORDER BY {len(groups) + 2} DESC LIMIT %s""",
+        params + [int(limit)],
+    )
+    return [tuple(row[:-2]) + (int(row[-2] or 0), int(row[-1] or 0)) for row in cursor.fetchall()]
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main() -> None:
+    from extract_pdf_wells import load_config
+    import mysql.connector
+
+    cfg = load_config()
+    mysql_cfg = getattr(cfg, "MYSQL_CONFIG", None)
+    if not mysql_cfg:
+        print("Set MYSQL_CONFIG in config.py.", file=sys.stderr)
+        sys.exit(1)
+    conn = mysql.connector.connect(**mysql_cfg)
+    try:
+        if "--backfill" in sys.argv:
+            counts = backfill_proppants(conn, int(_arg_value("--batch-size", BACKFILL_BATCH)))
+            print(f"Backfill: {counts['rows']} proppant rows for {counts['stimulations']} stimulations")
+            if counts["rows"]:
+                print(f"Summary rebuilt: {rebuild_summary(conn)} rows")
+            return
+        if "--rebuild" in sys.argv:
+            print(f"Summary rebuilt: {rebuild_summary(conn)} rows")
+            return
+        cursor = conn.cursor()
+        if "--types" in sys.argv:
+            rows = proppant_totals(cursor, by=("proppant_type",))
+        elif "--totals" in sys.argv:
+            by = [b.strip() for b in _arg_value("--by", "operator").split(",") if b.strip()]
+            try:
+                rows = proppant_totals(cursor, _arg_value("--totals"), by, _arg_value("--operator"),
+                                       _arg_value("--formation"), _arg_value("--year"))
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                sys.exit(2)
+        else:
+            print(__doc__.strip().split("\n\n", 2)[2])
+            sys.exit(1)
+        for row in rows:
+            print("  ".join("%-40s" % (v or "(unknown)")[:40] for v in row[:-2]) + "%8d stims %16d lbs" % row[-2:])
+        print(f"{len(rows)} row(s)")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
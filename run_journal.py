@@ -0,0 +1,122 @@
+"""Append-only run journal shared by extract_pdf_wells.py and scraper_wells.py.
+
+One JSON object per line, e.g. {"t": 1700000000.0, "key": "W28190.pdf", "state": "done", "elapsed": 1.2}.
+States: pending -> in_flight -> done | failed. A new run truncates the file and lists every item as
+pending; --resume replays it and hands back only the items that still need work, so a restart does
+not rescan the folder or re-query per item. A truncated last line (crash mid-write) is ignored.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class RunJournal:
+    """Per-item progress for one entry point. Thread-safe; every record is flushed as it is written
+    and sync() fsyncs (call it after each DB commit).
+
+    On resume an unfinished item is retried at most `max_retries` times: it is given up once it has been
+    started max_retries + 1 times. A start that never finished (crash, Ctrl-C) counts as an attempt.
+    """
+
+    def __init__(self, path, max_retries: int = 3) -> None:
+        self.path = Path(path)
+        self.max_retries = max(0, int(max_retries))
+        self.items = {}
+        self._started = {}
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def _write(self, record: dict) -> None:
+        record["t"] = round(time.time(), 3)
+        self._fh.write(json.dumps(record, default=str) + "\n")
+        self._fh.flush()
+
+    def start(self, items: List[Tuple[str, object]]) -> None:
+        """Begin a fresh run over items [(key, meta)]; meta is whatever the caller needs to resume."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "w", encoding="utf-8")
+        self.items = {}
+        self._write({"state": "run", "items": len(items)})
+        for key, meta in items:
+            self.items[key] = {"state": "pending", "attempts": 0, "meta": meta}
+            self._write({"key": key, "state": "pending", "meta": meta})
+        self.sync()
+
+    def resume(self) -> Optional[List[Tuple[str, object]]]:
+        """Replay the journal and return [(key, meta)] still to do, in original order; None if there is none."""
+        if not self.path.exists():
+            return None
+        self.items = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                key = rec.get("key")
+                if key is None:
+                    continue
+                item = self.items.setdefault(key, {"state": "pending", "attempts": 0, "meta": None})
+                if "meta" in rec:
+                    item["meta"] = rec["meta"]
+                if rec["state"] == "in_flight":
+                    item["attempts"] += 1
+                item["state"] = rec["state"]
+        self._fh = open(self.path, "a", encoding="utf-8")
+        remaining = [
+            (key, item["meta"]) for key, item in self.items.items()
+            if item["state"] != "done" and item["attempts"] <= self.max_retries
+        ]
+        self._write({"state": "resume", "remaining": len(remaining)})
+        return remaining
+
+    def begin(self, key: str) -> None:
+        with self._lock:
+            self._started[key] = time.monotonic()
+            self._set(key, "in_flight")
+            self.items[key]["attempts"] += 1
+
+    def done(self, key: str) -> None:
+        with self._lock:
+            self._set(key, "done", elapsed=self._elapsed(key))
+
+    def failed(self, key: str, error) -> None:
+        with self._lock:
+            self._set(key, "failed", elapsed=self._elapsed(key), error=str(error)[:200])
+
+    def _elapsed(self, key: str) -> Optional[float]:
+        started = self._started.pop(key, None)
+        return round(time.monotonic() - started, 3) if started is not None else None
+
+    def _set(self, key: str, state: str, **extra) -> None:
+        item = self.items.setdefault(key, {"state": "pending", "attempts": 0, "meta": None})
+        item["state"] = state
+        self._write({"key": key, "state": state, **{k: v for k, v in extra.items() if v is not None}})
+
+    def state(self, key: str) -> Optional[str]:
+        item = self.items.get(key)
+        return item["state"] if item else None
+
+    def counts(self) -> dict:
+        out = {}
+        for item in self.items.values():
+            state = item["state"]
+            if state != "done" and item["attempts"] > self.max_retries:
+                state = "gave_up"
+            out[state] = out.get(state, 0) + 1
+        return out
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self.sync()
+            self._fh.close()
+            self._fh = None
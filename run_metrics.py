@@ -0,0 +1,188 @@
+"""Per-stage timing metrics and a buffered background log writer, shared by both entry points.
+
+    with METRICS.time("pdf_open"):
+        reader = PdfReader(path)
+    METRICS.count("text_cache_hit")
+    print(METRICS.report(wall_seconds))
+
+Timings are kept in memory (exact count / sum / max, percentiles from up to `max_samples` samples per
+stage) and reported at the end of a run; export() writes them as JSON or Prometheus text.
+"""
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Metrics:
+    """Thread-safe counters and per-stage duration histograms."""
+
+    def __init__(self, max_samples: int = 100000) -> None:
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    @contextmanager
+    def time(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            st = self._stages.get(stage)
+            if st is None:
+                st = self._stages[stage] = {"count": 0, "sum": 0.0, "max": 0.0, "samples": []}
+            st["count"] += 1
+            st["sum"] += seconds
+            if seconds > st["max"]:
+                st["max"] = seconds
+            if len(st["samples"]) < self.max_samples:
+                st["samples"].append(seconds)
+            else:
+                # Reservoir sampling keeps the percentiles unbiased once the buffer is full.
+                i = random.randrange(st["count"])
+                if i < self.max_samples:
+                    st["samples"][i] = seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def drain(self) -> dict:
+        """Return everything recorded so far and reset (used to ship worker-process metrics home)."""
+        with self._lock:
+            snap = {"stages": self._stages, "counters": self._counters}
+            self._stages, self._counters = {}, {}
+        return snap
+
+    def merge(self, snap) -> None:
+        if not snap:
+            return
+        for stage, other in snap["stages"].items():
+            for seconds in other["samples"]:
+                self.observe(stage, seconds)
+            with self._lock:
+                st = self._stages[stage]
+                st["count"] += other["count"] - len(other["samples"])
+                st["sum"] += other["sum"] - sum(other["samples"])
+                st["max"] = max(st["max"], other["max"])
+        for name, n in snap["counters"].items():
+            self.count(name, n)
+
+    def summary(self, wall_seconds: float = None) -> dict:
+        out = {"stages": {}, "counters": {}}
+        with self._lock:
+            for stage, st in sorted(self._stages.items()):
+                samples = sorted(st["samples"])
+
+                def pct(p):
+                    return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else 0.0
+
+                out["stages"][stage] = {
+                    "count": st["count"], "sum": st["sum"], "p50": pct(0.50), "p95": pct(0.95), "max": st["max"],
+                    "per_sec": st["count"] / wall_seconds if wall_seconds else None,
+                }
+            out["counters"] = dict(sorted(self._counters.items()))
+        if wall_seconds is not None:
+            out["wall_seconds"] = wall_seconds
+        return out
+
+    def report(self, wall_seconds: float = None) -> str:
+        s = self.summary(wall_seconds)
+        if not s["stages"] and not s["counters"]:
+            return ""
+        lines = ["%-26s %8s %10s %10s %10s %10s %9s" % ("stage", "count", "total s", "p50 ms", "p95 ms", "max ms", "per s")]
+        for stage, st in s["stages"].items():
+            lines.append("%-26s %8d %10.2f %10.2f %10.2f %10.2f %9s" % (
+                stage, st["count"], st["sum"], 1000 * st["p50"], 1000 * st["p95"], 1000 * st["max"],
+                "%.1f" % st["per_sec"] if st["per_sec"] is not None else "-"))
+        if s["counters"]:
+            lines.append("counters: " + ", ".join("%s=%s" % kv for kv in s["counters"].items()))
+        if wall_seconds is not None:
+            lines.append("wall time: %.2f s" % wall_seconds)
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str, wall_seconds: float = None) -> str:
+        s = self.summary(wall_seconds)
+        name = prefix + "_stage_seconds"
+        lines = ["# HELP %s Duration of each pipeline stage." % name, "# TYPE %s summary" % name]
+        for stage, st in s["stages"].items():
+            for q, key in ((0.5, "p50"), (0.95, "p95")):
+                lines.append('%s{stage="%s",quantile="%g"} %.6f' % (name, stage, q, st[key]))
+            lines.append('%s_sum{stage="%s"} %.6f' % (name, stage, st["sum"]))
+            lines.append('%s_count{stage="%s"} %d' % (name, stage, st["count"]))
+        lines.append("# TYPE %s_stage_seconds_max gauge" % prefix)
+        for stage, st in s["stages"].items():
+            lines.append('%s_stage_seconds_max{stage="%s"} %.6f' % (prefix, stage, st["max"]))
+        lines.append("# TYPE %s_events_total counter" % prefix)
+        for counter, n in s["counters"].items():
+            lines.append('%s_events_total{event="%s"} %d' % (prefix, counter, n))
+        if wall_seconds is not None:
+            lines.append("# TYPE %s_run_seconds gauge" % prefix)
+            lines.append("%s_run_seconds %.3f" % (prefix, wall_seconds))
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, prefix: str, wall_seconds: float = None) -> None:
+        """Write a .json summary, or Prometheus text format for any other suffix (e.g. .prom)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            path.write_text(json.dumps(self.summary(wall_seconds), indent=2), encoding="utf-8")
+        else:
+            path.write_text(self.to_prometheus(prefix, wall_seconds), encoding="utf-8")
+
+
+METRICS = Metrics()
+
+
+class BufferedLog:
+    """File-like log: write() only enqueues; a daemon thread writes in batches and flushes every
+    `interval` seconds. flush() is a no-op so callers can keep calling it per line; close() drains."""
+
+    def __init__(self, fh, interval: float = 0.5) -> None:
+        self._fh = fh
+        self._interval = interval
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        pass
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self._interval)
+            except queue.Empty:
+                self._fh.flush()
+                continue
+            lines = [item]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in lines
+            self._fh.write("".join(x for x in lines if x is not None))
+            if stop:
+                self._fh.flush()
+                return
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._fh.close()
@@ -13,12 +13,20 @@ CREATE TABLE IF NOT EXISTS wells (
     surface_hole_location MEDIUMTEXT,
     latitude VARCHAR(32),
     longitude VARCHAR(32),
+    lat_deg DOUBLE NULL COMMENT 'latitude in signed decimal degrees',
+    lon_deg DOUBLE NULL COMMENT 'longitude in signed decimal degrees',
+    geo_point POINT SRID 0 AS (POINT(IFNULL(lon_deg, 0), IFNULL(lat_deg, 0))) STORED NOT NULL,
     datum VARCHAR(32),
+    pdf_sha256 CHAR(64) NULL COMMENT 'SHA-256 of the source PDF bytes',
     source_pdf VARCHAR(512),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_api (api_number),
     INDEX idx_well_name (well_name(100)),
-    INDEX idx_operator (operator(100))
+    INDEX idx_operator (operator(100)),
+    INDEX idx_pdf_sha256 (pdf_sha256),
+    INDEX idx_updated (updated_at),
+    SPATIAL INDEX sp_geo_point (geo_point)
 );
 
 CREATE TABLE IF NOT EXISTS stimulations (
@@ -38,10 +46,43 @@ CREATE TABLE IF NOT EXISTS stimulations (
     max_treatment_rate_bbls_min DECIMAL(10, 2),
     proppant_details MEDIUMTEXT COMMENT 'JSON array: [{"proppant_type":"100 Mesh White","lbs":314040}, ...]',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (well_id) REFERENCES wells(well_id) ON DELETE CASCADE,
     INDEX idx_well (well_id),
     INDEX idx_formation (stimulated_formation(64)),
-    INDEX idx_date (date_stimulated)
+    INDEX idx_date (date_stimulated),
+    INDEX idx_updated (updated_at)
+);
+
+-- One row per proppant type of a stimulation (the rows of stimulations.proppant_details), written by
+-- extract_pdf_wells.py together with the stimulation. `python proppant_stats.py --backfill` fills it for
+-- stimulations stored before it existed.
+CREATE TABLE IF NOT EXISTS stimulation_proppants (
+    proppant_id INT AUTO_INCREMENT PRIMARY KEY,
+    stimulation_id INT NOT NULL,
+    well_id INT NOT NULL,
+    proppant_type VARCHAR(64) NOT NULL,
+    lbs BIGINT NULL,
+    FOREIGN KEY (stimulation_id) REFERENCES stimulations(stimulation_id) ON DELETE CASCADE,
+    INDEX idx_stimulation (stimulation_id),
+    INDEX idx_well (well_id),
+    INDEX idx_type (proppant_type)
+);
+
+-- Totals per operator (wells.operator), formation, month of date_stimulated ('YYYY-MM') and proppant type,
+-- with '' for unknown. Kept current by deltas on every write (see proppant_stats.py); `--rebuild`
+-- recomputes it.
+CREATE TABLE IF NOT EXISTS proppant_summary (
+    operator VARCHAR(255) NOT NULL,
+    formation VARCHAR(64) NOT NULL,
+    month CHAR(7) NOT NULL,
+    proppant_type VARCHAR(64) NOT NULL,
+    stimulations INT NOT NULL DEFAULT 0,
+    total_lbs BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (proppant_type, operator, formation, month),
+    INDEX idx_operator (operator),
+    INDEX idx_formation (formation),
+    INDEX idx_month (month)
 );
 
 
@@ -56,15 +97,57 @@ CREATE TABLE IF NOT EXISTS scraped_wells (
     county TEXT NULL,
     latitude VARCHAR(32) NULL,
     longitude VARCHAR(32) NULL,
+    lat_deg DOUBLE NULL COMMENT 'latitude in signed decimal degrees',
+    lon_deg DOUBLE NULL COMMENT 'longitude in signed decimal degrees',
+    geo_point POINT SRID 0 AS (POINT(IFNULL(lon_deg, 0), IFNULL(lat_deg, 0))) STORED NOT NULL,
     gas_mcf INT NULL,
     oil_bbl INT NULL,
     operator TEXT NULL,
     production_dates_on_file VARCHAR(255) NULL,
     well_status VARCHAR(64) NULL,
     well_type VARCHAR(64) NULL,
+    last_checked TIMESTAMP NULL COMMENT 'page last fetched (insert or --refresh), changed or not',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     UNIQUE KEY uk_well_id (well_id),
     INDEX idx_api (api_number),
     INDEX idx_well_name (well_name(100)),
+    INDEX idx_updated (updated_at),
+    INDEX idx_last_checked (last_checked),
+    SPATIAL INDEX sp_geo_point (geo_point),
     FOREIGN KEY (well_id) REFERENCES wells(well_id) ON DELETE SET NULL
 );
+
+-- Wells whose scrape failed (network error, 429/5xx after retries, offline cache miss); no scraped_wells
+-- row is written for them. `python scraper_wells.py --retry-failed` revisits only these.
+CREATE TABLE IF NOT EXISTS scrape_failures (
+    well_id INT PRIMARY KEY,
+    attempts INT NOT NULL DEFAULT 1,
+    last_error VARCHAR(255),
+    first_failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (well_id) REFERENCES wells(well_id) ON DELETE CASCADE
+);
+
+-- Decimal-degree coordinates (see well_geo.py). `latitude` / `longitude` keep the text as printed; wells
+-- without numeric coordinates get geo_point (0 0), which queries exclude with `lat_deg IS NOT NULL`.
+-- For tables created before these columns existed, run once and then `python well_geo.py --backfill`:
+-- ALTER TABLE wells ADD COLUMN lat_deg DOUBLE NULL AFTER longitude, ADD COLUMN lon_deg DOUBLE NULL AFTER lat_deg,
+--     ADD COLUMN geo_point POINT SRID 0 AS (POINT(IFNULL(lon_deg, 0), IFNULL(lat_deg, 0))) STORED NOT NULL AFTER lon_deg,
+--     ADD SPATIAL INDEX sp_geo_point (geo_point);
+-- ALTER TABLE scraped_wells ADD COLUMN lat_deg DOUBLE NULL AFTER longitude, ADD COLUMN lon_deg DOUBLE NULL AFTER lat_deg,
+--     ADD COLUMN geo_point POINT SRID 0 AS (POINT(IFNULL(lon_deg, 0), IFNULL(lat_deg, 0))) STORED NOT NULL AFTER lon_deg,
+--     ADD SPATIAL INDEX sp_geo_point (geo_point);
+
+-- updated_at drives the incremental map export (export_map.py). For tables created before it existed:
+-- ALTER TABLE wells ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, ADD INDEX idx_updated (updated_at);
+-- ALTER TABLE stimulations ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, ADD INDEX idx_updated (updated_at);
+-- ALTER TABLE scraped_wells ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, ADD INDEX idx_updated (updated_at);
+
+-- pdf_sha256 lets extract_pdf_wells.py skip PDFs by content instead of by file name. For tables created
+-- before it existed (rows left NULL are still matched by source_pdf; `--reparse` fills them in):
+-- ALTER TABLE wells ADD COLUMN pdf_sha256 CHAR(64) NULL AFTER datum, ADD INDEX idx_pdf_sha256 (pdf_sha256);
+
+-- last_checked orders `scraper_wells.py --refresh` (stalest first; NULL rows go first). For tables created
+-- before it existed:
+-- ALTER TABLE scraped_wells ADD COLUMN last_checked TIMESTAMP NULL AFTER well_type, ADD INDEX idx_last_checked (last_checked);
@@ -1,16 +1,35 @@
+import asyncio
+import email.utils
+import json
+import random
 import re
+import sqlite3
 import sys
-from datetime import datetime
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 import mysql.connector
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from run_journal import RunJournal
+from run_metrics import METRICS, BufferedLog
+from well_geo import normalize_coordinates
+from well_index import normalize_name, open_index, url_names
 
 DEBUG = True
 LOG_FILE = None
+JOURNAL = None  # RunJournal of the current run (temp/journal/scrape.jsonl); set in main
+URL_INDEX = None  # well_index.WellUrlIndex consulted before /search; set in main unless --no-index
 
 BASE = "https://www.drillingedge.com"
 HEADERS = {
@@ -22,6 +41,54 @@ VARCHAR_64 = 64
 VARCHAR_128 = 128
 VARCHAR_255 = 255
 
+try:
+    import lxml  # noqa: F401  (optional; much faster BeautifulSoup tree builder)
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Only these subtrees are built for a well page / search page; everything else is skipped while parsing.
+DETAIL_STRAINER = SoupStrainer(["section", "table", "p"], class_=["meta_info", "skinny", "block_stat"])
+_WELL_HREF = re.compile("/wells/")
+SEARCH_STRAINER = SoupStrainer("a", href=_WELL_HREF)
+
+# section.meta_info: the first label text contained in a div's label picks the field (later divs overwrite).
+META_LABELS = (
+    ("Well Name", "well_name"),
+    ("API #", "api_no"),
+    ("Operator", "operator"),
+    ("County", "county"),
+    ("Production Dates on File", "production_dates_on_file"),
+)
+# table.skinny: exact <th> text -> (field, overwrite). Non-overwriting fields only fill what meta_info left empty.
+TABLE_LABELS = {
+    "Well Status": ("well_status", True),
+    "Well Type": ("well_type", True),
+    "Closest City": ("closest_city", True),
+    "County": ("county", False),
+    "API No.": ("api_no", False),
+    "Well Name": ("well_name", False),
+    "Operator": ("operator", False),
+}
+
+# Responses worth retrying; anything else (including 404) is returned to the caller as-is.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Seconds a cached response is served without revalidation, by URL path prefix. Unlisted paths are not cached.
+HTTP_CACHE_TTLS = {"/search": 7 * 86400, "/wells/": 86400}
+
+# scraped_wells columns written from a scrape, in insert order (well_id and last_checked are set separately).
+SCRAPED_COLUMNS = (
+    "well_name", "api_number", "scraped_url", "api_no", "closest_city", "county", "latitude", "longitude",
+    "lat_deg", "lon_deg", "gas_mcf", "oil_bbl", "operator", "production_dates_on_file", "well_status", "well_type",
+)
+SCRAPED_INSERT = (
+    f"INSERT INTO scraped_wells (well_id, {', '.join(SCRAPED_COLUMNS)}, last_checked) "
+    f"VALUES (%s, {', '.join(['%s'] * len(SCRAPED_COLUMNS))}, CURRENT_TIMESTAMP)"
+)
+REFRESH_BUDGET = 200
+REFRESH_MIN_AGE_HOURS = 24
+
 
 def _debug(label: str, data, max_chars: int = 80) -> None:
     if not DEBUG or data is None:
@@ -71,7 +138,7 @@ def _norm_api(v) -> Optional[str]:
     s = (v if isinstance(v, str) else str(v)).strip()
     if not s or s.upper() == "NULL":
         return None
-    return s.rstrip("-00") if s.endswith("-00") else s
+    return s[:-3] if s.endswith("-00") else s
 
 
 def _trunc(s: Optional[str], max_len: int) -> Optional[str]:
@@ -83,8 +150,304 @@ def _trunc(s: Optional[str], max_len: int) -> Optional[str]:
     return s[:max_len] if len(s) > max_len else s
 
 
-def load_wells_from_db(cursor) -> List[dict]:
-    cursor.execute("SELECT well_id, well_name, api_number FROM wells")
+class TokenBucket:
+    """Thread-safe token bucket: refills `rate` tokens per second up to `burst`; acquire() blocks for one."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OfflineCacheMiss(Exception):
+    """Raised in --offline mode for a URL that is not in the HTTP cache; the well is queued in
+    scrape_failures like any other failed request."""
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after `threshold` consecutive failures and fails requests fast for
+    `cooldown` seconds, then lets a single probe through (half-open). A successful probe closes it."""
+
+    def __init__(self, threshold: int = 10, cooldown: float = 30.0) -> None:
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                METRICS.count("circuit_open_rejected")
+                raise CircuitOpenError("circuit open for %s after %d consecutive failures" % (host, self._failures))
+            self._probing = True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            probe = self._probing
+            self._probing = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if probe or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpCache:
+    """SQLite store of GET responses (zlib-compressed bodies) with a size cap and LRU eviction. Thread-safe."""
+
+    def __init__(self, path, max_bytes: int = 1024 ** 3) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, etag TEXT,
+                last_modified TEXT, fetched_at REAL, accessed_at REAL, size INTEGER)"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        status, headers, body, etag, last_modified, fetched_at = row
+        return {
+            "status": status, "headers": json.loads(headers), "body": zlib.decompress(body),
+            "etag": etag, "last_modified": last_modified, "fetched_at": fetched_at,
+        }
+
+    def put(self, url: str, r: requests.Response) -> None:
+        body = zlib.compress(r.content, 6)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?,?)",
+                (url, r.status_code, json.dumps(dict(r.headers)), body, r.headers.get("ETag"),
+                 r.headers.get("Last-Modified"), now, now, len(body)),
+            )
+            self._bytes += len(body) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark a cached entry fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def iter_bodies(self):
+        """(url, body) for every cached 200 response, without touching access times."""
+        with self._lock:
+            rows = self._db.execute("SELECT url, body FROM responses WHERE status = 200").fetchall()
+        for url, body in rows:
+            yield url, zlib.decompress(body)
+
+    def _evict(self) -> None:
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for url, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((url,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE url = ?", doomed)
+        _debug("http cache evicted entries", len(doomed))
+
+
+def _cached_response(url: str, entry: dict) -> requests.Response:
+    r = requests.Response()
+    r.status_code = entry["status"]
+    r.reason = "OK"
+    r.url = url
+    r.headers = CaseInsensitiveDict(entry["headers"])
+    r.encoding = get_encoding_from_headers(r.headers)
+    r._content = entry["body"]
+    r.from_cache = True
+    return r
+
+
+class ScraperSession(requests.Session):
+    """requests.Session with a keep-alive pool sized for `pool_size` threads, a token bucket per host and
+    an optional HttpCache.
+
+    rate=None disables limiting. Connection errors, timeouts and RETRY_STATUSES responses are retried up
+    to `retries` times with full-jitter exponential backoff (`backoff` * 2**attempt, capped at
+    `backoff_max`); a Retry-After header replaces the computed delay (same cap). Every attempt counts
+    toward the host's CircuitBreaker. The last retryable response is returned, so raise_for_status
+    raises as before. GETs whose path matches HTTP_CACHE_TTLS are served from the cache while
+    fresh; stale entries are revalidated with If-None-Match / If-Modified-Since. Cache hits do not take
+    a token. With offline=True nothing goes to the network: cached entries are served regardless of age
+    and misses raise OfflineCacheMiss.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: float = 1, pool_size: int = 10,
+                 cache: Optional[HttpCache] = None, offline: bool = False, retries: int = 4,
+                 backoff: float = 0.5, backoff_max: float = 60.0, breaker_threshold: int = 10,
+                 breaker_cooldown: float = 30.0) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.cache = cache
+        self.offline = offline
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._buckets = {}
+        self._breakers = {}
+        self._buckets_lock = threading.Lock()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        with self._buckets_lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._breakers[host]
+
+    def _send(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc
+        breaker = self._breaker(host)
+        attempt = 0
+        while True:
+            breaker.before_request(host)
+            if self.rate:
+                self._bucket(host).acquire()
+            try:
+                METRICS.count("http_request")
+                r = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record(False)
+                if attempt >= self.retries:
+                    raise
+                reason, wait = type(e).__name__, None
+            else:
+                if r.status_code not in RETRY_STATUSES:
+                    breaker.record(True)
+                    return r
+                breaker.record(False)
+                if attempt >= self.retries:
+                    return r
+                reason, wait = r.status_code, _retry_after(r)
+                r.close()
+            if wait is None:
+                wait = random.uniform(0, self.backoff * 2 ** attempt)
+            wait = min(wait, self.backoff_max)
+            attempt += 1
+            METRICS.count("http_retry")
+            _debug("retry %d/%d after %s, sleeping" % (attempt, self.retries, reason), round(wait, 2))
+            time.sleep(wait)
+
+    def request(self, method, url, *args, **kwargs):
+        ttl = None
+        if method.upper() == "GET" and not args:
+            path = urlsplit(url).path or "/"
+            ttl = next((t for prefix, t in HTTP_CACHE_TTLS.items() if path.startswith(prefix)), None)
+        if self.cache is None or ttl is None:
+            if self.offline:
+                raise OfflineCacheMiss(url)
+            return self._send(method, url, *args, **kwargs)
+        key = requests.Request(method, url, params=kwargs.get("params")).prepare().url
+        entry = self.cache.get(key)
+        if entry is not None and (self.offline or time.time() - entry["fetched_at"] < ttl):
+            _debug("http cache hit", key[-60:])
+            METRICS.count("http_cache_hit")
+            return _cached_response(key, entry)
+        if self.offline:
+            raise OfflineCacheMiss(key)
+        if entry is not None:
+            conditional = {}
+            if entry["etag"]:
+                conditional["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                conditional["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **conditional}
+        r = self._send(method, url, *args, **kwargs)
+        if r.status_code == 304 and entry is not None:
+            METRICS.count("http_not_modified")
+            self.cache.touch(key)
+            return _cached_response(key, entry)
+        if r.status_code == 200:
+            self.cache.put(key, r)
+        return r
+
+
+def load_wells_from_db(cursor, unscraped_only: bool = False, failed_only: bool = False) -> List[dict]:
+    if failed_only:
+        cursor.execute(
+            """SELECT w.well_id, w.well_name, w.api_number FROM scrape_failures f
+               JOIN wells w ON w.well_id = f.well_id
+               LEFT JOIN scraped_wells s ON s.well_id = w.well_id
+               WHERE s.well_id IS NULL"""
+        )
+    elif unscraped_only:
+        # Anti-join: only wells with no scraped_wells row, so re-runs never touch finished wells.
+        cursor.execute(
+            """SELECT w.well_id, w.well_name, w.api_number FROM wells w
+               LEFT JOIN scraped_wells s ON s.well_id = w.well_id
+               WHERE s.well_id IS NULL"""
+        )
+    else:
+        cursor.execute("SELECT well_id, well_name, api_number FROM wells")
     rows = cursor.fetchall()
     out = []
     for well_id, well_name, api_number in rows:
@@ -95,6 +458,16 @@ def load_wells_from_db(cursor) -> List[dict]:
 
 
 def search_well_url(session: requests.Session, well_name: Optional[str], api: Optional[str]) -> Optional[str]:
+    """URL of the well's page: from URL_INDEX when it knows the API number or name, else a live /search.
+
+    URLs found by searching are added to the index, so the next lookup for that well is a hit.
+    """
+    if URL_INDEX is not None:
+        url = URL_INDEX.lookup(api, well_name)
+        METRICS.count("url_index_hit" if url else "url_index_miss")
+        if url:
+            return url
+    name = well_name
     if api:
         api = api.strip()
         params = {"type": "wells", "operator_name": "", "well_name": "", "api_no": api}
@@ -104,23 +477,35 @@ def search_well_url(session: requests.Session, well_name: Optional[str], api: Op
     else:
         return None
 
-    try:
+    # Request failures propagate (after the session's retries) so the well is queued for --retry-failed
+    # instead of being stored as NOT FOUND; only a 404 means "no such well".
+    with METRICS.time("http_search"):
         r = session.get(f"{BASE}/search", params=params, timeout=15)
-        r.raise_for_status()
-    except requests.RequestException as e:
-        _debug("search_well_url request error", str(e))
+    if r.status_code == 404:
         return None
+    r.raise_for_status()
+    with METRICS.time("html_parse_search"):
+        url = parse_search_results(r.text, api, name=None if api else name)
+    if url and URL_INDEX is not None:
+        URL_INDEX.add(url, None if api else name, api)
+    return url
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    for a in soup.select('a[href*="/wells/"]'):
-        href = a.get("href", "")
-        full = urljoin(BASE, href)
-        if api:
-            if api in full:
-                return full
-        else:
-            if well_name in full:
+
+def parse_search_results(html: str, api: Optional[str], parser: Optional[str] = None,
+                         name: Optional[str] = None) -> Optional[str]:
+    """First /wells/ link on a search results page; with an API number, the first link containing it.
+
+    With a well name (and no API number) only a link whose text or URL slug is that name (compared by
+    well_index.normalize_name) counts, so a search that returns other wells finds nothing.
+    """
+    want = normalize_name(name) if not api else None
+    soup = BeautifulSoup(html, parser or HTML_PARSER, parse_only=SEARCH_STRAINER)
+    for a in soup.find_all("a", href=_WELL_HREF):
+        full = urljoin(BASE, a.get("href", ""))
+        if want is not None:
+            if normalize_name(a.get_text(" ", strip=True)) == want or want in url_names(full):
                 return full
+        elif not api or api in full:
             return full
     return None
 
@@ -162,21 +547,107 @@ def _split_lat_long(s: Optional[str]) -> tuple:
     return (s, None)
 
 
-def scrape_well_detail(session: requests.Session, url: str) -> dict:
-    out = {
+def _empty_detail() -> dict:
+    return {
         "api_no": None, "well_name": None, "operator": None, "county": None,
         "well_status": None, "well_type": None, "closest_city": None,
         "latitude": None, "longitude": None,
         "oil_bbl": None, "gas_mcf": None, "production_dates_on_file": None,
     }
-    try:
+
+
+def scrape_well_detail(session: requests.Session, url: str) -> dict:
+    with METRICS.time("http_detail"):
         r = session.get(url, headers=HEADERS, timeout=15)
-        r.raise_for_status()
-    except requests.RequestException as e:
-        _debug("scrape_well_detail request", str(e))
-        return out
+    if r.status_code == 404:
+        _debug("scrape_well_detail 404", url[-60:])
+        return _empty_detail()
+    r.raise_for_status()
+    with METRICS.time("html_parse_detail"):
+        return parse_well_detail(r.text)
+
+
+def _set_coordinates(out: dict, val: str, is_lat: bool, is_long: bool, overwrite: bool) -> None:
+    if "," in val:
+        lat, lon = _split_lat_long(val)
+        pairs = (("latitude", lat), ("longitude", lon))
+    elif is_lat:
+        pairs = (("latitude", val),)
+    elif is_long:
+        pairs = (("longitude", val),)
+    else:
+        return
+    for field, v in pairs:
+        if v is not None and (overwrite or out[field] is None):
+            out[field] = v
+
+
+def parse_well_detail(html: str, parser: Optional[str] = None) -> dict:
+    """Parse a DrillingEdge well page: section.meta_info, then table.skinny (fills gaps), then p.block_stat.
+
+    Only the strained subtrees are built, with HTML_PARSER (lxml when installed). Must return the same
+    dict as _parse_well_detail_reference; `python scraper_wells.py --check-parser` verifies that.
+    """
+    out = _empty_detail()
+    soup = BeautifulSoup(html, parser or HTML_PARSER, parse_only=DETAIL_STRAINER)
+
+    meta = soup.find("section", class_="meta_info")
+    if meta:
+        for div in meta.find_all("div"):
+            span = div.find("span", class_="detail_point")
+            if not span:
+                continue
+            label = div.get_text(" ", strip=True).split(":")[0].strip()
+            val = (span.find("a") or span).get_text(strip=True)
+            field = next((f for text, f in META_LABELS if text in label), None)
+            if field:
+                out[field] = val
+            elif "Latitude" in label or "Longitude" in label or "Coordinate" in label or ("Lat" in label and "Long" in label):
+                _set_coordinates(out, val, "Lat" in label, "Long" in label, overwrite=True)
+
+    table = soup.find("table", class_="skinny")
+    if table:
+        for tr in table.find_all("tr"):
+            for th in tr.find_all("th"):
+                key = th.get_text(strip=True)
+                td = th.find_next_sibling("td")
+                val = _text(td) if td else None
+                if key in TABLE_LABELS:
+                    field, overwrite = TABLE_LABELS[key]
+                    if overwrite or out[field] is None:
+                        out[field] = val
+                elif ("Latitude" in key or "Longitude" in key or "Coordinate" in key) and val:
+                    _set_coordinates(out, val, "Latitude" in key, "Longitude" in key, overwrite=False)
+
+    for p in soup.find_all("p", class_="block_stat"):
+        num_span = p.find("span", class_="dropcap")
+        if not num_span:
+            continue
+        num = _parse_number(num_span.get_text(strip=True))
+        num_span.decompose()
+        desc = p.get_text(" ", strip=True).lower()
+        if "oil" in desc and ("barrel" in desc or "bbl" in desc):
+            out["oil_bbl"] = num
+        elif "gas" in desc and ("mcf" in desc or "mmcf" in desc):
+            out["gas_mcf"] = num
+
+    return out
+
+
+def _parse_search_results_reference(html: str, api: Optional[str]) -> Optional[str]:
+    """Original full-tree html.parser search parse; kept as the oracle for --check-parser."""
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.select('a[href*="/wells/"]'):
+        full = urljoin(BASE, a.get("href", ""))
+        if not api or api in full:
+            return full
+    return None
 
-    soup = BeautifulSoup(r.text, "html.parser")
+
+def _parse_well_detail_reference(html: str) -> dict:
+    """Original full-tree html.parser + if/elif parse; kept as the oracle for --check-parser."""
+    out = _empty_detail()
+    soup = BeautifulSoup(html, "html.parser")
 
     meta = soup.select_one("section.meta_info")
     if meta:
@@ -258,6 +729,111 @@ def scrape_well_detail(session: requests.Session, url: str) -> dict:
     return out
 
 
+def load_html_fixtures(fixture_dir: Path, cache: Optional[HttpCache] = None) -> List[tuple]:
+    """(name, kind, html, api) for saved pages: *.html under fixture_dir (search*.html are search pages,
+    the rest well pages) plus every cached /search and /wells/ response."""
+    out = []
+    if fixture_dir.is_dir():
+        for f in sorted(fixture_dir.rglob("*.html")):
+            kind = "search" if f.name.startswith("search") else "detail"
+            out.append((str(f.relative_to(fixture_dir)), kind, f.read_text(encoding="utf-8", errors="replace"), None))
+    if cache is not None:
+        for url, body in cache.iter_bodies():
+            parts = urlsplit(url)
+            html = body.decode("utf-8", errors="replace")
+            if parts.path.startswith("/search"):
+                api = re.search(r"(?:^|&)api_no=([^&]+)", parts.query)
+                out.append((url, "search", html, api.group(1) if api else None))
+            elif parts.path.startswith("/wells/"):
+                out.append((url, "detail", html, None))
+    return out
+
+
+def check_parser_parity(fixtures: List[tuple], repeat: int = 3) -> int:
+    """Compare the strained parsers against the reference on every fixture, for each available tree
+    builder, then time them. Returns the number of mismatches."""
+    parsers = ["html.parser"] + (["lxml"] if HTML_PARSER == "lxml" else [])
+    mismatches = 0
+    for name, kind, html, api in fixtures:
+        if kind == "search":
+            want = _parse_search_results_reference(html, api)
+            got = {pr: parse_search_results(html, api, pr) for pr in parsers}
+        else:
+            want = _parse_well_detail_reference(html)
+            got = {pr: parse_well_detail(html, pr) for pr in parsers}
+        for pr, value in got.items():
+            if value != want:
+                mismatches += 1
+                if isinstance(want, dict):
+                    diff = {k: (want[k], value[k]) for k in want if want[k] != value[k]}
+                else:
+                    diff = (want, value)
+                print("MISMATCH [%s] %s: %s" % (pr, name, diff))
+
+    def reference(html, kind, api):
+        return _parse_search_results_reference(html, api) if kind == "search" else _parse_well_detail_reference(html)
+
+    variants = [("reference (html.parser, full tree)", reference)]
+    for pr in parsers:
+        variants.append(("strained (%s)" % pr, lambda html, kind, api, pr=pr: (
+            parse_search_results(html, api, pr) if kind == "search" else parse_well_detail(html, pr))))
+    n = len(fixtures) * repeat
+    for label, fn in variants:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for _, kind, html, api in fixtures:
+                fn(html, kind, api)
+        elapsed = time.perf_counter() - t0
+        print("  %-36s %8.3f ms/page" % (label, 1000 * elapsed / max(1, n)))
+    return mismatches
+
+
+def scrape_one(session: requests.Session, well: dict) -> dict:
+    """Search and scrape one well dict from load_wells_from_db, filling in the fields insert_scraped reads."""
+    if JOURNAL is not None:
+        JOURNAL.begin(str(well.get("well_id")))
+    METRICS.count("wells_attempted")
+    name = well.get("name")
+    api = well.get("api")
+    url = search_well_url(session, name, api)
+    well["url"] = url
+    if url:
+        detail = scrape_well_detail(session, url)
+        well.update(detail)
+        well["well_name"] = well.get("well_name") or name
+        well["api_no"] = well.get("api_no") or api
+    else:
+        well["well_name"] = name
+        well["api_no"] = api
+    return well
+
+
+async def scrape_concurrently(session: requests.Session, wells: List[dict], concurrency: int, fn=None):
+    """Async generator of (well, error) in completion order, with at most `concurrency` wells in flight.
+
+    The blocking requests calls (fn(session, well), scrape_one by default) run on a thread pool of the
+    same size, so the session's connection pool is reused across wells and its per-host token buckets
+    apply to every request.
+    """
+    fn = fn or scrape_one
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape")
+
+    async def one(well: dict):
+        async with limit:
+            try:
+                return await loop.run_in_executor(executor, fn, session, well), None
+            except Exception as e:
+                return well, e
+
+    try:
+        for fut in asyncio.as_completed([one(w) for w in wells]):
+            yield await fut
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def scraped_exists(cursor, well_id: Optional[int]) -> bool:
     if well_id is None:
         return False
@@ -265,7 +841,8 @@ def scraped_exists(cursor, well_id: Optional[int]) -> bool:
     return cursor.fetchone() is not None
 
 
-def insert_scraped(cursor, well_id: Optional[int], data: dict) -> None:
+def scraped_row_values(data: dict) -> tuple:
+    """Values for SCRAPED_COLUMNS from a scrape_one / refresh_one result."""
     def v(k, max_len: int = 0):
         x = data.get(k)
         if x is None:
@@ -279,38 +856,350 @@ def insert_scraped(cursor, well_id: Optional[int], data: dict) -> None:
 
     oil_bbl = data.get("oil_bbl") if isinstance(data.get("oil_bbl"), int) else None
     gas_mcf = data.get("gas_mcf") if isinstance(data.get("gas_mcf"), int) else None
+    lat_deg, lon_deg = normalize_coordinates(v("latitude"), v("longitude"))
+    return (
+        v("well_name") or v("name"),
+        _trunc(v("api_no") or v("api"), API_NUMBER_MAX),
+        v("url"),
+        _trunc(v("api_no"), API_NUMBER_MAX),
+        _trunc(v("closest_city"), VARCHAR_128),
+        v("county"),
+        _trunc(v("latitude"), 32),
+        _trunc(v("longitude"), 32),
+        lat_deg,
+        lon_deg,
+        gas_mcf,
+        oil_bbl,
+        v("operator"),
+        _trunc(v("production_dates_on_file"), VARCHAR_255),
+        _trunc(v("well_status"), VARCHAR_64),
+        _trunc(v("well_type"), VARCHAR_64),
+    )
+
+
+def insert_scraped(cursor, well_id: Optional[int], data: dict) -> None:
+    cursor.execute(SCRAPED_INSERT, (well_id,) + scraped_row_values(data))
+
+
+def record_failure(conn, cursor, well_id: Optional[int], err) -> None:
+    """Roll back the well's partial work and queue it in scrape_failures (attempts counted)."""
+    try:
+        conn.rollback()
+    except Exception:
+        pass
+    if well_id is None:
+        return
+    try:
+        cursor.execute(
+            """INSERT INTO scrape_failures (well_id, attempts, last_error) VALUES (%s, 1, %s)
+               ON DUPLICATE KEY UPDATE attempts = attempts + 1, last_error = VALUES(last_error),
+               last_failed_at = CURRENT_TIMESTAMP""",
+            (well_id, _trunc("%s: %s" % (type(err).__name__, err), VARCHAR_255)),
+        )
+        conn.commit()
+    except Exception as e:
+        _log_error("Could not queue well_id=%s for retry: %s" % (well_id, e))
+
+
+def clear_failure(cursor, well_id: Optional[int]) -> None:
+    if well_id is not None:
+        cursor.execute("DELETE FROM scrape_failures WHERE well_id = %s", (well_id,))
+
+
+def save_scraped(conn, cursor, well: dict) -> None:
+    """Insert a scrape_one result, clear its retry-queue entry and commit; marks the well done in the journal."""
+    well_id = well.get("well_id")
+    with METRICS.time("db_insert"):
+        insert_scraped(cursor, well_id, well)
+        clear_failure(cursor, well_id)
+        conn.commit()
+    if JOURNAL is not None:
+        JOURNAL.done(str(well_id))
+    disp = (well.get("well_name") or well.get("name") or "")[:40]
+    print(disp.ljust(40), "->", well.get("url") or "NOT FOUND")
+
+
+async def _scrape_and_insert(session: requests.Session, wells: List[dict], concurrency: int, conn, cursor) -> tuple:
+    """Run scrape_concurrently and insert each result from this thread as it completes. Returns (inserted, errors)."""
+    inserted = 0
+    errors = 0
+    async for well, err in scrape_concurrently(session, wells, concurrency):
+        well_id = well.get("well_id")
+        if err is None:
+            try:
+                save_scraped(conn, cursor, well)
+                inserted += 1
+                continue
+            except Exception as e:
+                err = e
+        errors += 1
+        _log_error("Well well_id=%s: %s" % (well_id, err))
+        record_failure(conn, cursor, well_id, err)
+        if JOURNAL is not None:
+            JOURNAL.failed(str(well_id), err)
+    return inserted, errors
 
+
+def load_stale_scraped(cursor, limit: int, checked_before=None, statuses=None) -> List[dict]:
+    """Up to `limit` scraped_wells rows to refresh, least recently checked first (never checked leads).
+
+    checked_before skips rows checked since then; statuses keeps only rows whose well_status is listed.
+    Each dict has well_id, name and api (from wells), url and "old", the SCRAPED_COLUMNS values.
+    """
+    where, params = ["s.well_id IS NOT NULL"], []
+    if checked_before is not None:
+        where.append("(s.last_checked IS NULL OR s.last_checked < %s)")
+        params.append(checked_before)
+    if statuses:
+        where.append("s.well_status IN (%s)" % ",".join(["%s"] * len(statuses)))
+        params.extend(statuses)
     cursor.execute(
-        """INSERT INTO scraped_wells (well_id, well_name, api_number, scraped_url, api_no,
-           closest_city, county, latitude, longitude, gas_mcf, oil_bbl, operator,
-           production_dates_on_file, well_status, well_type)
-           VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-        (
-            well_id,
-            v("well_name") or v("name"),
-            _trunc(v("api_no") or v("api"), API_NUMBER_MAX),
-            v("url"),
-            _trunc(v("api_no"), API_NUMBER_MAX),
-            _trunc(v("closest_city"), VARCHAR_128),
-            v("county"),
-            _trunc(v("latitude"), 32),
-            _trunc(v("longitude"), 32),
-            gas_mcf,
-            oil_bbl,
-            v("operator"),
-            _trunc(v("production_dates_on_file"), VARCHAR_255),
-            _trunc(v("well_status"), VARCHAR_64),
-            _trunc(v("well_type"), VARCHAR_64),
-        ),
+        f"""SELECT s.well_id, w.well_name, w.api_number, {', '.join('s.' + c for c in SCRAPED_COLUMNS)}
+            FROM scraped_wells s JOIN wells w ON w.well_id = s.well_id
+            WHERE {' AND '.join(where)} ORDER BY s.last_checked, s.scraped_id LIMIT %s""",
+        params + [int(limit)],
+    )
+    url_at = SCRAPED_COLUMNS.index("scraped_url")
+    return [{"well_id": row[0], "name": (row[1] or "").strip() or None, "api": _norm_api(row[2]),
+             "url": row[3 + url_at], "old": tuple(row[3:])} for row in cursor.fetchall()]
+
+
+def refresh_one(session: requests.Session, well: dict) -> dict:
+    """Re-fetch one load_stale_scraped row: its stored page, or a new search if it had none."""
+    METRICS.count("wells_refreshed")
+    if not well.get("url"):
+        well["url"] = search_well_url(session, well.get("name"), well.get("api"))
+    if well["url"]:
+        well.update(scrape_well_detail(session, well["url"]))
+    return well
+
+
+def scraped_changes(old: tuple, new: tuple) -> dict:
+    """{column: value} where the new scrape differs. A value the page no longer shows (None) keeps the
+    stored one, so a "members only" page or a 404 does not blank a row."""
+    return {c: n for c, o, n in zip(SCRAPED_COLUMNS, old, new) if n is not None and n != o}
+
+
+def apply_refreshed(cursor, wells: List[dict], failed_ids: List[int]) -> List[tuple]:
+    """Write one batch of refresh_one results and return [(well_id, changed columns)].
+
+    Rows are grouped by which columns changed, and each group is one executemany of
+    INSERT ... ON DUPLICATE KEY UPDATE setting only those columns and last_checked. Unchanged and
+    failed wells only get last_checked (updated_at is kept, so export_map.py does not re-export them).
+    """
+    groups, touched, changed = {}, list(failed_ids), []
+    for well in wells:
+        changes = scraped_changes(well["old"], scraped_row_values(well))
+        if changes:
+            groups.setdefault(tuple(changes), []).append((well["well_id"],) + tuple(changes.values()))
+            changed.append((well["well_id"], tuple(changes)))
+        else:
+            touched.append(well["well_id"])
+    for columns, rows in groups.items():
+        cursor.executemany(
+            f"""INSERT INTO scraped_wells (well_id, {', '.join(columns)}, last_checked)
+                VALUES (%s, {', '.join(['%s'] * len(columns))}, CURRENT_TIMESTAMP)
+                ON DUPLICATE KEY UPDATE {', '.join('%s = VALUES(%s)' % (c, c) for c in columns)},
+                last_checked = VALUES(last_checked)""",
+            rows,
+        )
+    if touched:
+        cursor.execute(
+            "UPDATE scraped_wells SET last_checked = CURRENT_TIMESTAMP, updated_at = updated_at "
+            f"WHERE well_id IN ({','.join(['%s'] * len(touched))})", touched)
+    return changed
+
+
+async def _refresh_batches(session: requests.Session, wells: List[dict], concurrency: int, conn, cursor,
+                           batch_size: int) -> dict:
+    """Run refresh_one over wells concurrently and apply the results every batch_size wells."""
+    counts = dict.fromkeys(("checked", "changed", "unchanged", "errors"), 0)
+    batch, failed = [], []
+
+    def flush() -> None:
+        try:
+            with METRICS.time("db_refresh_batch"):
+                changed = apply_refreshed(cursor, batch, failed)
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            counts["errors"] += len(batch)
+            _log_error("Refresh batch of %d wells: %s" % (len(batch), e))
+        else:
+            counts["checked"] += len(batch)
+            counts["changed"] += len(changed)
+            counts["unchanged"] += len(batch) - len(changed)
+            for well_id, columns in changed:
+                print(("well_id=%s" % well_id).ljust(40), "->", ", ".join(columns))
+        batch.clear()
+        failed.clear()
+
+    async for well, err in scrape_concurrently(session, wells, concurrency, refresh_one):
+        if err is None:
+            batch.append(well)
+        else:
+            counts["errors"] += 1
+            failed.append(well["well_id"])
+            _log_error("Refresh well_id=%s: %s" % (well["well_id"], err))
+        if len(batch) + len(failed) >= batch_size:
+            flush()
+    if batch or failed:
+        flush()
+    return counts
+
+
+def refresh_scraped(cfg, session: requests.Session, conn, concurrency: int) -> None:
+    """--refresh: re-scrape the stalest scraped_wells rows, `--budget` per cycle, every `--every` minutes.
+
+    Without --every (or REFRESH_EVERY_MINUTES) one cycle runs; with it, the loop runs until Ctrl-C,
+    so --budget 300 --every 60 refreshes 300 wells an hour.
+    """
+    try:
+        budget = int(_arg_value("--budget", getattr(cfg, "REFRESH_BUDGET", REFRESH_BUDGET)))
+        min_age = float(_arg_value("--min-age", getattr(cfg, "REFRESH_MIN_AGE_HOURS", REFRESH_MIN_AGE_HOURS)))
+        every = _arg_value("--every", getattr(cfg, "REFRESH_EVERY_MINUTES", None))
+        every = float(every) if every is not None else None
+        batch_size = max(1, int(_arg_value("--batch-size", 100)))
+    except ValueError:
+        print("--budget, --min-age, --every and --batch-size expect numbers", file=sys.stderr)
+        sys.exit(2)
+    statuses = _arg_value("--status")
+    statuses = [x.strip() for x in statuses.split(",") if x.strip()] if statuses else \
+        list(getattr(cfg, "REFRESH_STATUSES", []))
+    cursor = conn.cursor()
+    try:
+        while True:
+            started = time.monotonic()
+            cursor.execute("SELECT NOW()")
+            checked_before = cursor.fetchone()[0] - timedelta(hours=min_age)
+            with METRICS.time("db_load_stale"):
+                wells = load_stale_scraped(cursor, budget, checked_before, statuses)
+            if wells:
+                counts = asyncio.run(_refresh_batches(session, wells, concurrency, conn, cursor, batch_size))
+                print("Refresh: " + ", ".join("%s: %s" % kv for kv in counts.items()))
+            else:
+                print("Refresh: nothing checked more than %g hours ago." % min_age)
+            if every is None:
+                break
+            time.sleep(max(0.0, every * 60 - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("\nStopping refresh.")
+    finally:
+        cursor.close()
+
+
+def _finish_metrics(wall_seconds: float, export_path=None) -> None:
+    """Print the per-stage profile, append it to the log and optionally export it (.json or Prometheus text)."""
+    report = METRICS.report(wall_seconds)
+    if not report:
+        return
+    print("\n" + report)
+    if LOG_FILE is not None:
+        LOG_FILE.write("%s [METRICS]\n%s\n" % (datetime.now().isoformat(), report))
+    if export_path:
+        METRICS.export(export_path, "scraper_wells", wall_seconds)
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def _http_cache_path(cfg, script_dir: Path) -> Path:
+    cache_path = Path(getattr(cfg, "HTTP_CACHE_PATH", script_dir / "temp" / "http_cache.sqlite"))
+    return cache_path if cache_path.is_absolute() else script_dir / cache_path
+
+
+def configure_from_config(cfg, base_url: Optional[str] = None, html_parser: Optional[str] = None) -> bool:
+    """Apply the DrillingEdge base URL, cache TTLs and HTML parser from config.py (arguments win).
+
+    Returns False (after printing why) if the parser is not installed.
+    """
+    global BASE, HTML_PARSER
+    BASE = (base_url or getattr(cfg, "DRILLINGEDGE_BASE", BASE)).rstrip("/")
+    HTTP_CACHE_TTLS.update(getattr(cfg, "HTTP_CACHE_TTLS", {}))
+    HTML_PARSER = html_parser or getattr(cfg, "HTML_PARSER", HTML_PARSER)
+    try:
+        BeautifulSoup("", HTML_PARSER)
+    except Exception:
+        print("HTML parser %r is not available (pip install lxml, or use html.parser)" % HTML_PARSER, file=sys.stderr)
+        return False
+    return True
+
+
+def open_session(cfg, script_dir: Path, concurrency: int, rate: Optional[float], burst: float, retries: int,
+                 offline: bool = False, use_cache: bool = True) -> ScraperSession:
+    """ScraperSession configured from config.py, with the site's cookies fetched unless offline.
+
+    Raises requests.RequestException if the first request to BASE fails.
+    """
+    cache = None
+    if use_cache:
+        max_bytes = int(getattr(cfg, "HTTP_CACHE_MAX_MB", 1024)) * 1024 * 1024
+        cache = HttpCache(_http_cache_path(cfg, script_dir), max_bytes)
+    session = ScraperSession(
+        rate, burst, pool_size=max(10, concurrency), cache=cache, offline=offline, retries=retries,
+        backoff=float(getattr(cfg, "HTTP_BACKOFF", 0.5)), backoff_max=float(getattr(cfg, "HTTP_BACKOFF_MAX", 60)),
+        breaker_threshold=int(getattr(cfg, "BREAKER_THRESHOLD", 10)),
+        breaker_cooldown=float(getattr(cfg, "BREAKER_COOLDOWN", 30)),
     )
+    session.headers.update(HEADERS)
+    if not offline:
+        session.get(BASE, timeout=10)
+    return session
 
 
 def main() -> None:
-    global LOG_FILE
+    global LOG_FILE, JOURNAL, URL_INDEX
     dry_run = "--dry-run" in sys.argv or "-n" in sys.argv
+    offline = "--offline" in sys.argv
+    no_http_cache = "--no-http-cache" in sys.argv
+    retry_failed = "--retry-failed" in sys.argv
+    resume = "--resume" in sys.argv
+    if offline and no_http_cache:
+        print("--offline serves only from the HTTP cache; it cannot be combined with --no-http-cache", file=sys.stderr)
+        sys.exit(2)
     script_dir = Path(__file__).resolve().parent
+    try:
+        concurrency = max(1, int(_arg_value("--concurrency", 1)))
+        rate = _arg_value("--rate", 5.0 if concurrency > 1 else None)
+        rate = float(rate) if rate is not None else None
+        burst = float(_arg_value("--burst", max(1, concurrency // 2)))
+        retries = _arg_value("--retries")
+        retries = int(retries) if retries is not None else None
+        max_retries = _arg_value("--max-retries")
+        max_retries = int(max_retries) if max_retries is not None else None
+    except ValueError:
+        print("--concurrency, --rate, --burst, --retries and --max-retries expect numbers", file=sys.stderr)
+        sys.exit(2)
 
     cfg = load_config()
+    if retries is None:
+        retries = int(getattr(cfg, "HTTP_RETRIES", 4))
+    if max_retries is None:
+        max_retries = int(getattr(cfg, "JOURNAL_MAX_RETRIES", 3))
+    if not configure_from_config(cfg, _arg_value("--base-url"), _arg_value("--html-parser")):
+        sys.exit(2)
+
+    if "--check-parser" in sys.argv:
+        fixture_dir = Path(getattr(cfg, "HTML_FIXTURE_DIR", script_dir / "temp" / "html_fixtures"))
+        if not fixture_dir.is_absolute():
+            fixture_dir = script_dir / fixture_dir
+        cache_path = _http_cache_path(cfg, script_dir)
+        cache = HttpCache(cache_path) if cache_path.exists() and not no_http_cache else None
+        fixtures = load_html_fixtures(fixture_dir, cache)
+        if not fixtures:
+            print("No saved pages: add *.html under %s or run the scraper with the HTTP cache on." % fixture_dir,
+                  file=sys.stderr)
+            sys.exit(1)
+        print("Checking %d saved pages..." % len(fixtures))
+        mismatches = check_parser_parity(fixtures, repeat=int(_arg_value("--repeat", 3)))
+        print("Parser check:", len(fixtures), "pages,", mismatches, "mismatches")
+        sys.exit(1 if mismatches else 0)
 
     if dry_run:
         try:
@@ -327,69 +1216,111 @@ def main() -> None:
             sys.exit(1)
         sys.exit(0)
 
-    LOG_FILE = open(script_dir / "scraper_wells.log", "a", encoding="utf-8")
+    metrics_path = _arg_value("--metrics") or getattr(cfg, "METRICS_EXPORT", None)
+    started = time.perf_counter()
+    LOG_FILE = BufferedLog(open(script_dir / "scraper_wells.log", "a", encoding="utf-8"))
     LOG_FILE.write("\n--- Run started " + datetime.now().isoformat() + " ---\n")
-    LOG_FILE.flush()
 
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    try:
-        session.get(BASE, timeout=10)
-    except requests.RequestException as e:
-        _log_error("Session init: " + str(e))
-        LOG_FILE.close()
-        LOG_FILE = None
-        sys.exit(1)
+    if "--refresh" in sys.argv:
+        # Every stored well page is revalidated (a 304 is cheap) instead of being served from the cache.
+        HTTP_CACHE_TTLS["/wells/"] = 0
+        if "--no-index" not in sys.argv:
+            URL_INDEX = open_index(cfg, script_dir)
+        try:
+            try:
+                session = open_session(cfg, script_dir, concurrency, rate, burst, retries, offline,
+                                       not no_http_cache)
+            except requests.RequestException as e:
+                _log_error("Session init: " + str(e))
+                sys.exit(1)
+            conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
+            try:
+                refresh_scraped(cfg, session, conn, concurrency)
+            finally:
+                conn.close()
+                session.close()
+        finally:
+            if URL_INDEX is not None:
+                URL_INDEX.close()
+                URL_INDEX = None
+            _finish_metrics(time.perf_counter() - started, metrics_path)
+            LOG_FILE.close()
+            LOG_FILE = None
+        return
 
+    journal = RunJournal(script_dir / "temp" / "journal" / "scrape.jsonl", max_retries)
     try:
         conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
         cursor = conn.cursor()
-        wells = load_wells_from_db(cursor)
+        cursor.execute("SELECT COUNT(*) FROM wells")
+        total = cursor.fetchone()[0]
+        remaining = journal.resume() if resume else None
+        if remaining is not None:
+            # Continue from the journal. A well that was in flight when the run died may have been
+            # committed, so only those are checked against scraped_wells.
+            wells = []
+            for key, meta in remaining:
+                if journal.state(key) == "in_flight" and scraped_exists(cursor, int(key)):
+                    journal.done(key)
+                    continue
+                wells.append({"well_id": int(key), "name": meta["name"], "api": meta["api"]})
+            print("Resuming: %d wells left (%s)" % (len(wells), journal.counts()))
+        else:
+            with METRICS.time("db_load_wells"):
+                wells = load_wells_from_db(cursor, unscraped_only=True, failed_only=retry_failed)
         _debug("load_wells_from_db count", len(wells))
-        if not wells:
+        if not total:
             print("No wells in DB.", file=sys.stderr)
             cursor.close()
             conn.close()
             return
+        if not wells:
+            cursor.close()
+            conn.close()
+            print("Done. Inserted:", 0, ", skipped (existing):", total, ", errors:", 0)
+            return
+        if remaining is None:
+            journal.start([(str(w["well_id"]), {"name": w["name"], "api": w["api"]}) for w in wells])
+        JOURNAL = journal
+        if "--no-index" not in sys.argv:
+            URL_INDEX = open_index(cfg, script_dir)
+
+        try:
+            session = open_session(cfg, script_dir, concurrency, rate, burst, retries, offline, not no_http_cache)
+        except requests.RequestException as e:
+            _log_error("Session init: " + str(e))
+            cursor.close()
+            conn.close()
+            sys.exit(1)
 
         inserted = 0
-        skipped = 0
+        skipped = total - len(wells)
         errors = 0
-        for i, well in enumerate(wells):
-            well_id = well.get("well_id")
-            name = well.get("name")
-            api = well.get("api")
-            try:
-                url = search_well_url(session, name, api)
-                well["url"] = url
-                if scraped_exists(cursor, well_id):
-                    skipped += 1
-                    _debug("skip existing well_id", well_id)
-                    continue
-                if url:
-                    detail = scrape_well_detail(session, url)
-                    well.update(detail)
-                    well["well_name"] = well.get("well_name") or name
-                    well["api_no"] = well.get("api_no") or api
-                else:
-                    well["well_name"] = name
-                    well["api_no"] = api
-                insert_scraped(cursor, well_id, well)
-                inserted += 1
-                conn.commit()
-                disp = (well.get("well_name") or name or "")[:40]
-                print(disp.ljust(40), "->", url or "NOT FOUND")
-            except Exception as e:
-                errors += 1
-                _log_error("Well %s (well_id=%s): %s" % (i + 1, well_id, e))
+        if concurrency > 1:
+            inserted, errors = asyncio.run(_scrape_and_insert(session, wells, concurrency, conn, cursor))
+        else:
+            for i, well in enumerate(wells):
+                well_id = well.get("well_id")
                 try:
-                    conn.rollback()
-                except Exception:
-                    pass
+                    scrape_one(session, well)
+                    save_scraped(conn, cursor, well)
+                    inserted += 1
+                except Exception as e:
+                    errors += 1
+                    _log_error("Well %s (well_id=%s): %s" % (i + 1, well_id, e))
+                    record_failure(conn, cursor, well_id, e)
+                    journal.failed(str(well_id), e)
         cursor.close()
         conn.close()
         print("Done. Inserted:", inserted, ", skipped (existing):", skipped, ", errors:", errors)
+        print("Journal: " + ", ".join("%s: %s" % kv for kv in sorted(journal.counts().items())))
     finally:
+        journal.close()
+        JOURNAL = None
+        if URL_INDEX is not None:
+            URL_INDEX.close()
+            URL_INDEX = None
+        _finish_metrics(time.perf_counter() - started, metrics_path)
         if LOG_FILE is not None:
             LOG_FILE.close()
             LOG_FILE = None
@@ -1,11 +1,25 @@
 const express = require("express");
 const cors = require("cors");
 const mysql = require("mysql2/promise");
+const path = require("path");
 
 const app = express();
 app.use(cors()); // Allow cross-origin requests from frontend
 app.use(express.json());
 
+// Static map export written by `python export_map.py` (tiles are stored gzip-compressed)
+app.use(
+  "/map",
+  express.static(process.env.MAP_EXPORT_DIR || path.join(__dirname, "temp", "map_export"), {
+    setHeaders: (res, file) => {
+      if (file.endsWith(".geojson.gz")) {
+        res.setHeader("Content-Type", "application/geo+json");
+        res.setHeader("Content-Encoding", "gzip");
+      }
+    },
+  })
+);
+
 // MySQL connection pool
 const pool = mysql.createPool({
   host: "localhost",
@@ -23,23 +37,37 @@ app.get("/api/health", (req, res) => {
 });
 
 // GET /api/wells - List all wells for map markers
-// Returns well_id, api_number, name (alias for well_name), latitude, longitude
-// Only includes wells with valid coordinates
+// Returns well_id, api_number, name (alias for well_name), latitude, longitude (decimal degrees)
+// Only includes wells with parsed coordinates (lat_deg/lon_deg, see well_geo.py).
+// Optional ?bbox=minLat,minLon,maxLat,maxLon limits the result to the map view via the spatial index.
 app.get("/api/wells", async (req, res) => {
   try {
-    const [rows] = await pool.query(`
+    const params = [];
+    let where = "lat_deg IS NOT NULL";
+    if (req.query.bbox) {
+      const b = String(req.query.bbox).split(",").map(Number);
+      if (b.length !== 4 || b.some((x) => !Number.isFinite(x))) {
+        return res.status(400).json({ error: "bbox must be minLat,minLon,maxLat,maxLon" });
+      }
+      const [minLat, minLon, maxLat, maxLon] = b;
+      where += " AND MBRContains(ST_GeomFromText(?), geo_point)";
+      params.push(
+        `POLYGON((${minLon} ${minLat}, ${maxLon} ${minLat}, ${maxLon} ${maxLat}, ${minLon} ${maxLat}, ${minLon} ${minLat}))`
+      );
+    }
+    const [rows] = await pool.query(
+      `
       SELECT
         well_id,
         api_number,
         well_name AS name,
-        latitude,
-        longitude
+        lat_deg AS latitude,
+        lon_deg AS longitude
       FROM wells
-      WHERE latitude IS NOT NULL
-        AND longitude IS NOT NULL
-        AND latitude <> ''
-        AND longitude <> ''
-    `);
+      WHERE ${where}
+    `,
+      params
+    );
 
     res.json(rows);
   } catch (e) {
@@ -0,0 +1,207 @@
+"""Decimal-degree coordinates for wells and scraped_wells, and queries that use their spatial index.
+
+The text columns `latitude` / `longitude` keep whatever the source printed ("48° 3' 37.92 N",
+"48.06053", "-103.6139"); `lat_deg` / `lon_deg` hold the same point as signed decimal degrees and feed
+the stored `geo_point` column (POINT(lon, lat), SRID 0) that carries the SPATIAL INDEX.
+
+    python well_geo.py --backfill [--batch-size 1000]   # fill lat_deg/lon_deg for existing rows
+    python well_geo.py --near 48.06 -103.61 [--k 10]    # nearest wells
+    python well_geo.py --bbox 47.5 -104 48.5 -103       # wells in min_lat min_lon max_lat max_lon
+"""
+import math
+import re
+import sys
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+BACKFILL_BATCH = 1000
+
+# table -> (primary key, id reported to callers, name column)
+GEO_TABLES = {
+    "wells": ("well_id", "well_id", "well_name"),
+    "scraped_wells": ("scraped_id", "well_id", "well_name"),
+}
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_HEMISPHERE = re.compile(r"([NSEW])\W*$")
+
+
+def to_decimal_degrees(value, is_lat: bool) -> Optional[float]:
+    """Parse a latitude or longitude in decimal or degrees/minutes/seconds form; None if it is not one.
+
+    Any non-numeric symbols between the parts are ignored, so "48° 3' 37.92\\" N", "48 3 37.92N" and
+    "48.06053" all work. A trailing S or W (or a leading minus) makes the value negative.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        deg = float(value)
+    else:
+        s = str(value).strip().upper()
+        parts = _NUMBER.findall(s)
+        if not parts or len(parts) > 3:
+            return None
+        nums = [float(p) for p in parts]
+        if any(n < 0 for n in nums[1:]) or any(n >= 60 for n in nums[1:]):
+            return None
+        deg = abs(nums[0]) + sum(n / 60 ** i for i, n in enumerate(nums[1:], 1))
+        hemi = _HEMISPHERE.search(s)
+        if hemi and hemi.group(1) not in ("NS" if is_lat else "EW"):
+            return None
+        if nums[0] < 0 or parts[0].startswith("-") or (hemi and hemi.group(1) in "SW"):
+            deg = -deg
+    if math.isnan(deg) or abs(deg) > (90 if is_lat else 180):
+        return None
+    return round(deg, 7)
+
+
+def normalize_coordinates(lat, lon) -> Tuple[Optional[float], Optional[float]]:
+    """(lat_deg, lon_deg); both None unless both parse, so a half point never reaches the index."""
+    lat_deg, lon_deg = to_decimal_degrees(lat, True), to_decimal_degrees(lon, False)
+    if lat_deg is None or lon_deg is None:
+        return None, None
+    return lat_deg, lon_deg
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _envelope(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> str:
+    return "POLYGON((%r %r, %r %r, %r %r, %r %r, %r %r))" % (
+        min_lon, min_lat, max_lon, min_lat, max_lon, max_lat, min_lon, max_lat, min_lon, min_lat)
+
+
+def wells_in_bbox(cursor, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                  table: str = "wells", limit: int = 10000) -> List[tuple]:
+    """[(id, name, lat_deg, lon_deg)] inside the box, answered from the spatial index on geo_point."""
+    _, id_col, name_col = GEO_TABLES[table]
+    cursor.execute(
+        f"""SELECT {id_col}, {name_col}, lat_deg, lon_deg FROM {table}
+            WHERE MBRContains(ST_GeomFromText(%s), geo_point) AND lat_deg IS NOT NULL
+            LIMIT %s""",
+        (_envelope(min_lat, min_lon, max_lat, max_lon), int(limit)),
+    )
+    return cursor.fetchall()
+
+
+def nearest_wells(cursor, lat: float, lon: float, k: int = 10, table: str = "wells",
+                  start_km: float = 5.0, max_km: float = 1000.0) -> List[tuple]:
+    """The k closest [(id, name, lat_deg, lon_deg, distance_km)], nearest first.
+
+    MySQL cannot walk a spatial index in distance order, so this asks for a box around the point and
+    doubles it until it holds k wells within the box's inscribed radius (anything nearer than that
+    radius is guaranteed to be inside the box); distances are great-circle, computed here.
+    """
+    radius = start_km
+    while True:
+        dlat = math.degrees(radius / EARTH_RADIUS_KM)
+        dlon = min(180.0, dlat / max(0.01, math.cos(math.radians(lat))))
+        rows = wells_in_bbox(cursor, lat - dlat, lon - dlon, lat + dlat, lon + dlon, table=table, limit=10 ** 9)
+        hits = sorted((row + (haversine_km(lat, lon, row[2], row[3]),) for row in rows), key=lambda r: r[-1])
+        if sum(1 for h in hits if h[-1] <= radius) >= k or radius >= max_km:
+            return hits[:k]
+        radius *= 2
+
+
+def backfill_coordinates(conn, table: str, batch_size: int = BACKFILL_BATCH) -> dict:
+    """Fill lat_deg/lon_deg for rows that have text coordinates but no numeric ones, one commit per batch.
+
+    Rows are walked in primary-key order, so values that do not parse are left NULL and passed over
+    instead of being fetched again.
+    """
+    key = GEO_TABLES[table][0]
+    cursor = conn.cursor()
+    counts = {"rows": 0, "converted": 0, "unparsed": 0}
+    last = 0
+    while True:
+        cursor.execute(
+            f"""SELECT {key}, latitude, longitude FROM {table}
+                WHERE {key} > %s AND lat_deg IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+                ORDER BY {key} LIMIT %s""",
+            (last, int(batch_size)),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, lat, lon in rows:
+            lat_deg, lon_deg = normalize_coordinates(lat, lon)
+            if lat_deg is None:
+                counts["unparsed"] += 1
+            else:
+                updates.append((lat_deg, lon_deg, row_id))
+        if updates:
+            cursor.executemany(f"UPDATE {table} SET lat_deg = %s, lon_deg = %s WHERE {key} = %s", updates)
+        conn.commit()
+        counts["rows"] += len(rows)
+        counts["converted"] += len(updates)
+        last = rows[-1][0]
+        print(f"  {table}: {counts['rows']} rows checked, {counts['converted']} converted", flush=True)
+    cursor.close()
+    return counts
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def _arg_floats(name: str, n: int) -> Optional[List[float]]:
+    if name not in sys.argv:
+        return None
+    i = sys.argv.index(name)
+    try:
+        return [float(x) for x in sys.argv[i + 1:i + 1 + n]]
+    except ValueError:
+        return None
+
+
+def main() -> None:
+    from extract_pdf_wells import load_config
+    import mysql.connector
+
+    cfg = load_config()
+    mysql_cfg = getattr(cfg, "MYSQL_CONFIG", None)
+    if not mysql_cfg:
+        print("Set MYSQL_CONFIG in config.py.", file=sys.stderr)
+        sys.exit(1)
+    table = _arg_value("--table")
+    if table is not None and table not in GEO_TABLES:
+        print(f"--table must be one of: {', '.join(GEO_TABLES)}", file=sys.stderr)
+        sys.exit(1)
+    conn = mysql.connector.connect(**mysql_cfg)
+    try:
+        if "--backfill" in sys.argv:
+            batch = int(_arg_value("--batch-size", getattr(cfg, "GEO_BACKFILL_BATCH", BACKFILL_BATCH)))
+            for t in [table] if table else list(GEO_TABLES):
+                counts = backfill_coordinates(conn, t, batch)
+                print(f"{t}: {counts['converted']} converted, {counts['unparsed']} could not be parsed")
+            return
+        near, bbox = _arg_floats("--near", 2), _arg_floats("--bbox", 4)
+        table = table or "wells"
+        cursor = conn.cursor()
+        if near and len(near) == 2:
+            for row in nearest_wells(cursor, near[0], near[1], k=int(_arg_value("--k", 10)), table=table):
+                print("%8s  %-40s %11.6f %12.6f %9.2f km" % (row[0], (row[1] or "")[:40], row[2], row[3], row[4]))
+        elif bbox and len(bbox) == 4:
+            rows = wells_in_bbox(cursor, *bbox, table=table)
+            for row in rows:
+                print("%8s  %-40s %11.6f %12.6f" % (row[0], (row[1] or "")[:40], row[2], row[3]))
+            print(f"{len(rows)} well(s)")
+        else:
+            print(__doc__.strip().split("\n\n", 1)[1])
+            sys.exit(1)
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
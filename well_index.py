@@ -0,0 +1,307 @@
+"""Local index of DrillingEdge well pages, so the scraper can resolve most wells without a /search request.
+
+    python well_index.py --build [--rate R] [--max-pages N] [--refresh] [LISTING_URL ...]
+    python well_index.py --lookup 33-053-04852
+    python well_index.py --stats
+
+--build crawls listing pages (county or operator well lists, following their "next" links) and stores
+every /wells/ link on them by API number and by normalized well name, in a SQLite file (default
+temp/well_index.sqlite, or WELL_INDEX_PATH in config.py). Without URLs it crawls DRILLINGEDGE_LISTINGS
+from config.py, or else the county listing of every distinct wells.county_state. Listings already
+crawled are skipped unless --refresh is given, so an interrupted build picks up where it stopped.
+
+scraper_wells.py and pipeline.py consult the index before searching and fall back to the live
+/search only on a miss (--no-index turns it off). A name shared by two different well pages is
+ambiguous and is never answered from the index.
+"""
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+LISTING_MAX_PAGES = 500
+
+_API = re.compile(r"(?<!\d)(\d{2})-?(\d{3})-?(\d{5})(?!\d)")
+_NEXT_TEXT = re.compile(r"^\s*(?:next\b.*|[»›])\s*$", re.IGNORECASE)
+
+
+def api_key(api) -> Optional[str]:
+    """"SS-CCC-WWWWW" from an API number in any common spelling (dashes optional, -00 suffixes ignored)."""
+    if not api:
+        return None
+    m = _API.search(str(api))
+    return "%s-%s-%s" % m.groups() if m else None
+
+
+def normalize_name(name) -> Optional[str]:
+    """Lower-case words and digits only, so "Atlanta 14-6H", "ATLANTA 14 6H" and "atlanta-14-6h" agree."""
+    if not name:
+        return None
+    s = re.sub(r"[^a-z0-9]+", " ", str(name).lower().replace("&", " and ")).strip()
+    return s or None
+
+
+def url_names(url: str) -> set:
+    """Normalized path segments after /wells/ (DrillingEdge puts the well's name slug there)."""
+    parts = urlsplit(url).path.split("/")
+    if "wells" not in parts:
+        return set()
+    return {n for n in (normalize_name(p) for p in parts[parts.index("wells") + 1:]) if n}
+
+
+def county_listing_path(county_state: Optional[str]) -> Optional[str]:
+    """"McKenzie County, North Dakota" -> "/north-dakota/mckenzie-county/wells"; None if not in that form."""
+    parts = [p.strip() for p in (county_state or "").split(",")]
+    if len(parts) != 2 or not all(parts):
+        return None
+    county, state = (re.sub(r"[^a-z0-9]+", "-", p.lower()).strip("-") for p in parts)
+    if not county.endswith("-county"):
+        county += "-county"
+    return "/%s/%s/wells" % (state, county)
+
+
+def parse_listing_page(html: str, page_url: str, parser: str = "html.parser") -> Tuple[List[tuple], Optional[str]]:
+    """([(url, name, api)] for every well link on a listing page, absolute URL of the next page or None)."""
+    soup = BeautifulSoup(html, parser)
+    entries, next_url = [], None
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        rel = a.get("rel") or []
+        if next_url is None and ("next" in rel or _NEXT_TEXT.match(a.get_text(" ", strip=True) or "")):
+            next_url = urljoin(page_url, href)
+        elif "/wells/" in href:
+            url = urljoin(page_url, href)
+            entries.append((url, a.get_text(" ", strip=True) or None, api_key(url)))
+    return entries, next_url
+
+
+class WellUrlIndex:
+    """API number -> URL and normalized name -> URL, stored in SQLite and held in dicts for lookups.
+
+    A key that maps to two different URLs is kept as ambiguous (None) and not answered. api_of holds the
+    API number recorded for each URL, so a name hit can be checked against the API asked for. Thread-safe.
+    """
+
+    def __init__(self, path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS wells (url TEXT PRIMARY KEY, api TEXT, name TEXT, added REAL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS listings (url TEXT PRIMARY KEY, pages INTEGER, links INTEGER, crawled REAL)")
+        self._db.commit()
+        self.by_api, self.by_name, self.api_of = {}, {}, {}
+        for url, api, name in self._db.execute("SELECT url, api, name FROM wells ORDER BY url"):
+            self._remember(url, api, name)
+
+    def _remember(self, url: str, api: Optional[str], name: Optional[str]) -> None:
+        if api is not None:
+            self.api_of[url] = api
+        for table, key in ((self.by_api, api), (self.by_name, name)):
+            if key is not None:
+                table[key] = url if table.get(key, url) == url else None
+
+    def add_many(self, entries: List[tuple]) -> None:
+        """Store [(url, name, api)]; names are normalized and APIs reduced to api_key() here."""
+        rows = [(url, api_key(api) or api_key(url), normalize_name(name)) for url, name, api in entries]
+        now = time.time()
+        with self._lock:
+            # A link seen again without a name or API keeps the ones recorded earlier.
+            self._db.executemany(
+                """INSERT INTO wells VALUES (?,?,?,?) ON CONFLICT(url) DO UPDATE SET
+                   api = COALESCE(excluded.api, api), name = COALESCE(excluded.name, name)""",
+                [row + (now,) for row in rows])
+            self._db.commit()
+            for url, api, name in rows:
+                self._remember(url, api, name)
+
+    def add(self, url: str, name: Optional[str] = None, api: Optional[str] = None) -> None:
+        self.add_many([(url, name, api)])
+
+    def lookup(self, api: Optional[str], name: Optional[str]) -> Optional[str]:
+        """URL for the API number if known, else for the well name; None on a miss or an ambiguous key.
+
+        A name hit whose page has a different API number than the one asked for is a different well
+        (names are reused across counties), so it is a miss too.
+        """
+        key = api_key(api)
+        if key is not None and self.by_api.get(key):
+            return self.by_api[key]
+        name = normalize_name(name)
+        url = self.by_name.get(name) if name is not None else None
+        if url and key is not None and self.api_of.get(url, key) != key:
+            return None
+        return url
+
+    def crawled(self, listing: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM listings WHERE url = ?", (listing,)).fetchone() is not None
+
+    def mark_crawled(self, listing: str, pages: int, links: int) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO listings VALUES (?,?,?,?)", (listing, pages, links, time.time()))
+            self._db.commit()
+
+    def counts(self) -> dict:
+        with self._lock:
+            listings = self._db.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+            urls = self._db.execute("SELECT COUNT(*) FROM wells").fetchone()[0]
+        return {
+            "listings": listings, "urls": urls,
+            "apis": sum(1 for u in self.by_api.values() if u), "names": sum(1 for u in self.by_name.values() if u),
+            "ambiguous_names": sum(1 for u in self.by_name.values() if u is None),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def index_path(cfg, script_dir: Path) -> Path:
+    path = Path(getattr(cfg, "WELL_INDEX_PATH", script_dir / "temp" / "well_index.sqlite"))
+    return path if path.is_absolute() else script_dir / path
+
+
+def open_index(cfg, script_dir: Path) -> Optional[WellUrlIndex]:
+    """The index built by --build, or None if there is none yet (nothing is created)."""
+    path = index_path(cfg, script_dir)
+    return WellUrlIndex(path) if path.exists() else None
+
+
+def crawl_listing(session, index: WellUrlIndex, listing: str, max_pages: int = LISTING_MAX_PAGES,
+                  parser: str = "html.parser") -> dict:
+    """Walk one listing through its "next" links, storing each page's wells as it is read.
+
+    Request failures propagate (after the session's retries) and leave the listing unmarked, so the
+    next --build starts it over; a 404 ends the walk.
+    """
+    from run_metrics import METRICS
+
+    url, seen, pages, links = listing, set(), 0, 0
+    while url and url not in seen and pages < max_pages:
+        seen.add(url)
+        with METRICS.time("http_listing"):
+            r = session.get(url, timeout=30)
+        if r.status_code == 404:
+            break
+        r.raise_for_status()
+        with METRICS.time("html_parse_listing"):
+            entries, url = parse_listing_page(r.text, r.url or url, parser)
+        index.add_many(entries)
+        pages += 1
+        links += len(entries)
+        print("  %s: page %d, %d well links" % (listing, pages, links), flush=True)
+    index.mark_crawled(listing, pages, links)
+    return {"pages": pages, "links": links}
+
+
+def _arg_value(name: str, default=None):
+    for i, a in enumerate(sys.argv):
+        if a == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def _listing_args() -> List[str]:
+    """Positional arguments (URLs or site paths) after --build, skipping option values."""
+    out, skip = [], False
+    for a in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif a in ("--rate", "--burst", "--max-pages", "--base-url", "--html-parser"):
+            skip = True
+        elif not a.startswith("-"):
+            out.append(a)
+    return out
+
+
+def main() -> None:
+    import mysql.connector
+    import requests
+
+    import scraper_wells as scraper
+    from run_metrics import METRICS
+
+    script_dir = Path(__file__).resolve().parent
+    cfg = scraper.load_config()
+    if not scraper.configure_from_config(cfg, _arg_value("--base-url"), _arg_value("--html-parser")):
+        sys.exit(2)
+    path = index_path(cfg, script_dir)
+
+    if "--lookup" in sys.argv or "--stats" in sys.argv:
+        index = open_index(cfg, script_dir)
+        if index is None:
+            print("No index at %s; run python well_index.py --build first." % path, file=sys.stderr)
+            sys.exit(1)
+        if "--lookup" in sys.argv:
+            key = _arg_value("--lookup")
+            url = index.lookup(key, key)
+            print(url or "not in index")
+        else:
+            print("Well index %s: " % path + ", ".join("%s: %s" % kv for kv in index.counts().items()))
+        index.close()
+        return
+
+    if "--build" not in sys.argv:
+        print(__doc__.strip().split("\n\n", 1)[1].split("\n\n")[0])
+        sys.exit(1)
+    try:
+        rate = float(_arg_value("--rate", 2.0))
+        burst = float(_arg_value("--burst", 1))
+        max_pages = int(_arg_value("--max-pages", getattr(cfg, "LISTING_MAX_PAGES", LISTING_MAX_PAGES)))
+    except ValueError:
+        print("--rate, --burst and --max-pages expect numbers", file=sys.stderr)
+        sys.exit(2)
+    listings = _listing_args() or list(getattr(cfg, "DRILLINGEDGE_LISTINGS", []))
+    if not listings:
+        conn = mysql.connector.connect(**cfg.MYSQL_CONFIG)
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT county_state FROM wells WHERE county_state IS NOT NULL")
+        listings = sorted({p for p in (county_listing_path(row[0]) for row in cursor.fetchall()) if p})
+        cursor.close()
+        conn.close()
+    if not listings:
+        print("No listings to crawl: pass URLs, set DRILLINGEDGE_LISTINGS or load wells first.", file=sys.stderr)
+        sys.exit(1)
+    listings = [urljoin(scraper.BASE + "/", u) for u in listings]
+
+    index = WellUrlIndex(path)
+    started = time.perf_counter()
+    try:
+        session = scraper.open_session(cfg, script_dir, 1, rate, burst, int(getattr(cfg, "HTTP_RETRIES", 4)))
+    except requests.RequestException as e:
+        print("Session init: %s" % e, file=sys.stderr)
+        sys.exit(1)
+    failed = 0
+    try:
+        for listing in listings:
+            if index.crawled(listing) and "--refresh" not in sys.argv:
+                continue
+            try:
+                counts = crawl_listing(session, index, listing, max_pages, scraper.HTML_PARSER)
+                print("%s: %d pages, %d well links" % (listing, counts["pages"], counts["links"]))
+            except requests.RequestException as e:
+                failed += 1
+                print("Error %s: %s" % (listing, e), file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\nStopping; run --build again to crawl the remaining listings.")
+    finally:
+        session.close()
+        print("Well index %s: " % path + ", ".join("%s: %s" % kv for kv in index.counts().items())
+              + ", failed listings: %d" % failed)
+        report = METRICS.report(time.perf_counter() - started)
+        if report:
+            print("\n" + report)
+        index.close()
+
+
+if __name__ == "__main__":
+    main()